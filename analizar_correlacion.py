@@ -1,43 +1,29 @@
 import numpy as np
 from simulacion_E3_antiteticas import Pizzeria
+from variables_aleatorias import par_antitetico
 import simpy as sp
 
+# Flujos con 1-U en la réplica antitética (el resto con números comunes)
+FLUJOS_ANTITETICOS = {'coccion', 'despacho_ida', 'despacho_vuelta', 'llamada', 'cantidad_queso', 'tiempo_queso'}
+
 # Ejecutar 20 pares y ver la correlación
 utilidades_normales = []
 utilidades_anti = []
 
 print("Ejecutando 20 pares para analizar correlación...")
 for i in range(20):
-    rng_anti = np.random.default_rng(999999 + i)
-    uniformes_coccion = rng_anti.uniform(0, 1, 1700)
-    uniformes_despacho_ida = rng_anti.uniform(0, 1, 1000)
-    uniformes_despacho_vuelta = rng_anti.uniform(0, 1, 1000)
-    uniformes_llamada = rng_anti.uniform(0, 1, 1000)
-    uniformes_cantidad_queso = rng_anti.uniform(0, 1, 1700)
-    uniformes_tiempo_queso = rng_anti.uniform(0, 1, 1700)
-    
+    variables_normal, variables_anti = par_antitetico(999999 + i, FLUJOS_ANTITETICOS)
+
     # Normal
     env = sp.Environment()
     pizzeria = Pizzeria(env)
-    pizzeria.iniciar_simulacion(168, 2*i, logs=False,
-                               uniformes_coccion=uniformes_coccion,
-                               uniformes_despacho_ida=uniformes_despacho_ida,
-                               uniformes_despacho_vuelta=uniformes_despacho_vuelta,
-                               uniformes_llamada=uniformes_llamada,
-                               uniformes_cantidad_queso=uniformes_cantidad_queso,
-                               uniformes_tiempo_queso=uniformes_tiempo_queso)
+    pizzeria.iniciar_simulacion(168, 2*i, logs=False, variables=variables_normal)
     utilidades_normales.append(pizzeria.obtener_metricas()['Utilidad'])
     
     # Antitética
     env = sp.Environment()
     pizzeria = Pizzeria(env)
-    pizzeria.iniciar_simulacion(168, 2*i+1, logs=False,
-                               uniformes_coccion=1-uniformes_coccion,
-                               uniformes_despacho_ida=1-uniformes_despacho_ida,
-                               uniformes_despacho_vuelta=1-uniformes_despacho_vuelta,
-                               uniformes_llamada=1-uniformes_llamada,
-                               uniformes_cantidad_queso=1-uniformes_cantidad_queso,
-                               uniformes_tiempo_queso=1-uniformes_tiempo_queso)
+    pizzeria.iniciar_simulacion(168, 2*i, logs=False, variables=variables_anti)
     utilidades_anti.append(pizzeria.obtener_metricas()['Utilidad'])
     print(f'Par {i+1}: Normal=${utilidades_normales[-1]:,.0f}, Anti=${utilidades_anti[-1]:,.0f}, Diff=${abs(utilidades_normales[-1]-utilidades_anti[-1]):,.0f}')
 
@@ -0,0 +1,191 @@
+"""
+Benchmark de rendimiento de las réplicas de la pizzería.
+
+Mide iniciar_simulacion + obtener_metricas para distintos horizontes
+(semanas), cargas (factor sobre las tasas de llegada), con logs activados o
+no, y para cada motor de ejecución:
+  - 'serial': réplicas una tras otra en un proceso.
+  - 'procesos': réplicas repartidas en un pool de procesos.
+  - 'serial_simpy': serial usando sp.PriorityResource en los recursos.
+
+Reporta réplicas/s, eventos/s y RSS máximo, y guarda los resultados en JSON.
+Con --memoria HORAS las réplicas corren además con el perfil de memoria de
+memoria.py (snapshots cada HORAS simuladas) y cada caso reporta la memoria
+trazada, su crecimiento por semana simulada y los sitios que más retienen.
+Con --referencia compara contra un JSON anterior y marca como regresión
+cada caso cuyo rendimiento (réplicas/s) cae, o cuya memoria (RSS máximo y,
+en modo memoria, crecimiento por semana) sube, más que --umbral.
+
+Ejemplo:
+    python benchmark_replicas.py --horizontes 1 4 --cargas 1 2 --salida bench.json
+    python benchmark_replicas.py --horizontes 1 4 --cargas 1 2 --referencia bench.json
+    python benchmark_replicas.py --horizontes 4 52 --cargas 1 --motores serial --memoria 168
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ejecutor_replicas import ejecutar_replicas
+
+
+MOTORES = ['serial', 'procesos', 'serial_simpy']
+
+
+def clave_caso(caso):
+    clave = f"{caso['horizonte_semanas']}sem|x{caso['factor_llegadas']}|logs={caso['logs']}|{caso['motor']}"
+    # Con tracemalloc el rendimiento no es comparable con una corrida normal
+    return clave + '|memoria' if caso.get('memoria') else clave
+
+
+def _correr_caso(horizonte_semanas, factor, logs, motor, replicas, procesos, semilla_inicial, memoria_horas=None):
+    escenario = {'factor_llegadas': factor}
+    motor_ejecucion = motor
+    if motor == 'serial_simpy':
+        escenario['clase_recurso'] = 'simpy'
+        motor_ejecucion = 'serial'
+
+    semillas = range(semilla_inicial, semilla_inicial + replicas)
+    inicio = time.perf_counter()
+    resultados = ejecutar_replicas(
+        escenario, semillas, 168 * horizonte_semanas,
+        motor=motor_ejecucion, procesos=procesos, logs=logs, memoria_horas=memoria_horas,
+    )
+    duracion = time.perf_counter() - inicio
+    eventos = sum(r['eventos'] for r in resultados)
+
+    caso = {
+        'horizonte_semanas': horizonte_semanas,
+        'factor_llegadas': factor,
+        'logs': logs,
+        'motor': motor,
+        'replicas': replicas,
+        'segundos': duracion,
+        'replicas_por_segundo': replicas / duracion,
+        'eventos_por_segundo': eventos / duracion,
+        'eventos_por_replica': eventos / replicas,
+        'rss_max_mb': max(r['rss_max_kb'] for r in resultados) / 1024,
+    }
+    if memoria_horas:
+        memorias = [r['memoria'] for r in resultados]
+        caso.update({
+            'memoria': True,
+            'trazada_mb': max(m['trazada_mb'] for m in memorias),
+            'pico_trazada_mb': max(m['pico_trazada_mb'] for m in memorias),
+            'crecimiento_mb_semana': max(m['crecimiento_mb_semana'] for m in memorias),
+            'sitios': memorias[0]['sitios'][:5],
+            'contenedores': memorias[0]['contenedores'],
+        })
+    return caso
+
+
+def medir_caso(horizonte_semanas, factor, logs, motor, replicas, procesos=None, semilla_inicial=0, memoria_horas=None):
+    """
+    Mide un caso. Los motores seriales corren en un proceso nuevo para que el
+    RSS máximo corresponda sólo a ese caso.
+    """
+    argumentos = (horizonte_semanas, factor, logs, motor, replicas, procesos, semilla_inicial, memoria_horas)
+    if motor == 'procesos':
+        return _correr_caso(*argumentos)
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_correr_caso, *argumentos).result()
+
+
+def correr_benchmark(horizontes, cargas, logs, motores, replicas, procesos=None, memoria_horas=None):
+    casos = []
+    for horizonte, factor, con_logs, motor in itertools.product(horizontes, cargas, logs, motores):
+        caso = medir_caso(horizonte, factor, con_logs, motor, replicas, procesos, memoria_horas=memoria_horas)
+        linea = (
+            f"{clave_caso(caso):<40} {caso['replicas_por_segundo']:8.3f} rep/s "
+            f"{caso['eventos_por_segundo']:12,.0f} ev/s {caso['rss_max_mb']:8.1f} MB"
+        )
+        if memoria_horas:
+            linea += f" {caso['trazada_mb']:8.1f} MB trazados {caso['crecimiento_mb_semana']:+7.2f} MB/sem"
+        print(linea)
+        casos.append(caso)
+    return {
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'casos': casos,
+    }
+
+
+def comparar_con_referencia(resultados, referencia, umbral=0.10):
+    """
+    Retorna la lista de regresiones: casos presentes en ambas corridas cuyo
+    rendimiento (réplicas/s) bajó, o cuya memoria subió, más que el umbral
+    relativo.
+    """
+    casos_referencia = {clave_caso(caso): caso for caso in referencia['casos']}
+    regresiones = []
+    for caso in resultados['casos']:
+        base = casos_referencia.get(clave_caso(caso))
+        if base is None:
+            continue
+        # (medida, signo): +1 si más es mejor, -1 si más es peor
+        medidas = [('replicas_por_segundo', 1), ('rss_max_mb', -1)]
+        if caso.get('memoria') and 'crecimiento_mb_semana' in base:
+            medidas.append(('crecimiento_mb_semana', -1))
+        cambios = []
+        for medida, signo in medidas:
+            if not base[medida]:
+                continue
+            cambio = caso[medida] / base[medida] - 1
+            cambios.append(f'{medida} {cambio:+.1%}')
+            if signo * cambio < -umbral:
+                regresiones.append({
+                    'caso': clave_caso(caso),
+                    'medida': medida,
+                    'referencia': base[medida],
+                    'actual': caso[medida],
+                    'cambio': cambio,
+                })
+        print(f"{clave_caso(caso):<40} {'  '.join(cambios)}")
+    return regresiones
+
+
+def _a_bool(texto):
+    return texto in ('on', 'si', 'sí', 'true', '1')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark de réplicas de la pizzería')
+    parser.add_argument('--horizontes', type=int, nargs='+', default=[1, 4, 52], help='semanas simuladas')
+    parser.add_argument('--cargas', type=float, nargs='+', default=[1, 2, 4], help='factor de las tasas de llegada')
+    parser.add_argument('--logs', nargs='+', default=['off', 'on'], help='off y/o on')
+    parser.add_argument('--motores', nargs='+', default=MOTORES, choices=MOTORES)
+    parser.add_argument('--replicas', type=int, default=2, help='réplicas por caso')
+    parser.add_argument('--procesos', type=int, default=None, help='procesos del pool (por defecto, todas las CPU)')
+    parser.add_argument('--salida', default='benchmark_resultados.json')
+    parser.add_argument('--referencia', default=None, help='JSON de una corrida anterior')
+    parser.add_argument('--umbral', type=float, default=0.10, help='cambio relativo tolerado en cada medida')
+    parser.add_argument('--memoria', type=float, default=None, metavar='HORAS',
+                        help='perfil de memoria con snapshots cada HORAS simuladas')
+    args = parser.parse_args()
+
+    resultados = correr_benchmark(
+        args.horizontes, args.cargas, [_a_bool(x) for x in args.logs],
+        args.motores, args.replicas, args.procesos, args.memoria,
+    )
+    with open(args.salida, 'w') as f:
+        json.dump(resultados, f, indent=2)
+    print(f'\nResultados guardados en {args.salida}')
+
+    if args.referencia:
+        with open(args.referencia) as f:
+            referencia = json.load(f)
+        print(f'\nComparación con {args.referencia}:')
+        regresiones = comparar_con_referencia(resultados, referencia, args.umbral)
+        if regresiones:
+            print(f'\n{len(regresiones)} regresiones sobre el umbral de {args.umbral:.0%}:')
+            for regresion in regresiones:
+                print(f"  {regresion['caso']}: {regresion['medida']} {regresion['cambio']:+.1%}")
+            sys.exit(1)
+        print('\nSin regresiones.')
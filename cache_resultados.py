@@ -0,0 +1,103 @@
+"""
+Cache de resultados de réplicas, en memoria o en un archivo JSON lines.
+
+Una réplica se identifica por (escenario, horizonte, semilla, réplica) y se
+corre como en comparacion_pareada.py: VariablesAleatorias([semilla, r]) y
+semilla de Pizzeria r. Así la réplica r de dos escenarios usa números
+aleatorios comunes y una réplica ya corrida (en esta sesión o en otra, si
+se da un archivo) no se vuelve a correr: los procedimientos de selección y
+de optimización piden réplicas incrementalmente y sólo simulan las nuevas.
+
+Se guardan el escenario, las métricas de obtener_metricas() y los quiebres
+de stock; metamodelo.py ajusta superficies de respuesta con los resultados
+guardados (resultados_por_escenario).
+"""
+
+import json
+import os
+
+from ejecutor_replicas import ejecutar_casos
+from medias_controles import clave_escenario
+from variables_aleatorias import VariablesAleatorias
+
+
+class CacheResultados:
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta
+        self.resultados = {}
+        self.aciertos = 0
+        self.simuladas = 0
+        if ruta is not None and os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as archivo:
+                for linea in archivo:
+                    registro = json.loads(linea)
+                    self.resultados[tuple(registro['clave'])] = registro['resultado']
+
+    @staticmethod
+    def clave(escenario, tiempo_horas, semilla, replica):
+        return (clave_escenario(escenario), float(tiempo_horas), semilla, replica)
+
+    def obtener(self, escenario, tiempo_horas, semilla, replica):
+        return self.resultados.get(self.clave(escenario, tiempo_horas, semilla, replica))
+
+    def guardar(self, escenario, tiempo_horas, semilla, replica, resultado):
+        clave = self.clave(escenario, tiempo_horas, semilla, replica)
+        self.resultados[clave] = resultado
+        if self.ruta is not None:
+            with open(self.ruta, 'a', encoding='utf-8') as archivo:
+                archivo.write(json.dumps({'clave': list(clave), 'resultado': resultado}) + '\n')
+
+    def resultados_por_escenario(self, tiempo_horas):
+        """[(escenario, [resultados])] de las réplicas guardadas con ese horizonte."""
+        grupos = {}
+        for clave, resultado in self.resultados.items():
+            if clave[1] == float(tiempo_horas) and 'escenario' in resultado:
+                grupos.setdefault(clave[0], (resultado['escenario'], []))[1].append(resultado)
+        return list(grupos.values())
+
+    def replicas(self, escenario, tiempo_horas, replicas, semilla=0, motor='serial', procesos=None, progreso=None):
+        """
+        Resultados ({'escenario', 'metricas', 'quiebres_stock'}) de las
+        réplicas pedidas, en orden; las que faltan se corren juntas con
+        ejecutar_casos.
+        """
+        return self.lote([(escenario, replicas)], tiempo_horas, semilla, motor, procesos, progreso)[0]
+
+    def lote(self, pedidos, tiempo_horas, semilla=0, motor='serial', procesos=None, progreso=None):
+        """
+        Como replicas() para varios escenarios: pedidos es una lista de
+        (escenario, réplicas) y las faltantes de todos se corren en un solo
+        lote (un pool para todos los candidatos, o los trabajadores de un
+        distribuido.Coordinador como motor). Retorna una lista por pedido.
+        """
+        pedidos = [(escenario, list(replicas)) for escenario, replicas in pedidos]
+        faltantes = {}
+        for escenario, replicas in pedidos:
+            for r in replicas:
+                clave = self.clave(escenario, tiempo_horas, semilla, r)
+                if clave in self.resultados or clave in faltantes:
+                    self.aciertos += 1
+                else:
+                    faltantes[clave] = (escenario, r)
+        if faltantes:
+            casos = list(faltantes.values())
+
+            def guardar(i, corrida):
+                # Cada réplica se guarda al terminar: un lote interrumpido no pierde las ya corridas
+                escenario, r = casos[i]
+                self.guardar(escenario, tiempo_horas, semilla, r, {
+                    'escenario': escenario,
+                    'metricas': {nombre: float(valor) for nombre, valor in corrida['metricas'].items()},
+                    'quiebres_stock': corrida['quiebres_stock'],
+                })
+
+            ejecutar_casos(
+                [(escenario, r, VariablesAleatorias([semilla, r])) for escenario, r in casos],
+                tiempo_horas, motor=motor, procesos=procesos, progreso=progreso, al_terminar=guardar,
+            )
+            self.simuladas += len(faltantes)
+        return [
+            [self.obtener(escenario, tiempo_horas, semilla, r) for r in replicas]
+            for escenario, replicas in pedidos
+        ]
@@ -0,0 +1,176 @@
+"""
+Simulación de una cadena de pizzerías: varias tiendas, cada una con su
+escenario, en una misma réplica.
+
+Cada tienda es una Pizzeria creada con crear_pizzeria y preparada con
+preparar_simulacion en un mismo sp.Environment; la réplica termina cuando
+terminan todas. Pueden compartir:
+
+  - repartidores_compartidos: un solo grupo de repartidores (con
+    prioridad) para todas las tiendas. Cada tienda conserva sus tiempos de
+    viaje y el repartidor vuelve a la tienda que lo pidió. Su costo se
+    reparte en partes iguales (cantidad_repartidores de cada tienda =
+    grupo / tiendas).
+  - despachos_proveedor: un proveedor común con esa cantidad de despachos
+    simultáneos; cada proceso_reposicion espera un despacho libre.
+
+Números aleatorios: la tienda i de la réplica r usa
+VariablesAleatorias([semilla, r, i]) y semilla de Pizzeria r. Sin recursos
+compartidos las tiendas no interactúan y una réplica de la cadena es la
+suma de réplicas independientes de cada tienda: ejecutar_cadena las corre
+entonces como casos separados (ejecutor_replicas.ejecutar_casos), que se
+reparten entre procesos con motor='procesos', con los mismos resultados que
+el entorno común. Con recursos compartidos cada réplica de la cadena corre
+en un solo entorno y lo que se reparte entre procesos son las réplicas.
+
+Las métricas de la cadena suman Utilidad y ponderan las proporciones y el
+tiempo medio por llamadas o pedidos de cada tienda.
+
+Uso:
+    python cadena.py --tienda factor_llegadas=1.2 --tienda cantidad_trabajadores=4 --tienda \\
+        --repartidores-compartidos 15 --proveedor 1 --replicas 4
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import simpy as sp
+
+from comparacion_pareada import leer_escenario
+from ejecutor_replicas import crear_pizzeria, ejecutar_casos
+from variables_aleatorias import VariablesAleatorias
+
+
+def variables_tienda(semilla, replica, tienda):
+    return VariablesAleatorias([semilla, replica, tienda])
+
+
+def metricas_cadena(tiendas):
+    """
+    Métricas agregadas de la cadena a partir de [{'metricas', 'controles'}]
+    de cada tienda (como los resultados de simular_replica).
+    """
+    llamadas = np.array([tienda['controles']['Llamadas Totales'] for tienda in tiendas], dtype=float)
+    perdidas = np.array([tienda['metricas']['Proporcion Llamadas Perdidas'] for tienda in tiendas])
+    pedidos = llamadas * (1 - perdidas)
+
+    def ponderada(nombre, pesos):
+        valores = np.array([tienda['metricas'][nombre] for tienda in tiendas])
+        return float(valores @ pesos / pesos.sum()) if pesos.sum() else 0.0
+
+    return {
+        'Utilidad': float(sum(tienda['metricas']['Utilidad'] for tienda in tiendas)),
+        'Proporcion Llamadas Perdidas': ponderada('Proporcion Llamadas Perdidas', llamadas),
+        'Proporcion Pedidos Tardíos': ponderada('Proporcion Pedidos Tardíos', pedidos),
+        'Tiempo Medio para Procesar un Pedido (min)': ponderada('Tiempo Medio para Procesar un Pedido (min)', pedidos),
+    }
+
+
+def simular_cadena(
+    tiendas, tiempo_horas, replica=0, semilla=0, repartidores_compartidos=None, despachos_proveedor=None,
+):
+    """
+    Una réplica de la cadena en un solo entorno. tiendas es una lista de
+    escenarios. Retorna {'tiendas': [{'metricas', 'controles',
+    'quiebres_stock'}], 'cadena': metricas_cadena, 'eventos'}.
+    """
+    env = sp.Environment()
+    pizzerias = [crear_pizzeria(env, escenario) for escenario in tiendas]
+    if repartidores_compartidos is not None:
+        grupo = pizzerias[0].clase_recurso(env, capacity=repartidores_compartidos)
+        for pizzeria in pizzerias:
+            pizzeria.repartidores = grupo
+            pizzeria.cantidad_repartidores = repartidores_compartidos / len(pizzerias)
+    if despachos_proveedor is not None:
+        proveedor = sp.Resource(env, capacity=despachos_proveedor)
+        for pizzeria in pizzerias:
+            pizzeria.proveedor = proveedor
+
+    for i, pizzeria in enumerate(pizzerias):
+        pizzeria.preparar_simulacion(tiempo_horas, replica, variables=variables_tienda(semilla, replica, i))
+    try:
+        env.run(until=sp.AllOf(env, [pizzeria.evento_termino_simulacion for pizzeria in pizzerias]))
+    except RuntimeError:
+        pass  # sin eventos pendientes, como en Pizzeria.iniciar_simulacion
+
+    resultados = [
+        {
+            'metricas': pizzeria.obtener_metricas(),
+            'controles': pizzeria.obtener_controles(),
+            'quiebres_stock': dict(pizzeria.quiebres_stock),
+        }
+        for pizzeria in pizzerias
+    ]
+    return {'tiendas': resultados, 'cadena': metricas_cadena(resultados), 'eventos': next(env._eid)}
+
+
+def _simular_cadena_tarea(tarea):
+    return simular_cadena(*tarea)
+
+
+def ejecutar_cadena(
+    tiendas, tiempo_horas, replicas, semilla=0, repartidores_compartidos=None, despachos_proveedor=None,
+    motor='serial', procesos=None,
+):
+    """
+    Réplicas de la cadena (lista de resultados como los de simular_cadena,
+    sin 'eventos' cuando las tiendas se corren por separado). Sin recursos
+    compartidos cada (réplica, tienda) es un caso independiente; con
+    recursos compartidos cada réplica es una tarea.
+    """
+    replicas = list(replicas)
+    if repartidores_compartidos is None and despachos_proveedor is None:
+        casos = [
+            (tienda, r, variables_tienda(semilla, r, i))
+            for r in replicas for i, tienda in enumerate(tiendas)
+        ]
+        corridas = ejecutar_casos(casos, tiempo_horas, motor=motor, procesos=procesos)
+        resultados = []
+        for j in range(len(replicas)):
+            por_tienda = [
+                {clave: corrida[clave] for clave in ('metricas', 'controles', 'quiebres_stock')}
+                for corrida in corridas[j * len(tiendas):(j + 1) * len(tiendas)]
+            ]
+            resultados.append({'tiendas': por_tienda, 'cadena': metricas_cadena(por_tienda)})
+        return resultados
+
+    tareas = [
+        (tiendas, tiempo_horas, r, semilla, repartidores_compartidos, despachos_proveedor) for r in replicas
+    ]
+    if motor == 'serial':
+        return [_simular_cadena_tarea(tarea) for tarea in tareas]
+    if motor == 'procesos':
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            return list(pool.map(_simular_cadena_tarea, tareas))
+    raise ValueError(f'Motor desconocido: {motor}')
+
+
+def imprimir_cadena(tiendas, resultados):
+    metricas = list(resultados[0]['cadena'])
+    print(f"{'':<40}" + ''.join(f'{nombre[:22]:>24}' for nombre in metricas))
+    for i, escenario in enumerate(tiendas):
+        valores = [np.mean([r['tiendas'][i]['metricas'][nombre] for r in resultados]) for nombre in metricas]
+        print(f'Tienda {i} {str(escenario)[:32]:<33}' + ''.join(f'{valor:>24,.4f}' for valor in valores))
+    valores = [np.mean([r['cadena'][nombre] for r in resultados]) for nombre in metricas]
+    print(f"{'Cadena':<40}" + ''.join(f'{valor:>24,.4f}' for valor in valores))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulación de una cadena de pizzerías')
+    parser.add_argument('--tienda', nargs='*', action='append', default=None,
+                        help='escenario de una tienda como atributo=valor (repetir por tienda)')
+    parser.add_argument('--repartidores-compartidos', type=int, help='grupo único de repartidores')
+    parser.add_argument('--proveedor', type=int, help='despachos simultáneos del proveedor común')
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    args = parser.parse_args()
+
+    tiendas = [leer_escenario(asignaciones) for asignaciones in (args.tienda or [[], []])]
+    resultados = ejecutar_cadena(
+        tiendas, args.horas, range(args.replicas), args.semilla, args.repartidores_compartidos,
+        args.proveedor, args.motor,
+    )
+    imprimir_cadena(tiendas, resultados)
@@ -0,0 +1,119 @@
+"""
+Comparación pareada de dos configuraciones con números aleatorios comunes.
+
+La réplica i de A y la de B usan el mismo VariablesAleatorias([semilla, i])
+(un generador por flujo, variables_aleatorias.py): la k-ésima llamada, el
+k-ésimo tiempo de cocción, etc. son los mismos en ambas aunque un cambio de
+dotación reordene los eventos. Con D_i = Y_i(B) - Y_i(A):
+
+    diferencia      = promedio de D_i
+    Var(diferencia) = s^2(D) / n,   intervalo t con n - 1 gl
+
+contra (s^2(A) + s^2(B)) / n de dos lotes independientes; la reducción es
+2 Cov(A, B) / n, grande cuando la métrica responde parecido a las mismas
+entradas en ambas configuraciones.
+
+Uso:
+    python comparacion_pareada.py --a cantidad_repartidores=6 --b cantidad_repartidores=7 --replicas 30
+"""
+
+import argparse
+import ast
+import math
+
+import numpy as np
+from scipy import stats
+
+from ejecutor_replicas import ejecutar_replicas
+from variables_aleatorias import VariablesAleatorias
+
+
+def resumen_diferencias(valores_a, valores_b, confianza=0.95):
+    """Intervalo de E[B - A] con réplicas pareadas (misma posición = mismas entradas)."""
+    a = np.asarray(valores_a, dtype=float)
+    b = np.asarray(valores_b, dtype=float)
+    n = len(a)
+    diferencias = b - a
+    varianza = diferencias.var(ddof=1) / n
+    varianza_independiente = (a.var(ddof=1) + b.var(ddof=1)) / n
+    semiancho = stats.t.ppf((1 + confianza) / 2, n - 1) * math.sqrt(varianza)
+    media = float(diferencias.mean())
+    return {
+        'media_a': float(a.mean()),
+        'media_b': float(b.mean()),
+        'diferencia': media,
+        'varianza': varianza,
+        'semiancho': semiancho,
+        'confianza': confianza,
+        'n': n,
+        'significativa': abs(media) > semiancho,
+        'correlacion': float(np.corrcoef(a, b)[0, 1]) if a.std() > 0 and b.std() > 0 else math.nan,
+        'varianza_independiente': varianza_independiente,
+        # Fracción de las réplicas independientes que da la misma precisión
+        'fraccion_replicas': varianza / varianza_independiente if varianza_independiente > 0 else math.nan,
+    }
+
+
+def comparar_configuraciones(
+    escenario_a, escenario_b, tiempo_horas, n, semilla=0, comunes=True,
+    confianza=0.95, motor='serial', procesos=None, progreso=None,
+):
+    """
+    Corre n réplicas de cada escenario y retorna {métrica: resumen_diferencias}
+    más los resultados de A y de B. Con comunes=False B usa otras semillas
+    (dos lotes independientes, para medir la ganancia del pareo).
+    """
+    semilla_b = semilla if comunes else semilla + 1
+    resultados = {}
+    for clave, escenario, base in [('a', escenario_a, semilla), ('b', escenario_b, semilla_b)]:
+        variables = [VariablesAleatorias([base, i]) for i in range(n)]
+        resultados[clave] = ejecutar_replicas(
+            escenario, range(n), tiempo_horas, motor=motor, procesos=procesos,
+            progreso=progreso, variables=variables,
+        )
+    resumen = {
+        metrica: resumen_diferencias(
+            [r['metricas'][metrica] for r in resultados['a']],
+            [r['metricas'][metrica] for r in resultados['b']],
+            confianza,
+        )
+        for metrica in resultados['a'][0]['metricas']
+    }
+    return resumen, resultados['a'], resultados['b']
+
+
+def imprimir_diferencias(resumen):
+    print(f"{'Métrica':<52} {'A':>14} {'B':>14} {'B - A':>14} {'± semiancho':>13} {'corr':>6} {'fracción':>9}")
+    for metrica, datos in resumen.items():
+        marca = '*' if datos['significativa'] else ' '
+        print(
+            f"{metrica:<52} {datos['media_a']:>14,.4f} {datos['media_b']:>14,.4f} {datos['diferencia']:>14,.4f} "
+            f"{datos['semiancho']:>13,.4f}{marca} {datos['correlacion']:>6.2f} {datos['fraccion_replicas']:>9.3f}"
+        )
+
+
+def leer_escenario(asignaciones):
+    # ['cantidad_repartidores=7', 'factor_llegadas=1.1'] -> diccionario
+    escenario = {}
+    for asignacion in asignaciones or []:
+        atributo, _, valor = asignacion.partition('=')
+        escenario[atributo] = ast.literal_eval(valor)
+    return escenario
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Comparación pareada de configuraciones (números aleatorios comunes)')
+    parser.add_argument('--a', nargs='*', default=[], help='atributo=valor de la configuración A')
+    parser.add_argument('--b', nargs='*', default=[], help='atributo=valor de la configuración B')
+    parser.add_argument('--replicas', type=int, default=30)
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--independientes', action='store_true', help='sin números aleatorios comunes (referencia)')
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    args = parser.parse_args()
+
+    resumen, _, _ = comparar_configuraciones(
+        leer_escenario(args.a), leer_escenario(args.b), args.horas, args.replicas, args.semilla,
+        comunes=not args.independientes, motor=args.motor,
+    )
+    imprimir_diferencias(resumen)
@@ -1,6 +1,5 @@
 """
-Probar con UNA sola variable de control: Total Pizzas
-Para evitar la redundancia de usar Pizzas y Pedidos (correlación 0.90)
+Probar con UNA sola variable de control: Llamadas Totales (E[X] exacta)
 """
 from simulacion_E3_variablecontrol import replicas_simulación
 
@@ -9,7 +8,7 @@ n_replicas_vc = 100  # 20 calibración + 80 estimación
 tiempo_horas = 168
 
 print("="*80)
-print("COMPARACIÓN: UNA VARIABLE DE CONTROL (Total Pizzas)")
+print("COMPARACIÓN: UNA VARIABLE DE CONTROL (Llamadas Totales)")
 print("="*80)
 print(f"\nCaso Base: {n_replicas_base} réplicas")
 print(f"Variable Control: {n_replicas_vc} réplicas (20% calibración + 80% estimación)\n")
@@ -19,7 +18,7 @@ print("Ejecutando CASO BASE...")
 _, stats_base = replicas_simulación(n_replicas_base, tiempo_horas, usar_variable_control=False)
 
 # Con variable de control
-print("\nEjecutando con VARIABLE DE CONTROL (Pizzas)...")
+print("\nEjecutando con VARIABLE DE CONTROL (Llamadas)...")
 _, stats_vc = replicas_simulación(n_replicas_vc, tiempo_horas, usar_variable_control=True)
 
 # Comparación
@@ -8,6 +8,7 @@ import numpy as np
 import simpy as sp
 from simulacion_E3_reduccion_combinada import Pizzeria, replicas_simulación
 import pandas as pd
+from progreso import ReporteProgreso
 
 # Parámetros de simulación
 tiempo_simulacion = 168  # 1 semana
@@ -31,16 +32,15 @@ print("EJECUTANDO CASO BASE (sin reducción de varianza)...")
 print("="*80 + "\n")
 
 utilidades_base = []
+progreso = ReporteProgreso(n_replicas_base)
 for i in range(n_replicas_base):
     env = sp.Environment()
     pizzeria = Pizzeria(env)
     pizzeria.iniciar_simulacion(tiempo_simulacion, seed=i, logs=False)
     metricas = pizzeria.obtener_metricas()
     utilidades_base.append(metricas['Utilidad'])
-    print(f'Réplica {i+1} completada.')
-    print("")
-    print("--------------------------------")
-    print("")
+    progreso.registrar(metricas)
+progreso.terminar()
 
 media_base = np.mean(utilidades_base)
 varianza_base = np.var(utilidades_base, ddof=1)
@@ -60,22 +60,22 @@ print(f"                  solo necesitas ~{n_replicas_base/factor_reduccion:.0f}
 print(f"                  (más {stats_mvc['n_calib']} réplicas para calibración = {n_replicas_base/factor_reduccion + stats_mvc['n_calib']:.0f} total)")
 
 print(f"\n  Coeficientes de control óptimos (calibrados con {stats_mvc['n_calib']} réplicas):")
-print(f"    c1 (Pizzas) = {stats_mvc['coeficientes']['c1_pizzas']:.4f}")
+print(f"    c1 (Llamadas) = {stats_mvc['coeficientes']['c1_llamadas']:.4f}")
 print(f"    c2 (Cocción) = {stats_mvc['coeficientes']['c2_coccion']:.4f}")
 print(f"    c3 (Despacho) = {stats_mvc['coeficientes']['c3_despacho']:.4f}")
 
 print("\n  Diagnóstico de correlaciones (en datos de calibración):")
-print(f"    Corr(Utilidad, Pizzas) = {stats_mvc['correlaciones']['Y_X1']:.4f}")
+print(f"    Corr(Utilidad, Llamadas) = {stats_mvc['correlaciones']['Y_X1']:.4f}")
 print(f"    Corr(Utilidad, Cocción) = {stats_mvc['correlaciones']['Y_X2']:.4f}")
 print(f"    Corr(Utilidad, Despacho) = {stats_mvc['correlaciones']['Y_X3']:.4f}")
-print(f"    Corr(Pizzas, Cocción) = {stats_mvc['correlaciones']['X1_X2']:.4f}")
-print(f"    Corr(Pizzas, Despacho) = {stats_mvc['correlaciones']['X1_X3']:.4f}")
+print(f"    Corr(Llamadas, Cocción) = {stats_mvc['correlaciones']['X1_X2']:.4f}")
+print(f"    Corr(Llamadas, Despacho) = {stats_mvc['correlaciones']['X1_X3']:.4f}")
 print(f"    Corr(Cocción, Despacho) = {stats_mvc['correlaciones']['X2_X3']:.4f}")
 
 print("\n  Valores observados en calibración vs estimación:")
-print(f"    E[Pizzas] teórico         = {stats_mvc['E_pizzas']}")
-print(f"    E[Pizzas] calibración     = {stats_mvc['X1_mean_calib']:.2f}")
-print(f"    E[Pizzas] estimación      = {stats_mvc['X1_mean_estim']:.2f}")
+print(f"    E[Llamadas] teórico       = {stats_mvc['E_llamadas']:.2f}")
+print(f"    E[Llamadas] calibración   = {stats_mvc['X1_mean_calib']:.2f}")
+print(f"    E[Llamadas] estimación    = {stats_mvc['X1_mean_estim']:.2f}")
 print(f"    E[Cocción] teórico        = {stats_mvc['E_tiempo_coccion']:.2f} min")
 print(f"    E[Cocción] calibración    = {stats_mvc['X2_mean_calib']:.2f} min")
 print(f"    E[Cocción] estimación     = {stats_mvc['X2_mean_estim']:.2f} min")
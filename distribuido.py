@@ -0,0 +1,470 @@
+"""
+Ejecución distribuida de réplicas: un coordinador reparte tareas a
+trabajadores en otras máquinas por TCP.
+
+El Coordinador se usa como motor de ejecutor_replicas (ejecutar_replicas,
+ejecutar_casos) y por lo tanto de CacheResultados.lote, que guarda cada
+réplica apenas llega. Protocolo: un mensaje JSON por línea.
+
+    trabajador -> coordinador: {'tipo': 'hola', 'nombre', 'clave'}
+                               {'tipo': 'listo'}          (pide una tarea)
+                               {'tipo': 'latido'}         (cada latido segundos)
+                               {'tipo': 'resultado', 'id', 'resultado'}
+                               {'tipo': 'error', 'id', 'mensaje'}
+    coordinador -> trabajador: {'tipo': 'tarea', 'id', 'tarea'}
+                               {'tipo': 'fin'}
+
+Una tarea es la de simular_replica: escenario, semilla, horizonte, opciones
+y las variables como {'semilla', 'antiteticas', 'bloque'} de un
+VariablesAleatorias (las subclases, como VariablesLHS, no se envían). Los
+diccionarios con claves que no son texto (p. ej. tasas_finde {hora: tasa})
+viajan como {'__pares__': [[clave, valor], ...]} para que el trabajador
+reciba las mismas claves. Un trabajador que no manda mensajes en latido x
+tolerancia segundos, o que cierra la conexión, se da por perdido y sus
+tareas vuelven a la cola; una tarea que se pierde más de max_intentos veces
+hace fallar el lote. Un error de la simulación es determinista (se repetiría
+en otro trabajador) y hace fallar el lote de inmediato. Si llega tarde el
+resultado de una tarea ya reasignada, se usa el primero.
+
+Los mensajes son JSON (no pickle) y el único control de acceso es la clave
+compartida opcional: el puerto debe quedar en una red de confianza.
+
+Uso (trabajadores locales en lugar de nodos, para probar):
+    python distribuido.py coordinador --locales 3 --replicas 12 --horas 48 --verificar
+En cada nodo, contra un coordinador escuchando en --host 0.0.0.0 --puerto 5555:
+    python distribuido.py trabajador --host coordinador.local --puerto 5555
+"""
+
+import argparse
+import collections
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from variables_aleatorias import VariablesAleatorias
+
+
+def _json_default(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (np.ndarray, set, frozenset)):
+        return sorted(valor) if isinstance(valor, (set, frozenset)) else valor.tolist()
+    raise TypeError(f'No serializable: {type(valor).__name__}')
+
+
+def _enviar(conexion, mensaje, candado):
+    datos = (json.dumps(mensaje, default=_json_default) + '\n').encode()
+    with candado:
+        conexion.sendall(datos)
+
+
+def _empaquetar(valor):
+    # JSON convierte las claves en texto: los diccionarios con otras claves van como pares
+    if isinstance(valor, dict):
+        if all(isinstance(clave, str) for clave in valor):
+            return {clave: _empaquetar(v) for clave, v in valor.items()}
+        return {'__pares__': [[_empaquetar(clave), _empaquetar(v)] for clave, v in valor.items()]}
+    if isinstance(valor, (list, tuple)):
+        return [_empaquetar(v) for v in valor]
+    return valor
+
+
+def _desempaquetar(valor):
+    if isinstance(valor, dict):
+        if set(valor) == {'__pares__'}:
+            return {_desempaquetar(clave): _desempaquetar(v) for clave, v in valor['__pares__']}
+        return {clave: _desempaquetar(v) for clave, v in valor.items()}
+    if isinstance(valor, list):
+        return [_desempaquetar(v) for v in valor]
+    return valor
+
+
+def serializar_tarea(tarea):
+    """Tarea de ejecutor_replicas (tupla de simular_replica) -> diccionario JSON."""
+    escenario, seed, tiempo_horas, logs, instrumentar, perfilar, memoria_horas, antiteticas, variables = tarea
+    if variables is not None:
+        if type(variables) is not VariablesAleatorias:
+            raise ValueError(f'El motor distribuido no envía {type(variables).__name__}, sólo VariablesAleatorias')
+        variables = {
+            'semilla': variables.semilla, 'antiteticas': sorted(variables.antiteticas), 'bloque': variables.bloque,
+        }
+    return {
+        'escenario': _empaquetar(escenario), 'seed': seed, 'tiempo_horas': tiempo_horas, 'logs': logs,
+        'instrumentar': instrumentar, 'perfilar': perfilar, 'memoria_horas': memoria_horas,
+        'antiteticas': antiteticas if antiteticas is None or isinstance(antiteticas, str) else sorted(antiteticas),
+        'variables': variables,
+    }
+
+
+def deserializar_tarea(datos):
+    variables = datos['variables']
+    if variables is not None:
+        variables = VariablesAleatorias(variables['semilla'], variables['antiteticas'], variables['bloque'])
+    return (
+        _desempaquetar(datos['escenario']), datos['seed'], datos['tiempo_horas'], datos['logs'], datos['instrumentar'],
+        datos['perfilar'], datos['memoria_horas'], datos['antiteticas'], variables,
+    )
+
+
+class _Trabajador:
+
+    def __init__(self, conexion, direccion):
+        self.conexion = conexion
+        self.nombre = f'{direccion[0]}:{direccion[1]}'
+        self.candado = threading.Lock()
+        self.ultimo = time.monotonic()
+        self.tareas = set()
+        self.perdido = False
+
+
+class Coordinador:
+    """
+    Servidor de tareas. Se crea antes (o después) de lanzar los
+    trabajadores; ejecutar() bloquea hasta tener todos los resultados.
+    """
+
+    def __init__(
+        self, host='127.0.0.1', puerto=0, latido=2.0, tolerancia=3, max_intentos=3, clave=None,
+        espera_trabajadores=60,
+    ):
+        self.latido = latido
+        self.espera_trabajadores = espera_trabajadores
+        self.tolerancia = tolerancia
+        self.max_intentos = max_intentos
+        self.clave = clave
+        self.servidor = socket.create_server((host, puerto))
+        self.direccion = self.servidor.getsockname()[:2]
+        self.condicion = threading.Condition()
+        self.trabajadores = []
+        self.libres = collections.deque()
+        self.cola = collections.deque()
+        self.lote = 0
+        self.tareas = []
+        self.intentos = []
+        self.recibidos = collections.deque()
+        self.terminadas = set()
+        self.falla = None
+        self.reasignadas = 0
+        self.cerrado = False
+        threading.Thread(target=self._aceptar, daemon=True).start()
+        threading.Thread(target=self._vigilar, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def _aceptar(self):
+        while not self.cerrado:
+            try:
+                conexion, direccion = self.servidor.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._atender, args=(_Trabajador(conexion, direccion),), daemon=True).start()
+
+    def _atender(self, trabajador):
+        # Lee los mensajes de un trabajador hasta que se desconecta
+        try:
+            lector = trabajador.conexion.makefile('r', encoding='utf-8')
+            hola = json.loads(lector.readline() or 'null')
+            if not hola or hola.get('tipo') != 'hola' or hola.get('clave') != self.clave:
+                trabajador.conexion.close()
+                return
+            trabajador.nombre = hola.get('nombre', trabajador.nombre)
+            with self.condicion:
+                self.trabajadores.append(trabajador)
+            for linea in lector:
+                mensaje = json.loads(linea)
+                with self.condicion:
+                    trabajador.ultimo = time.monotonic()
+                    if mensaje['tipo'] == 'listo':
+                        self.libres.append(trabajador)
+                    elif mensaje['tipo'] == 'resultado':
+                        self._recibir(trabajador, tuple(mensaje['id']), mensaje['resultado'])
+                    elif mensaje['tipo'] == 'error':
+                        self._fallar(trabajador, tuple(mensaje['id']), mensaje['mensaje'])
+                    self._despachar()
+        except (OSError, ValueError):
+            pass
+        with self.condicion:
+            self._perder(trabajador)
+
+    def _vigilar(self):
+        # Da por perdidos a los trabajadores sin mensajes en latido x tolerancia
+        while not self.cerrado:
+            time.sleep(self.latido / 2)
+            with self.condicion:
+                limite = time.monotonic() - self.latido * self.tolerancia
+                for trabajador in list(self.trabajadores):
+                    if trabajador.ultimo < limite:
+                        self._perder(trabajador)
+                self.condicion.notify_all()
+
+    def _perder(self, trabajador):
+        # Con self.condicion tomada
+        if trabajador.perdido:
+            return
+        trabajador.perdido = True
+        if trabajador in self.trabajadores:
+            self.trabajadores.remove(trabajador)
+        try:
+            trabajador.conexion.shutdown(socket.SHUT_RDWR)
+            trabajador.conexion.close()
+        except OSError:
+            pass
+        for identificador in trabajador.tareas:
+            self._reintentar(identificador, f'trabajador {trabajador.nombre} perdido')
+        trabajador.tareas.clear()
+        self._despachar()
+
+    def _reintentar(self, identificador, motivo):
+        lote, i = identificador
+        if lote != self.lote or i in self.terminadas:
+            return
+        self.intentos[i] += 1
+        self.reasignadas += 1
+        if self.intentos[i] > self.max_intentos:
+            self.falla = f'La tarea {i} falló {self.intentos[i]} veces: {motivo}'
+        else:
+            self.cola.append(i)
+        self.condicion.notify_all()
+
+    def _fallar(self, trabajador, identificador, motivo):
+        # La simulación falló en el trabajador: no se reintenta
+        trabajador.tareas.discard(identificador)
+        lote, i = identificador
+        if lote != self.lote or i in self.terminadas:
+            return
+        self.falla = f'La tarea {i} falló en {trabajador.nombre}: {motivo}'
+        self.condicion.notify_all()
+
+    def _recibir(self, trabajador, identificador, resultado):
+        trabajador.tareas.discard(identificador)
+        lote, i = identificador
+        if lote != self.lote or i in self.terminadas:
+            return  # tarea de un lote anterior o ya recibida de otro trabajador
+        self.terminadas.add(i)
+        self.recibidos.append((i, resultado))
+        self.condicion.notify_all()
+
+    def _despachar(self):
+        # Con self.condicion tomada: asigna tareas pendientes a trabajadores libres
+        while self.cola and self.libres:
+            trabajador = self.libres.popleft()
+            if trabajador.perdido:
+                continue
+            i = self.cola.popleft()
+            if i in self.terminadas:
+                self.libres.appendleft(trabajador)
+                continue
+            identificador = (self.lote, i)
+            try:
+                _enviar(trabajador.conexion, {'tipo': 'tarea', 'id': identificador, 'tarea': self.tareas[i]},
+                        trabajador.candado)
+            except OSError:
+                self.cola.appendleft(i)
+                continue
+            trabajador.tareas.add(identificador)
+
+    def ejecutar(self, tareas, registrar):
+        """
+        Reparte tareas de ejecutor_replicas y llama registrar(i, resultado)
+        (en este hilo) a medida que llegan. Falla con RuntimeError si una
+        tarea falla en un trabajador, si se pierde más de max_intentos veces
+        o si pasan espera_trabajadores segundos sin trabajadores conectados.
+        """
+        serializadas = [serializar_tarea(tarea) for tarea in tareas]
+        with self.condicion:
+            self.lote += 1
+            self.tareas = serializadas
+            self.intentos = [0] * len(tareas)
+            self.terminadas = set()
+            self.recibidos.clear()
+            self.falla = None
+            self.cola.extend(range(len(tareas)))
+            self._despachar()
+        entregadas = 0
+        sin_trabajadores = time.monotonic()
+        while entregadas < len(tareas):
+            with self.condicion:
+                while not self.recibidos and self.falla is None:
+                    self.condicion.wait(self.latido)
+                    if self.trabajadores:
+                        sin_trabajadores = time.monotonic()
+                    elif time.monotonic() - sin_trabajadores > self.espera_trabajadores:
+                        self.falla = f'Sin trabajadores conectados por {self.espera_trabajadores} s'
+                if self.falla is not None:
+                    self.cola.clear()
+                    raise RuntimeError(self.falla)
+                listos = list(self.recibidos)
+                self.recibidos.clear()
+            for i, resultado in listos:
+                registrar(i, resultado)
+                entregadas += 1
+
+    def cerrar(self):
+        with self.condicion:
+            self.cerrado = True
+            for trabajador in list(self.trabajadores):
+                try:
+                    _enviar(trabajador.conexion, {'tipo': 'fin'}, trabajador.candado)
+                except OSError:
+                    pass
+        self.servidor.close()
+
+
+def trabajar(host, puerto, latido=2.0, clave=None, nombre=None, espera=30, abandonar_tras=None, colgar_tras=None):
+    """
+    Bucle de un trabajador: pide tareas, las simula y devuelve los
+    resultados hasta recibir 'fin'. abandonar_tras / colgar_tras simulan la
+    caída de un nodo (salida abrupta o sin latidos) tras esa cantidad de
+    tareas, para probar las reasignaciones.
+    """
+    from ejecutor_replicas import simular_replica
+
+    limite = time.monotonic() + espera
+    while True:
+        try:
+            conexion = socket.create_connection((host, puerto))
+            break
+        except OSError:
+            if time.monotonic() > limite:
+                raise
+            time.sleep(0.5)
+    candado = threading.Lock()
+    vivo = threading.Event()
+    vivo.set()
+
+    def latir():
+        while vivo.is_set():
+            time.sleep(latido)
+            if vivo.is_set():
+                try:
+                    _enviar(conexion, {'tipo': 'latido'}, candado)
+                except OSError:
+                    return
+
+    nombre = nombre or f'{socket.gethostname()}:{os.getpid()}'
+    _enviar(conexion, {'tipo': 'hola', 'nombre': nombre, 'clave': clave}, candado)
+    threading.Thread(target=latir, daemon=True).start()
+    lector = conexion.makefile('r', encoding='utf-8')
+    hechas = 0
+    try:
+        while True:
+            _enviar(conexion, {'tipo': 'listo'}, candado)
+            linea = lector.readline()
+            if not linea:
+                return hechas
+            mensaje = json.loads(linea)
+            if mensaje['tipo'] == 'fin':
+                return hechas
+            if abandonar_tras is not None and hechas >= abandonar_tras:
+                os._exit(1)
+            if colgar_tras is not None and hechas >= colgar_tras:
+                vivo.clear()
+                time.sleep(3600)
+            try:
+                resultado = simular_replica(*deserializar_tarea(mensaje['tarea']))
+                _enviar(conexion, {'tipo': 'resultado', 'id': mensaje['id'], 'resultado': resultado}, candado)
+            except OSError:
+                raise
+            except Exception as error:
+                _enviar(conexion, {'tipo': 'error', 'id': mensaje['id'], 'mensaje': repr(error)}, candado)
+            hechas += 1
+    except OSError:
+        return hechas
+    finally:
+        vivo.clear()
+        conexion.close()
+
+
+def lanzar_locales(coordinador, cantidad, latido=None, **opciones):
+    """
+    Lanza cantidad trabajadores como procesos de esta máquina (en lugar de
+    nodos). opciones se pasan a la línea de comandos del trabajador (p. ej.
+    abandonar_tras=2). Retorna los subprocess.Popen.
+    """
+    host, puerto = coordinador.direccion
+    comando = [
+        sys.executable, os.path.abspath(__file__), 'trabajador', '--host', host, '--puerto', str(puerto),
+        '--latido', str(latido or coordinador.latido),
+    ]
+    if coordinador.clave is not None:
+        comando += ['--clave', coordinador.clave]
+    for opcion, valor in opciones.items():
+        if valor is not None:
+            comando += [f"--{opcion.replace('_', '-')}", str(valor)]
+    return [subprocess.Popen(comando, stdout=subprocess.DEVNULL) for _ in range(cantidad)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Ejecución distribuida de réplicas')
+    parser.add_argument('rol', choices=['coordinador', 'trabajador'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=0)
+    parser.add_argument('--latido', type=float, default=2.0, help='segundos entre latidos')
+    parser.add_argument('--clave', help='clave compartida entre coordinador y trabajadores')
+    # Trabajador
+    parser.add_argument('--abandonar-tras', type=int, help='(prueba) el trabajador se cae tras N tareas')
+    parser.add_argument('--colgar-tras', type=int, help='(prueba) el trabajador deja de latir tras N tareas')
+    # Coordinador
+    parser.add_argument('--locales', type=int, default=0, help='trabajadores locales a lanzar')
+    parser.add_argument('--replicas', type=int, default=12)
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--escenario', nargs='*', default=[], help='atributo=valor')
+    parser.add_argument('--cache', help='archivo JSON lines de resultados')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--verificar', action='store_true', help='compara con la ejecución serial')
+    parser.add_argument('--probar-fallas', action='store_true',
+                        help='un trabajador local se cae y otro se cuelga tras una tarea')
+    args = parser.parse_args()
+
+    if args.rol == 'trabajador':
+        trabajar(args.host, args.puerto, args.latido, args.clave,
+                 abandonar_tras=args.abandonar_tras, colgar_tras=args.colgar_tras)
+        sys.exit(0)
+
+    from cache_resultados import CacheResultados
+    from comparacion_pareada import leer_escenario
+
+    escenario = leer_escenario(args.escenario)
+    with Coordinador(args.host, args.puerto, args.latido, clave=args.clave) as coordinador:
+        print(f'Coordinador en {coordinador.direccion[0]}:{coordinador.direccion[1]}')
+        procesos = []
+        if args.probar_fallas:
+            procesos += lanzar_locales(coordinador, 1, abandonar_tras=1)
+            procesos += lanzar_locales(coordinador, 1, colgar_tras=1)
+        procesos += lanzar_locales(coordinador, args.locales)
+        cache = CacheResultados(args.cache)
+        inicio = time.perf_counter()
+        resultados = cache.replicas(escenario, args.horas, range(args.replicas), args.semilla, motor=coordinador)
+        segundos = time.perf_counter() - inicio
+        print(f'{len(resultados)} réplicas en {segundos:.1f} s, {coordinador.reasignadas} reasignaciones')
+        utilidades = [resultado['metricas']['Utilidad'] for resultado in resultados]
+        print(f'Utilidad media: {np.mean(utilidades):,.0f}')
+        if args.verificar:
+            # También un escenario con claves enteras (tasas_finde {hora: tasa}),
+            # por al menos una semana para que se usen las tasas del fin de semana
+            import simpy as sp
+            from ejecutor_replicas import crear_pizzeria
+            tasas_finde = crear_pizzeria(sp.Environment(), escenario).tasas_finde
+            con_tasas = dict(escenario, tasas_finde={hora: 1.2 * tasa for hora, tasa in tasas_finde.items()})
+            horas_finde = max(args.horas, 168)
+            for nombre, verificado, horas, distribuidos in [
+                ('', escenario, args.horas, resultados),
+                (' (tasas_finde)', con_tasas, horas_finde,
+                 cache.replicas(con_tasas, horas_finde, range(args.replicas), args.semilla, motor=coordinador)),
+            ]:
+                serial = CacheResultados().replicas(verificado, horas, range(args.replicas), args.semilla)
+                iguales = all(a['metricas'] == b['metricas'] for a, b in zip(distribuidos, serial))
+                print(f'Igual a la ejecución serial{nombre}:', iguales)
+    for proceso in procesos:
+        if proceso.poll() is None:
+            proceso.kill()
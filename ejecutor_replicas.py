@@ -0,0 +1,223 @@
+"""
+Ejecución de réplicas de la pizzería, en serie o en un pool de procesos.
+
+Un escenario es un diccionario con los cambios respecto del modelo base:
+  - 'factor_llegadas': escala las tasas de llegada (semana y fin de semana).
+  - 'factor_finde': escala además sólo las tasas del fin de semana.
+  - 'clase_recurso': 'simpy' para usar sp.PriorityResource en vez de
+    RecursoPrioridad (para comparar motores).
+  - las capacidades de recursos (p. ej. 'cantidad_repartidores'), que se
+    aplican con Pizzeria.configurar_recursos.
+  - 'inventarios': {atributo del inventario: {'umbral': ..., 'capacidad': ...}}
+    (p. ej. {'mix_carnes': {'umbral': 80}}), con Pizzeria.configurar_inventario.
+  - 'entradas': {flujo: {parámetro: valor}} (p. ej. {'coccion': {'mu': 2.6}}),
+    parámetros de las distribuciones de variables_aleatorias.PARAMETRICAS;
+    requiere correr con variables (transformada inversa).
+  - cualquier otro atributo simple de Pizzeria (p. ej. 'tasas_finde'), que
+    se asigna directamente antes de iniciar la simulación.
+"""
+
+import contextlib
+import io
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import simpy as sp
+
+from memoria import PerfilMemoria
+from perfilador import PerfilProcesos, guardar_pilas
+from simulacion_E3_antiteticas import Pizzeria
+from variables_aleatorias import VariablesAleatorias, inversas_parametrizadas
+
+
+class PizzeriaSimpy(Pizzeria):
+    clase_recurso = sp.PriorityResource
+
+
+def crear_pizzeria(env, escenario=None):
+    escenario = dict(escenario or {})
+    clase = PizzeriaSimpy if escenario.pop('clase_recurso', None) == 'simpy' else Pizzeria
+    pizzeria = clase(env)
+
+    factor = escenario.pop('factor_llegadas', 1)
+    if factor != 1:
+        pizzeria.tasas_dia_normal = {h: tasa * factor for h, tasa in pizzeria.tasas_dia_normal.items()}
+        pizzeria.tasas_finde = {h: tasa * factor for h, tasa in pizzeria.tasas_finde.items()}
+    factor_finde = escenario.pop('factor_finde', 1)
+    if factor_finde != 1:
+        pizzeria.tasas_finde = {h: tasa * factor_finde for h, tasa in pizzeria.tasas_finde.items()}
+
+    entradas = escenario.pop('entradas', {})
+    if entradas:
+        inversas_parametrizadas(entradas)  # valida flujos y parámetros
+        pizzeria.parametros_entradas = entradas
+
+    for inventario, configuracion in escenario.pop('inventarios', {}).items():
+        pizzeria.configurar_inventario(inventario, **configuracion)
+
+    capacidades = {
+        atributo: escenario.pop(atributo)
+        for atributo in list(escenario) if atributo in pizzeria.recursos_configurables
+    }
+    if capacidades:
+        pizzeria.configurar_recursos(**capacidades)
+
+    for atributo, valor in escenario.items():
+        if not hasattr(pizzeria, atributo):
+            raise ValueError(f'Atributo de escenario desconocido: {atributo}')
+        setattr(pizzeria, atributo, valor)
+    return pizzeria
+
+
+def simular_replica(
+    escenario, seed, tiempo_horas, logs=False, instrumentar=False, perfilar=False, memoria_horas=None,
+    antiteticas=None, variables=None,
+):
+    """
+    Corre una réplica y retorna un diccionario con las métricas, la cantidad
+    de eventos agendados, el tiempo de reloj y el RSS máximo del proceso.
+    Con perfilar=True incluye además el perfil por proceso del modelo
+    (resumen y pilas colapsadas, ver perfilador.py). Con memoria_horas
+    incluye el perfil de memoria con snapshots cada memoria_horas de tiempo
+    simulado (ver memoria.py).
+
+    Con antiteticas distinto de None todas las entradas se sortean por
+    transformada inversa (variables_aleatorias.py) y los flujos nombrados en
+    antiteticas (o 'todas') usan 1 - U; antiteticas=() es el mismo modo sin
+    flujos antitéticos, la otra mitad del par. variables entrega directamente
+    el VariablesAleatorias a usar (p. ej. estratificacion.VariablesLHS).
+    """
+    if perfilar and memoria_horas:
+        raise ValueError('El perfil de CPU y el de memoria no se pueden combinar en una réplica')
+    inicio = time.perf_counter()
+    env = sp.Environment()
+    pizzeria = crear_pizzeria(env, escenario)
+    perfilador = None
+    if perfilar:
+        perfilador = PerfilProcesos(f'replica_{seed}')
+    elif memoria_horas:
+        perfilador = PerfilMemoria(memoria_horas)
+    if variables is not None and antiteticas is not None:
+        raise ValueError('Se dan antiteticas o variables, no ambas')
+    if antiteticas is not None:
+        variables = VariablesAleatorias(seed, antiteticas)
+    if logs:
+        # Los logs se generan igual (log_data), pero no se imprimen
+        with contextlib.redirect_stdout(io.StringIO()):
+            pizzeria.iniciar_simulacion(
+                tiempo_horas, seed, logs=True, instrumentar=instrumentar, perfilador=perfilador,
+                variables=variables,
+            )
+    else:
+        pizzeria.iniciar_simulacion(
+            tiempo_horas, seed, logs=False, instrumentar=instrumentar, perfilador=perfilador,
+            variables=variables,
+        )
+    metricas = pizzeria.obtener_metricas()
+    if memoria_horas:
+        perfilador.finalizar()
+
+    return {
+        'seed': seed,
+        'metricas': metricas,
+        'controles': pizzeria.obtener_controles(),
+        'quiebres_stock': dict(pizzeria.quiebres_stock),
+        # Razón de verosimilitud de la réplica (1 salvo con muestreo de importancia)
+        'log_peso': 0.0 if variables is None else variables.log_peso,
+        'instrumentacion': pizzeria.obtener_instrumentacion(),
+        'perfil': None if not perfilar else {
+            'resumen': perfilador.resumen(),
+            'pilas': perfilador.pilas_colapsadas(),
+        },
+        'memoria': perfilador.reporte() if memoria_horas else None,
+        # El contador de ids de SimPy entrega la cantidad de eventos agendados
+        'eventos': next(env._eid),
+        'segundos': time.perf_counter() - inicio,
+        'rss_max_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'pid': os.getpid(),
+    }
+
+
+def _simular_tarea(tarea):
+    return simular_replica(*tarea)
+
+
+def ejecutar_replicas(
+    escenario, semillas, tiempo_horas, motor='serial', procesos=None, logs=False,
+    perfilar_replica=None, archivo_perfil=None, memoria_horas=None, progreso=None,
+    antiteticas=None, variables=None,
+):
+    """
+    Corre una réplica por semilla. motor = 'serial', 'procesos' (pool de
+    procesos) o un distribuido.Coordinador (trabajadores en otras
+    máquinas). Retorna la lista de resultados de simular_replica, en el
+    orden de las semillas.
+
+    perfilar_replica es la posición (en semillas) de la réplica a perfilar;
+    si se da archivo_perfil, sus pilas colapsadas se guardan ahí. Con
+    memoria_horas, cada réplica incluye su perfil de memoria.
+
+    progreso es un progreso.ReporteProgreso opcional; cada réplica se
+    registra en él al terminar (en el pool, en orden de término).
+
+    antiteticas se pasa a simular_replica (modo de transformada inversa);
+    variables es una lista con un VariablesAleatorias por semilla.
+    """
+    tareas = [
+        (
+            escenario, seed, tiempo_horas, logs, False, i == perfilar_replica, memoria_horas, antiteticas,
+            None if variables is None else variables[i],
+        )
+        for i, seed in enumerate(semillas)
+    ]
+    resultados = _ejecutar_tareas(tareas, motor, procesos, progreso)
+
+    if perfilar_replica is not None and archivo_perfil:
+        guardar_pilas(resultados[perfilar_replica]['perfil']['pilas'], archivo_perfil)
+    return resultados
+
+
+def ejecutar_casos(casos, tiempo_horas, motor='serial', procesos=None, progreso=None, al_terminar=None):
+    """
+    Corre réplicas de escenarios distintos en un mismo lote (un solo pool).
+    casos es una lista de (escenario, semilla, variables), con variables un
+    VariablesAleatorias o None. Retorna los resultados en el orden de casos.
+    al_terminar(i, resultado) se llama con cada réplica apenas termina (p.
+    ej. para guardarla en CacheResultados sin esperar al resto del lote).
+    """
+    tareas = [
+        (escenario, seed, tiempo_horas, False, False, False, None, None, variables)
+        for escenario, seed, variables in casos
+    ]
+    return _ejecutar_tareas(tareas, motor, procesos, progreso, al_terminar)
+
+
+def _ejecutar_tareas(tareas, motor, procesos, progreso, al_terminar=None):
+    # motor: 'serial', 'procesos' o un objeto con ejecutar(tareas, registrar)
+    # que reparte las tareas en otras máquinas (distribuido.Coordinador)
+    resultados = [None] * len(tareas)
+
+    def registrar(i, resultado):
+        resultados[i] = resultado
+        if al_terminar is not None:
+            al_terminar(i, resultado)
+        if progreso is not None:
+            progreso.registrar(resultado['metricas'])
+
+    if motor == 'serial':
+        for i, tarea in enumerate(tareas):
+            registrar(i, _simular_tarea(tarea))
+    elif motor == 'procesos':
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {pool.submit(_simular_tarea, tarea): i for i, tarea in enumerate(tareas)}
+            for futuro in as_completed(futuros):
+                registrar(futuros[futuro], futuro.result())
+    elif hasattr(motor, 'ejecutar'):
+        motor.ejecutar(tareas, registrar)
+    else:
+        raise ValueError(f'Motor desconocido: {motor}')
+    if progreso is not None:
+        progreso.terminar()
+    return resultados
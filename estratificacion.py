@@ -0,0 +1,182 @@
+"""
+Réplicas con hipercubo latino (LHS) sobre las entradas de la pizzería.
+
+Cada réplica es un punto del hipercubo formado por todas sus uniformes. En
+un diseño de n réplicas, para cada flujo estratificado y cada posición k de
+sorteo, las n réplicas reciben estratos distintos de [0, 1):
+
+    U[r, k] = (π_k(r) + V[r, k]) / n
+
+con π_k una permutación aleatoria común al diseño y V independiente por
+réplica. Cada réplica conserva la distribución de sus entradas (la media
+del diseño es insesgada), pero el conjunto cubre parejo cada coordenada, lo
+que elimina la varianza de los efectos aditivos de esas entradas: el total
+semanal de llamadas (suma de tiempos entre llamadas) o la proporción
+premium (suma de indicadores). Usa la misma capa de transformada inversa
+que las antitéticas (variables_aleatorias.py).
+
+Las réplicas de un diseño no son independientes, así que la varianza se
+estima con D diseños independientes (LHS replicado):
+
+    media      = promedio de las D medias de diseño
+    Var(media) = s^2(medias de diseño) / D,   intervalo t con D - 1 gl
+
+Uso:
+    python estratificacion.py --replicas 20 --disenos 5 --flujos interarrival premium --comparar
+"""
+
+import argparse
+import math
+
+import numpy as np
+from scipy import stats
+
+from ejecutor_replicas import ejecutar_replicas
+from variables_aleatorias import FLUJOS, VariablesAleatorias, normalizar_flujos
+
+
+ESTRATIFICADOS = ('interarrival', 'premium')
+
+
+class VariablesLHS(VariablesAleatorias):
+
+    def __init__(self, semilla, diseno, replica, n_replicas, estratificados=ESTRATIFICADOS,
+                 antiteticas=None, bloque=512):
+        if not 0 <= replica < n_replicas:
+            raise ValueError(f'Réplica {replica} fuera del diseño de {n_replicas}')
+        self.semilla_diseno = semilla
+        self.diseno = diseno
+        self.replica = replica
+        self.n_replicas = n_replicas
+        self.estratificados = normalizar_flujos(estratificados)
+        self.bloques_cargados = dict.fromkeys(FLUJOS, 0)
+        super().__init__([semilla, diseno, replica], antiteticas, bloque)
+
+    def _uniformes_bloque(self, nombre):
+        v = super()._uniformes_bloque(nombre)
+        if nombre not in self.estratificados:
+            return v
+        bloque = self.bloques_cargados[nombre]
+        self.bloques_cargados[nombre] += 1
+        # Permutaciones del bloque: las mismas para todas las réplicas del diseño
+        rng = np.random.default_rng([self.semilla_diseno, self.diseno, FLUJOS.index(nombre), bloque])
+        estratos = np.argsort(rng.random((self.bloque, self.n_replicas)), axis=1)[:, self.replica]
+        return (estratos + v) / self.n_replicas
+
+    def antitetica(self, antiteticas='todas'):
+        # 1 - U de un estrato cae en el estrato espejo: el par sigue siendo un LHS
+        return VariablesLHS(
+            self.semilla_diseno, self.diseno, self.replica, self.n_replicas, self.estratificados,
+            self.antiteticas ^ normalizar_flujos(antiteticas), self.bloque,
+        )
+
+
+def resumen_disenos(valores, segundos, confianza=0.95):
+    """
+    valores: matriz D x n (diseño x réplica) de la métrica. segundos: tiempo
+    de CPU total de las réplicas. Retorna el estimador LHS replicado.
+    """
+    valores = np.asarray(valores, dtype=float)
+    disenos = valores.shape[0]
+    medias = valores.mean(axis=1)
+    varianza = medias.var(ddof=1) / disenos if disenos > 1 else math.nan
+    semiancho = (
+        stats.t.ppf((1 + confianza) / 2, disenos - 1) * math.sqrt(varianza)
+        if disenos > 1 else math.inf
+    )
+    horas_cpu = segundos / 3600
+    return {
+        'media': float(medias.mean()),
+        'varianza': varianza,
+        'semiancho': semiancho,
+        'confianza': confianza,
+        'disenos': disenos,
+        'replicas_por_diseno': valores.shape[1],
+        'medias_disenos': medias.tolist(),
+        # Varianza que tendría la media de valores.size réplicas independientes
+        'varianza_iid': valores.var(ddof=1) / valores.size,
+        'horas_cpu': horas_cpu,
+        'varianza_por_hora_cpu': varianza * horas_cpu,
+    }
+
+
+def ejecutar_lhs(
+    escenario, tiempo_horas, n_replicas, n_disenos, estratificados=ESTRATIFICADOS, semilla=0,
+    metrica='Utilidad', confianza=0.95, motor='serial', procesos=None, progreso=None,
+):
+    """
+    Corre n_disenos diseños LHS independientes de n_replicas réplicas cada
+    uno, estratificando los flujos de estratificados ('todas' para todos).
+    Retorna resumen_disenos más los resultados de cada réplica.
+    """
+    variables = [
+        VariablesLHS(semilla, d, r, n_replicas, estratificados)
+        for d in range(n_disenos) for r in range(n_replicas)
+    ]
+    resultados = ejecutar_replicas(
+        escenario, range(len(variables)), tiempo_horas, motor=motor, procesos=procesos,
+        progreso=progreso, variables=variables,
+    )
+    valores = np.array([float(r['metricas'][metrica]) for r in resultados]).reshape(n_disenos, n_replicas)
+    resumen = resumen_disenos(valores, sum(r['segundos'] for r in resultados), confianza)
+    resumen['estratificados'] = sorted(normalizar_flujos(estratificados))
+    resumen['resultados'] = resultados
+    return resumen
+
+
+def ejecutar_pares(
+    escenario, tiempo_horas, n_pares, antiteticas=ESTRATIFICADOS, semilla=0,
+    metrica='Utilidad', confianza=0.95, motor='serial', procesos=None,
+):
+    """Pares antitéticos con la misma capa, para comparar con ejecutar_lhs."""
+    variables = []
+    for par in range(n_pares):
+        normal = VariablesAleatorias([semilla, par])
+        variables += [normal, normal.antitetica(antiteticas)]
+    resultados = ejecutar_replicas(
+        escenario, range(len(variables)), tiempo_horas, motor=motor, procesos=procesos, variables=variables,
+    )
+    valores = np.array([float(r['metricas'][metrica]) for r in resultados]).reshape(n_pares, 2)
+    # Cada par es un "diseño" de 2 réplicas: misma fórmula de varianza
+    return resumen_disenos(valores, sum(r['segundos'] for r in resultados), confianza)
+
+
+def imprimir_comparacion(resumenes, metrica='Utilidad'):
+    print(f"{'Método':<16} {'Réplicas':>8} {metrica:>16} {'± semiancho':>14} {'Var':>14} {'Var x h CPU':>14}")
+    for nombre, resumen in resumenes.items():
+        replicas = resumen['disenos'] * resumen['replicas_por_diseno']
+        print(
+            f"{nombre:<16} {replicas:>8} {resumen['media']:>16,.0f} {resumen['semiancho']:>14,.0f} "
+            f"{resumen['varianza']:>14,.4g} {resumen['varianza_por_hora_cpu']:>14,.4g}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Réplicas con hipercubo latino replicado')
+    parser.add_argument('--replicas', type=int, default=20, help='réplicas por diseño')
+    parser.add_argument('--disenos', type=int, default=5, help='diseños independientes')
+    parser.add_argument('--flujos', nargs='+', default=list(ESTRATIFICADOS), help="flujos a estratificar o 'todas'")
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--factor-llegadas', type=float, default=1)
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    parser.add_argument('--comparar', action='store_true', help='correr también réplicas independientes y pares antitéticos')
+    args = parser.parse_args()
+
+    flujos = 'todas' if args.flujos == ['todas'] else args.flujos
+    escenario = {'factor_llegadas': args.factor_llegadas}
+    resumenes = {
+        'lhs': ejecutar_lhs(
+            escenario, args.horas, args.replicas, args.disenos, flujos, args.semilla, motor=args.motor,
+        ),
+    }
+    if args.comparar:
+        total = args.replicas * args.disenos
+        # Mismo presupuesto de réplicas; independientes agrupadas en diseños del mismo tamaño
+        resumenes['independientes'] = ejecutar_lhs(
+            escenario, args.horas, args.replicas, args.disenos, (), args.semilla + 1, motor=args.motor,
+        )
+        resumenes['antiteticas'] = ejecutar_pares(
+            escenario, args.horas, total // 2, flujos, args.semilla + 2, motor=args.motor,
+        )
+    imprimir_comparacion(resumenes)
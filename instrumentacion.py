@@ -0,0 +1,133 @@
+"""
+Instrumentación opcional de una réplica de la pizzería.
+
+Cuenta eventos agendados y procesados por tipo, procesos creados por
+función, solicitudes y esperas por recurso (con el largo máximo de cola) y
+el tiempo de reloj gastado por etapa del modelo y por periodo (jornada o
+drenaje de pedidos después del tiempo límite).
+
+Los contadores se instalan envolviendo métodos de la instancia del
+Environment y de cada recurso, así que si la instrumentación no se activa el
+modelo corre sin ningún costo adicional.
+"""
+
+import time
+from collections import Counter, defaultdict
+
+from simpy.events import Process
+
+
+def etapa_de_proceso(proceso):
+    # Generador más interno activo (los yield from de hornear/embalar/despacho
+    # se atribuyen a su propia etapa y no a la del proceso que los contiene)
+    generador = proceso._generator
+    while getattr(generador, 'gi_yieldfrom', None) is not None:
+        generador = generador.gi_yieldfrom
+    return getattr(generador, '__name__', type(generador).__name__)
+
+
+def etapa_del_evento(evento):
+    # Etapa del modelo que se reanuda al procesar el evento ('motor' si el
+    # evento no reanuda ningún proceso, p. ej. liberaciones de recursos)
+    for callback in evento.callbacks or ():
+        proceso = getattr(callback, '__self__', None)
+        if isinstance(proceso, Process):
+            return etapa_de_proceso(proceso)
+    return 'motor'
+
+
+class Instrumentacion:
+
+    def __init__(self):
+        self.eventos_agendados = Counter()
+        self.eventos_procesados = Counter()
+        self.procesos_creados = Counter()
+        self.solicitudes = Counter()
+        self.esperas = Counter()
+        self.tiempo_espera = defaultdict(float)  # horas simuladas de espera
+        self.cola_maxima = Counter()
+        self.tiempo_etapa = defaultdict(float)  # segundos de reloj
+        self.pasos_etapa = Counter()
+        self.tiempo_periodo = defaultdict(float)
+        self.tiempo_total = 0.0
+
+    def instalar(self, pizzeria, recursos):
+        env = pizzeria.env
+        self.pizzeria = pizzeria
+
+        schedule = env.schedule
+        step = env.step
+        process = env.process
+
+        def schedule_instrumentado(event, priority=1, delay=0):
+            self.eventos_agendados[type(event).__name__] += 1
+            return schedule(event, priority, delay)
+
+        def process_instrumentado(generator):
+            self.procesos_creados[getattr(generator, '__name__', 'proceso')] += 1
+            return process(generator)
+
+        def step_instrumentado():
+            if not env._queue:
+                return step()  # SimPy avisa que no quedan eventos
+            _, _, _, evento = env._queue[0]
+            self.eventos_procesados[type(evento).__name__] += 1
+            etapa = etapa_del_evento(evento)
+            periodo = 'drenaje' if env.now >= pizzeria.tiempo_limite else 'jornada'
+            inicio = time.perf_counter()
+            try:
+                step()
+            finally:
+                duracion = time.perf_counter() - inicio
+                self.tiempo_etapa[etapa] += duracion
+                self.pasos_etapa[etapa] += 1
+                self.tiempo_periodo[periodo] += duracion
+
+        env.schedule = schedule_instrumentado
+        env.step = step_instrumentado
+        env.process = process_instrumentado
+
+        for nombre, recurso in recursos.items():
+            self.instalar_recurso(nombre, recurso)
+
+    def instalar_recurso(self, nombre, recurso):
+        request = recurso.request
+
+        def request_instrumentado(*args, **kwargs):
+            solicitud = request(*args, **kwargs)
+            self.solicitudes[nombre] += 1
+            if not solicitud.triggered:
+                self.esperas[nombre] += 1
+                self.cola_maxima[nombre] = max(self.cola_maxima[nombre], len(recurso.queue))
+                inicio = recurso._env.now
+
+                def registrar_espera(evento):
+                    self.tiempo_espera[nombre] += float(evento.env.now - inicio)
+
+                solicitud.callbacks.append(registrar_espera)
+            return solicitud
+
+        recurso.request = request_instrumentado
+
+    def medir(self, funcion, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            self.tiempo_total += time.perf_counter() - inicio
+
+    def reporte(self):
+        return {
+            'eventos_agendados': dict(self.eventos_agendados),
+            'eventos_procesados': dict(self.eventos_procesados),
+            'total_eventos': sum(self.eventos_procesados.values()),
+            'procesos_creados': dict(self.procesos_creados),
+            'solicitudes_recurso': dict(self.solicitudes),
+            'esperas_recurso': dict(self.esperas),
+            'tiempo_espera_recurso_horas': dict(self.tiempo_espera),
+            'cola_maxima_recurso': dict(self.cola_maxima),
+            'tiempo_reloj_etapa_s': dict(self.tiempo_etapa),
+            'pasos_etapa': dict(self.pasos_etapa),
+            'tiempo_reloj_periodo_s': dict(self.tiempo_periodo),
+            'tiempo_reloj_total_s': self.tiempo_total,
+        }
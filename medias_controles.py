@@ -0,0 +1,314 @@
+"""
+Medias teóricas E[X] de las variables de control del modelo.
+
+Todas se derivan de la configuración del escenario (tasas de llegada y las
+distribuciones y probabilidades que usa Pizzeria en
+simulacion_E3_antiteticas.py) y se memoizan por hash del escenario, así que
+en un barrido de escenarios cada uno se calcula una sola vez.
+
+Controles (mismos nombres que Pizzeria.obtener_controles()):
+  - 'Llamadas Totales': llamadas que llegan en el horizonte. Las llegadas no
+    son un NHPP exacto: cada tiempo entre llamadas es exponencial con la tasa
+    de la hora en que se sortea (aunque cruce a la hora siguiente) y el día
+    se corta al pasar el cierre. E[N] y Var[N] se obtienen exactamente con la
+    ecuación de Kolmogorov de ese proceso, por tramos de una hora
+    (exponencial de matriz), sumando días independientes.
+  - 'Tiempo Promedio X' (minutos) y 'Cantidad Promedio X': promedio de los
+    sorteos de cada stream. La cantidad de sorteos no depende de los valores
+    sorteados, así que E[promedio] es la media de la distribución. La
+    excepción es el tiempo de llamada (cuántas llamadas se atienden depende
+    de la duración de las anteriores), que queda marcada como no exacta.
+    Las distribuciones de cocción y despacho salen de los parámetros de
+    entrada del escenario ('entradas', Pizzeria.parametros_entradas). El
+    despacho promedia los sorteos de ida y de vuelta: si sus parámetros
+    difieren, E[X] es la media de ambas (los viajes en curso al cierre
+    descuadran las cantidades) y queda como aproximada.
+  - 'Proporcion Premium', 'Pizzas por Pedido', 'Pizzas <Tipo> por Pedido':
+    promedios por pedido atendido; exactos por la misma razón.
+  - 'Total Pizzas': aproximada, E[llamadas atendidas] x pizzas por pedido,
+    con las llamadas perdidas de Erlang B (abajo), que quedan algo bajo las
+    simuladas.
+  - 'Tiempo Promedio Entre Llamadas': aproximada (horizonte / E[N]); el
+    promedio de los tiempos sorteados depende de los saltos nocturnos.
+  - 'Proporcion Llamadas Perdidas': aproximada. Las líneas son un sistema
+    M/G/c/c, y Erlang B no depende de la distribución de la atención (sólo
+    de su media). Se usa la carga de cada hora, E[llamadas en la hora] por la
+    atención media, suponiendo régimen estacionario dentro de la hora (la
+    atención dura minutos). La proporción es la suma de las pérdidas
+    esperadas sobre E[N] (cociente de esperanzas).
+
+Cada control trae 'media', 'varianza' (de la variable por réplica, cuando se
+conoce), 'varianza_unitaria' (de un sorteo o de un pedido) y 'exacta'. Un
+error en E[X] pasa al estimador controlado como un sesgo β ΔE[X] que no baja
+con más réplicas, así que vector_medias rechaza las medias aproximadas
+(APROXIMADAS) salvo que se pidan explícitamente.
+"""
+
+import hashlib
+import json
+import math
+
+import numpy as np
+import simpy as sp
+from scipy import stats
+from scipy.linalg import expm
+
+from ejecutor_replicas import crear_pizzeria
+from variables_aleatorias import PARAMETRICAS
+
+
+# Probabilidades del modelo (Pizzeria.atender_llamada)
+PROB_PREMIUM = 3 / 20
+PIZZAS_POR_PEDIDO = {
+    True: ([1, 2, 3, 4], [0.3, 0.4, 0.2, 0.1]),
+    False: ([1, 2, 3, 4], [0.6, 0.2, 0.15, 0.05]),
+}
+TIPOS_PIZZA = {
+    # (queso, pepperoni, carnes)
+    True: [0.3, 0.6, 0.1],
+    False: [0.1, 0.4, 0.5],
+}
+NOMBRES_TIPOS = ['Queso', 'Pepperoni', 'Carnes']
+
+# Distribuciones de los sorteos, en minutos (tiempos) o unidades (cantidades),
+# con los parámetros base de las entradas (ver distribuciones)
+DISTRIBUCIONES = {
+    'Tiempo Promedio Llamada': stats.gamma(a=4, scale=0.5),
+    'Tiempo Promedio Salsa': stats.beta(a=5, b=2.2),
+    'Tiempo Promedio Queso': stats.triang(c=(1 - 0.9) / (1.2 - 0.9), loc=0.9, scale=0.3),
+    'Tiempo Promedio Pepperoni': stats.lognorm(s=0.25, scale=math.exp(0.5)),
+    'Tiempo Promedio Carnes': stats.uniform(loc=1, scale=0.8),
+    'Tiempo Promedio Coccion': stats.lognorm(s=0.2, scale=math.exp(2.5)),
+    'Tiempo Promedio Embalaje': stats.triang(c=(2 - 1.1) / (2.3 - 1.1), loc=1.1, scale=1.2),
+    'Tiempo Promedio Despacho': stats.gamma(a=7.5, scale=0.9),
+    'Cantidad Promedio Salsa': stats.expon(scale=250),
+    'Cantidad Promedio Queso': stats.nbinom(n=25, p=0.52),
+    'Cantidad Promedio Pepperoni': stats.poisson(mu=20),
+    'Cantidad Promedio Carnes': stats.binom(n=16, p=0.42),
+}
+# Distribuciones de los flujos con parámetros de escenario ('entradas')
+DISTRIBUCIONES_PARAMETRICAS = {
+    'coccion': lambda mu, sigma: stats.lognorm(s=sigma, scale=math.exp(mu)),
+    'despacho_ida': lambda forma, escala: stats.gamma(a=forma, scale=escala),
+    'despacho_vuelta': lambda forma, escala: stats.gamma(a=forma, scale=escala),
+}
+# Controles con E[X] aproximada
+APROXIMADAS = {
+    'Tiempo Promedio Llamada', 'Total Pizzas', 'Tiempo Promedio Entre Llamadas', 'Proporcion Llamadas Perdidas',
+}
+
+_CACHE = {}  # (hash del escenario, horas) -> controles
+
+
+def clave_escenario(escenario):
+    texto = json.dumps(escenario or {}, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def momentos_llamadas_dia(tasas, fin):
+    """
+    (E[N], E[N^2]) de las llamadas de un día que abre a la primera hora de
+    tasas y deja de aceptar llamadas en fin (hora del día, puede ser parcial).
+
+    Estado: hora k en que se sorteó el tiempo entre llamadas pendiente (tasa
+    tasas[k]). p_k = P(estado k), q_k = E[N 1{estado k}]. En la hora h:
+        dp/dt = A_h p,           A_h = -diag(λ) + e_h λ'
+        dq/dt = A_h q + e_h λ'p
+        dE[N]/dt = λ'p,  dE[N^2]/dt = 2 λ'q + λ'p
+    """
+    horas = sorted(tasas)
+    lam = np.array([tasas[h] for h in horas], dtype=float)
+    k = len(horas)
+    estado = np.zeros(2 * k + 2)
+    estado[0] = 1.0  # a la apertura se sortea con la tasa de la primera hora
+    for i, hora in enumerate(horas):
+        duracion = min(hora + 1, fin) - hora
+        if duracion <= 0:
+            break
+        a = -np.diag(lam)
+        a[i, :] += lam
+        m = np.zeros((2 * k + 2, 2 * k + 2))
+        m[:k, :k] = a
+        m[k:2 * k, k:2 * k] = a
+        m[k + i, :k] += lam
+        m[2 * k, :k] = lam
+        m[2 * k + 1, :k] = lam
+        m[2 * k + 1, k:2 * k] = 2 * lam
+        estado = expm(m * duracion) @ estado
+    return estado[2 * k], estado[2 * k + 1]
+
+
+def momentos_llamadas(tasas_dia_normal, tasas_finde, tiempo_horas):
+    """(E[N], Var[N]) de las llamadas en tiempo_horas simuladas (desde las 10 del día 0)."""
+    limite = tiempo_horas + 10
+    media = varianza = 0.0
+    dia = 0
+    while 24 * dia + 10 < limite:
+        tasas = tasas_finde if dia % 7 in (5, 6) else tasas_dia_normal
+        cierre = max(tasas) + 1
+        m1, m2 = momentos_llamadas_dia(tasas, min(cierre, limite - 24 * dia))
+        media += m1
+        varianza += m2 - m1 ** 2
+        dia += 1
+    return media, varianza
+
+
+def erlang_b(lineas, carga):
+    """Probabilidad de bloqueo de Erlang B: B(k) = a B(k-1) / (k + a B(k-1)), B(0) = 1."""
+    bloqueo = 1.0
+    for k in range(1, lineas + 1):
+        bloqueo = carga * bloqueo / (k + carga * bloqueo)
+    return bloqueo
+
+
+def llamadas_por_hora(tasas_dia_normal, tasas_finde, tiempo_horas):
+    """[(día, hora, E[llamadas que llegan en esa hora])] del horizonte, como en momentos_llamadas."""
+    limite = tiempo_horas + 10
+    llamadas = []
+    dias = {}  # (fin de semana, fin del día) -> [(hora, E[llamadas])], los días se repiten
+    dia = 0
+    while 24 * dia + 10 < limite:
+        finde = dia % 7 in (5, 6)
+        tasas = tasas_finde if finde else tasas_dia_normal
+        clave = (finde, min(max(tasas) + 1, limite - 24 * dia))
+        if clave not in dias:
+            dias[clave] = []
+            anterior = 0.0
+            for hora in sorted(tasas):
+                if clave[1] <= hora:
+                    break
+                acumuladas, _ = momentos_llamadas_dia(tasas, min(hora + 1, clave[1]))
+                dias[clave].append((hora, acumuladas - anterior))
+                anterior = acumuladas
+        llamadas += [(dia, hora, n) for hora, n in dias[clave]]
+        dia += 1
+    return llamadas
+
+
+def perdidas_erlang(llamadas, lineas, atencion_media):
+    """
+    (E[llamadas perdidas], proporción) con Erlang B en cada hora; llamadas
+    es el resultado de llamadas_por_hora y atencion_media está en horas.
+    """
+    perdidas = sum(n * erlang_b(lineas, n * atencion_media) for _, _, n in llamadas)
+    total = sum(n for _, _, n in llamadas)
+    return perdidas, perdidas / total if total else 0.0
+
+
+def distribuciones(parametros_entradas=None):
+    """
+    (DISTRIBUCIONES con cocción y despacho según parametros_entradas,
+    controles cuya E[X] queda aproximada por esos parámetros). El despacho
+    se retorna como la lista [ida, vuelta].
+    """
+    parametros = {
+        flujo: dict(PARAMETRICAS[flujo][1], **(parametros_entradas or {}).get(flujo, {}))
+        for flujo in DISTRIBUCIONES_PARAMETRICAS
+    }
+    entradas = {flujo: crear(**parametros[flujo]) for flujo, crear in DISTRIBUCIONES_PARAMETRICAS.items()}
+    resultado = dict(DISTRIBUCIONES)
+    resultado['Tiempo Promedio Coccion'] = entradas['coccion']
+    resultado['Tiempo Promedio Despacho'] = [entradas['despacho_ida'], entradas['despacho_vuelta']]
+    aproximadas = set()
+    if parametros['despacho_ida'] != parametros['despacho_vuelta']:
+        aproximadas.add('Tiempo Promedio Despacho')
+    return resultado, aproximadas
+
+
+def _media_varianza(distribucion):
+    # Media y varianza de un sorteo; una lista es una mezcla en partes iguales
+    if not isinstance(distribucion, list):
+        return float(distribucion.mean()), float(distribucion.var())
+    medias = np.array([d.mean() for d in distribucion])
+    varianzas = np.array([d.var() for d in distribucion])
+    return float(medias.mean()), float(varianzas.mean() + medias.var())
+
+
+def _por_pedido():
+    # Media y varianza por pedido de: pizzas, pizzas de cada tipo
+    resultados = {}
+    for nombre, valor in [('Pizzas por Pedido', None)] + [
+        (f'Pizzas {tipo} por Pedido', j) for j, tipo in enumerate(NOMBRES_TIPOS)
+    ]:
+        m1 = m2 = 0.0
+        for premium, prob in [(True, PROB_PREMIUM), (False, 1 - PROB_PREMIUM)]:
+            cantidades, probs = PIZZAS_POR_PEDIDO[premium]
+            q = 1.0 if valor is None else TIPOS_PIZZA[premium][valor]
+            for n, pn in zip(cantidades, probs):
+                # Binomial(n, q) pizzas del tipo: E = nq, E[X^2] = nq(1-q) + (nq)^2
+                m1 += prob * pn * n * q
+                m2 += prob * pn * (n * q * (1 - q) + (n * q) ** 2)
+        resultados[nombre] = (m1, m2 - m1 ** 2)
+    return resultados
+
+
+def _calcular_medias(escenario, tiempo_horas):
+    pizzeria = crear_pizzeria(sp.Environment(), escenario)
+
+    media_llamadas, var_llamadas = momentos_llamadas(
+        pizzeria.tasas_dia_normal, pizzeria.tasas_finde, tiempo_horas
+    )
+    controles = {
+        'Llamadas Totales': {
+            'media': media_llamadas, 'varianza': var_llamadas,
+            'varianza_unitaria': None, 'exacta': True,
+        },
+        'Proporcion Premium': {
+            'media': PROB_PREMIUM, 'varianza': None,
+            'varianza_unitaria': PROB_PREMIUM * (1 - PROB_PREMIUM), 'exacta': True,
+        },
+    }
+    for nombre, (media, varianza) in _por_pedido().items():
+        controles[nombre] = {'media': media, 'varianza': None, 'varianza_unitaria': varianza, 'exacta': True}
+    entradas, aproximadas = distribuciones(pizzeria.parametros_entradas)
+    for nombre, distribucion in entradas.items():
+        media, varianza = _media_varianza(distribucion)
+        controles[nombre] = {
+            'media': media, 'varianza': None, 'varianza_unitaria': varianza,
+            'exacta': nombre not in APROXIMADAS | aproximadas,
+        }
+
+    llamadas = llamadas_por_hora(pizzeria.tasas_dia_normal, pizzeria.tasas_finde, tiempo_horas)
+    atencion_media = entradas['Tiempo Promedio Llamada'].mean() / 60
+    perdidas, proporcion_perdidas = perdidas_erlang(llamadas, pizzeria.cantidad_lineas, atencion_media)
+    controles['Total Pizzas'] = {
+        'media': (media_llamadas - perdidas) * controles['Pizzas por Pedido']['media'],
+        'varianza': None, 'varianza_unitaria': None, 'exacta': False,
+    }
+    controles['Tiempo Promedio Entre Llamadas'] = {
+        'media': tiempo_horas / media_llamadas if media_llamadas else math.nan,
+        'varianza': None, 'varianza_unitaria': None, 'exacta': False,
+    }
+    controles['Proporcion Llamadas Perdidas'] = {
+        'media': proporcion_perdidas, 'varianza': None, 'varianza_unitaria': None, 'exacta': False,
+    }
+    return controles
+
+
+def medias_controles(escenario=None, tiempo_horas=168):
+    """Diccionario {control: {'media', 'varianza', 'varianza_unitaria', 'exacta'}}."""
+    clave = (clave_escenario(escenario), tiempo_horas)
+    if clave not in _CACHE:
+        _CACHE[clave] = _calcular_medias(escenario, tiempo_horas)
+    return {nombre: dict(datos) for nombre, datos in _CACHE[clave].items()}
+
+
+def vector_medias(nombres, escenario=None, tiempo_horas=168, aproximadas=False):
+    """
+    np.array de E[X] en el orden de nombres (para EstimadorControl). Falla
+    con ValueError si algún control tiene media aproximada, salvo con
+    aproximadas=True.
+    """
+    controles = medias_controles(escenario, tiempo_horas)
+    if not aproximadas:
+        rechazadas = [nombre for nombre in nombres if not controles[nombre]['exacta']]
+        if rechazadas:
+            raise ValueError(f'Controles con E[X] aproximada (sesgarían el estimador): {rechazadas}')
+    return np.array([controles[nombre]['media'] for nombre in nombres])
+
+
+if __name__ == "__main__":
+    for nombre, datos in medias_controles().items():
+        varianza = '' if datos['varianza'] is None else f"  Var = {datos['varianza']:.4f}"
+        marca = '' if datos['exacta'] else '  (aprox.)'
+        print(f"{nombre:<36} E[X] = {datos['media']:12.4f}{varianza}{marca}")
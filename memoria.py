@@ -0,0 +1,171 @@
+"""
+Perfil de memoria de una réplica con tracemalloc.
+
+Toma un snapshot de tracemalloc cada intervalo_horas de tiempo simulado (el
+muestreo se hace antes de procesar el primer evento que cruza el instante,
+así que no agrega eventos ni cambia la trayectoria) y reporta:
+  - la memoria trazada y su pico,
+  - los sitios de asignación que más memoria retienen al final, con su
+    crecimiento por semana simulada (pendiente de mínimos cuadrados),
+  - el largo de los contenedores del modelo que crecen con el horizonte
+    (pedidos_activos, listas de tiempos por pedido, log_data, ...).
+
+Uso:
+    python memoria.py --horas 1008 --intervalo 24 --factor-llegadas 2
+"""
+
+import argparse
+import linecache
+import tracemalloc
+
+import numpy as np
+
+
+# Atributos de Pizzeria que acumulan datos durante la réplica
+CONTENEDORES = [
+    'pedidos_activos',
+    'tiempos_procesamiento_normales_semana',
+    'tiempos_procesamiento_normales_finde',
+    'tiempos_procesamiento_premium_semana',
+    'tiempos_procesamiento_premium_finde',
+    'ultima_hora_fin_por_dia',
+    'registro_consumo',
+    'log_data',
+]
+
+FILTROS = [
+    tracemalloc.Filter(False, __file__),  # las propias muestras
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+def crecimiento_por_semana(horas, valores):
+    # Pendiente de mínimos cuadrados, en unidades por semana simulada
+    if len(horas) < 2 or np.ptp(horas) == 0:
+        return 0.0
+    return float(np.polyfit(horas, valores, 1)[0] * 168)
+
+
+class PerfilMemoria:
+
+    def __init__(self, intervalo_horas=24, profundidad=1):
+        self.intervalo_horas = intervalo_horas
+        self.profundidad = profundidad
+        self.muestras = []  # (hora simulada, {sitio: (bytes, bloques)}, memoria trazada)
+        self.contenedores = []  # (hora simulada, {atributo: largo})
+        self.pico = 0
+        self.inicio_propio = False
+
+    def instalar(self, pizzeria):
+        self.pizzeria = pizzeria
+        env = pizzeria.env
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.profundidad)
+            self.inicio_propio = True
+        tracemalloc.reset_peak()
+        self.inicio = float(env.now)
+        self.proximo = self.inicio
+        step = env.step
+
+        def step_con_muestreo():
+            if env._queue:
+                siguiente = float(env._queue[0][0])
+                while siguiente >= self.proximo:
+                    self.muestrear(self.proximo)
+                    self.proximo += self.intervalo_horas
+            return step()
+
+        env.step = step_con_muestreo
+
+    def muestrear(self, hora):
+        snapshot = tracemalloc.take_snapshot().filter_traces(FILTROS)
+        sitios = {
+            str(estadistica.traceback): (estadistica.size, estadistica.count)
+            for estadistica in snapshot.statistics('traceback' if self.profundidad > 1 else 'lineno')
+        }
+        actual, pico = tracemalloc.get_traced_memory()
+        self.pico = max(self.pico, pico)
+        self.muestras.append((hora - self.inicio, sitios, actual))
+        self.contenedores.append((hora - self.inicio, {
+            atributo: len(getattr(self.pizzeria, atributo))
+            for atributo in CONTENEDORES
+            if getattr(self.pizzeria, atributo, None) is not None
+        }))
+
+    def finalizar(self):
+        # Muestra final al término de la réplica y detiene tracemalloc si lo inició
+        ultima = self.muestras[-1][0] + self.inicio if self.muestras else None
+        if float(self.pizzeria.env.now) != ultima:
+            self.muestrear(float(self.pizzeria.env.now))
+        if self.inicio_propio:
+            tracemalloc.stop()
+            self.inicio_propio = False
+
+    def reporte(self, n=10):
+        horas = [hora for hora, _, _ in self.muestras]
+        _, sitios_finales, actual_final = self.muestras[-1]
+        sitios = []
+        for sitio, (tamano, bloques) in sorted(sitios_finales.items(), key=lambda x: x[1][0], reverse=True)[:n]:
+            serie = [muestra.get(sitio, (0, 0))[0] for _, muestra, _ in self.muestras]
+            sitios.append({
+                'sitio': sitio,
+                'kb': tamano / 1024,
+                'bloques': bloques,
+                'crecimiento_kb_semana': crecimiento_por_semana(horas, serie) / 1024,
+            })
+
+        contenedores = {}
+        for atributo, largo in self.contenedores[-1][1].items():
+            serie = [largos.get(atributo, 0) for _, largos in self.contenedores]
+            contenedores[atributo] = {
+                'largo': largo,
+                'crecimiento_semana': crecimiento_por_semana(horas, serie),
+            }
+
+        return {
+            'muestras': len(self.muestras),
+            'horas_simuladas': horas[-1],
+            'trazada_mb': actual_final / 2**20,
+            'pico_trazada_mb': self.pico / 2**20,
+            'crecimiento_mb_semana': crecimiento_por_semana(horas, [m for _, _, m in self.muestras]) / 2**20,
+            'bloques': sum(bloques for _, bloques in sitios_finales.values()),
+            'sitios': sitios,
+            'contenedores': contenedores,
+        }
+
+
+def imprimir_reporte(reporte):
+    print(
+        f"Memoria trazada: {reporte['trazada_mb']:.1f} MB (pico {reporte['pico_trazada_mb']:.1f} MB), "
+        f"{reporte['bloques']:,} bloques, crecimiento {reporte['crecimiento_mb_semana']:+.2f} MB/semana "
+        f"({reporte['muestras']} muestras en {reporte['horas_simuladas']:.0f} h)"
+    )
+    print('\nSitios que más retienen:')
+    for sitio in reporte['sitios']:
+        print(f"  {sitio['kb']:10.1f} kB {sitio['crecimiento_kb_semana']:+10.1f} kB/sem {sitio['bloques']:>9,}  {sitio['sitio']}")
+    print('\nContenedores del modelo:')
+    for atributo, datos in reporte['contenedores'].items():
+        print(f"  {atributo:<40} {datos['largo']:>10,} {datos['crecimiento_semana']:+12,.1f} /sem")
+
+
+if __name__ == "__main__":
+    from ejecutor_replicas import simular_replica
+
+    parser = argparse.ArgumentParser(description='Perfil de memoria de una réplica')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--horas', type=float, default=168 * 4)
+    parser.add_argument('--factor-llegadas', type=float, default=1)
+    parser.add_argument('--intervalo', type=float, default=24, help='horas simuladas entre snapshots')
+    parser.add_argument('--logs', action='store_true', help='acumular log_data durante la réplica')
+    args = parser.parse_args()
+
+    resultado = simular_replica(
+        {'factor_llegadas': args.factor_llegadas}, args.semilla, args.horas,
+        logs=args.logs, memoria_horas=args.intervalo,
+    )
+    imprimir_reporte(resultado['memoria'])
+    print(f"\nRSS máximo: {resultado['rss_max_kb'] / 1024:.1f} MB")
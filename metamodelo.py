@@ -0,0 +1,262 @@
+"""
+Metamodelos de las métricas para consultas what-if sin simular.
+
+Se ajustan con los resultados guardados en CacheResultados (barridos,
+selección, optimización): cada escenario es un punto de diseño con la media
+de sus réplicas y la varianza de esa media (s^2 / n). Los factores son las
+claves numéricas que varían entre escenarios (capacidades, 'factor_llegadas',
+'factor_finde', precios, 'umbral:<inventario>', 'mu:coccion', ...); un
+escenario que no fija un factor usa el valor del modelo base.
+
+Dos superficies por métrica, con la misma interfaz (ajustar / predecir):
+  - MetamodeloGP: kriging estocástico. Proceso gaussiano con kernel
+    cuadrático exponencial (una escala por factor), media constante y ruido
+    propio de cada punto (la varianza de su media), con hiperparámetros por
+    máxima verosimilitud marginal. Predice media y desviación estándar.
+  - SuperficieCuadratica: polinomio de grado 2 por mínimos cuadrados
+    ponderados (pesos 1 / varianza de la media), con la varianza de la
+    predicción x'(X'WX)^-1 x.
+
+Las predicciones precalculan todo lo que no depende del punto, así que una
+consulta cuesta unos microsegundos. consultar() marca simular=True cuando
+el punto sale del rango de los datos (extrapolación) o cuando la desviación
+de la predicción supera la tolerancia de la métrica.
+
+Uso:
+    python metamodelo.py --cache barrido.jsonl --disenar 20 --replicas 4
+    python metamodelo.py --cache barrido.jsonl --consulta factor_finde=1.2 capacidad_horno=11
+"""
+
+import argparse
+import itertools
+import math
+from statistics import NormalDist
+
+import numpy as np
+import simpy as sp
+from scipy import optimize
+from scipy.linalg import cho_factor, cho_solve
+from scipy.stats import qmc
+
+from cache_resultados import CacheResultados
+from comparacion_pareada import leer_escenario
+from ejecutor_replicas import crear_pizzeria
+from optimizacion import Decision, construir_escenario
+from variables_aleatorias import PARAMETRICAS
+
+
+METRICAS = ('Utilidad', 'Proporcion Pedidos Tardíos')
+
+# Desviación de la predicción sobre la que conviene simular
+TOLERANCIAS = {'Utilidad': 100_000, 'Proporcion Pedidos Tardíos': 0.01}
+
+# Diseño por defecto de --disenar: rango y si es entero
+RANGOS = {
+    'factor_finde': (0.9, 1.3, False),
+    'capacidad_horno': (8, 12, True),
+    'cantidad_repartidores': (5, 8, True),
+}
+
+
+def aplanar_escenario(escenario):
+    # {'inventarios': {'mix_carnes': {'umbral': 80}}} -> {'umbral:mix_carnes': 80}; igual 'entradas'
+    factores = {}
+    for nombre, valor in escenario.items():
+        if nombre in ('inventarios', 'entradas'):
+            for inventario, configuracion in valor.items():
+                for campo, dato in configuracion.items():
+                    factores[f'{campo}:{inventario}'] = dato
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            factores[nombre] = valor
+    return factores
+
+
+def valores_base(nombres):
+    """Valor de cada factor en el modelo base (Pizzeria sin cambios)."""
+    pizzeria = crear_pizzeria(sp.Environment())
+    base = {}
+    for nombre in nombres:
+        campo, _, objeto = nombre.partition(':')
+        if objeto in PARAMETRICAS:
+            base[nombre] = PARAMETRICAS[objeto][1][campo]
+        elif objeto:
+            contenedor = getattr(pizzeria, objeto)
+            base[nombre] = pizzeria.umbral_reposicion[contenedor] if campo == 'umbral' else contenedor.capacity
+        elif nombre.startswith('factor_'):
+            base[nombre] = 1.0
+        else:
+            base[nombre] = getattr(pizzeria, nombre)
+    return base
+
+
+class MetamodeloGP:
+
+    def ajustar(self, x, y, ruido):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.media_y = y.mean()
+        self.escala_y = y.std() or 1.0
+        z = (y - self.media_y) / self.escala_y
+        ruido = np.asarray(ruido, dtype=float) / self.escala_y ** 2 + 1e-8
+        diferencias = (x[:, None, :] - x[None, :, :]) ** 2
+
+        def negativa_log_verosimilitud(parametros):
+            escalas, varianza = np.exp(parametros[:-1]), np.exp(parametros[-1])
+            k = varianza * np.exp(-0.5 * (diferencias / escalas ** 2).sum(axis=2)) + np.diag(ruido)
+            try:
+                factor = cho_factor(k, lower=True)
+            except np.linalg.LinAlgError:
+                return 1e10
+            return 0.5 * z @ cho_solve(factor, z) + np.log(np.diag(factor[0])).sum()
+
+        d = x.shape[1]
+        inicial = np.r_[np.log(np.full(d, 0.5)), 0.0]
+        limites = [(math.log(0.05), math.log(20))] * d + [(-5, 3)]
+        parametros = optimize.minimize(negativa_log_verosimilitud, inicial, method='L-BFGS-B', bounds=limites).x
+        self.escalas, self.varianza = np.exp(parametros[:-1]), np.exp(parametros[-1])
+        k = self.varianza * np.exp(-0.5 * (diferencias / self.escalas ** 2).sum(axis=2)) + np.diag(ruido)
+        self.x = x
+        self.inversa = np.linalg.inv(k)
+        self.alfa = self.inversa @ z
+        return self
+
+    def predecir(self, x):
+        """(media, desviación estándar) en el punto x (factores escalados)."""
+        k = self.varianza * np.exp(-0.5 * (((self.x - x) / self.escalas) ** 2).sum(axis=1))
+        varianza = max(self.varianza - k @ self.inversa @ k, 0.0)
+        return self.media_y + self.escala_y * (k @ self.alfa), self.escala_y * math.sqrt(varianza)
+
+
+class SuperficieCuadratica:
+
+    @staticmethod
+    def terminos(x):
+        x = np.atleast_2d(x)
+        cruzados = [x[:, i] * x[:, j] for i, j in itertools.combinations(range(x.shape[1]), 2)]
+        return np.column_stack([np.ones(len(x)), x, x ** 2] + cruzados)
+
+    def ajustar(self, x, y, ruido):
+        diseno = self.terminos(np.asarray(x, dtype=float))
+        n, p = diseno.shape
+        if n <= p:
+            raise ValueError(f'La superficie cuadrática necesita más de {p} puntos de diseño ({n} dados)')
+        pesos = 1 / np.maximum(np.asarray(ruido, dtype=float), 1e-12)
+        ponderado = diseno * pesos[:, None]
+        self.covarianza = np.linalg.pinv(diseno.T @ ponderado)
+        self.coeficientes = self.covarianza @ (ponderado.T @ np.asarray(y, dtype=float))
+        residuos = np.asarray(y) - diseno @ self.coeficientes
+        # Falta de ajuste: escala la covarianza si los residuos superan al ruido
+        self.covarianza *= max(1.0, (pesos * residuos ** 2).sum() / (n - p))
+        return self
+
+    def predecir(self, x):
+        fila = self.terminos(x)[0]
+        return fila @ self.coeficientes, math.sqrt(max(fila @ self.covarianza @ fila, 0.0))
+
+
+class Metamodelo:
+
+    def __init__(self, escenarios, resultados, metricas=METRICAS, tipo='gp', tolerancias=None):
+        """
+        escenarios: lista de escenarios; resultados: lista (por escenario) de
+        listas de resultados de réplicas. tipo = 'gp' o 'cuadratica'.
+        """
+        planos = [aplanar_escenario(escenario) for escenario in escenarios]
+        nombres = sorted(set().union(*planos))
+        base = valores_base(nombres)
+        datos = np.array([[plano.get(nombre, base[nombre]) for nombre in nombres] for plano in planos], dtype=float)
+        variables = datos.max(axis=0) > datos.min(axis=0)
+        self.factores = [nombre for nombre, varia in zip(nombres, variables) if varia]
+        # Los factores que no varían quedan fijos: consultarlos con otro valor es extrapolar
+        self.fijos = {nombre: datos[0, i] for i, nombre in enumerate(nombres) if not variables[i]}
+        self.base = base
+        self.minimos = datos[:, variables].min(axis=0)
+        self.rangos = datos[:, variables].max(axis=0) - self.minimos
+        x = (datos[:, variables] - self.minimos) / self.rangos
+        self.tolerancias = dict(TOLERANCIAS, **(tolerancias or {}))
+        self.puntos = len(escenarios)
+        self.modelos = {}
+        for metrica in metricas:
+            valores = [np.array([r['metricas'][metrica] for r in grupo]) for grupo in resultados]
+            medias = np.array([v.mean() for v in valores])
+            ruido = np.array([v.var(ddof=1) / len(v) if len(v) > 1 else np.nan for v in valores])
+            # Puntos con una réplica: la varianza típica de los demás
+            ruido[np.isnan(ruido)] = np.nanmedian(ruido) if np.isfinite(ruido).any() else 1e-8
+            modelo = MetamodeloGP() if tipo == 'gp' else SuperficieCuadratica()
+            self.modelos[metrica] = modelo.ajustar(x, medias, ruido)
+
+    @classmethod
+    def desde_cache(cls, cache, tiempo_horas, metricas=METRICAS, tipo='gp', tolerancias=None):
+        grupos = cache.resultados_por_escenario(tiempo_horas)
+        if not grupos:
+            raise ValueError(f'El cache no tiene resultados con escenario para {tiempo_horas} horas')
+        escenarios, resultados = zip(*grupos)
+        return cls(list(escenarios), list(resultados), metricas, tipo, tolerancias)
+
+    def escalar(self, escenario):
+        plano = aplanar_escenario(escenario)
+        desconocidos = set(plano) - set(self.factores) - set(self.fijos)
+        x = np.array([plano.get(nombre, self.base[nombre]) for nombre in self.factores], dtype=float)
+        fuera = [
+            nombre for nombre, valor, inferior, rango in zip(self.factores, x, self.minimos, self.rangos)
+            if not inferior <= valor <= inferior + rango
+        ]
+        fuera += [nombre for nombre, valor in self.fijos.items() if plano.get(nombre, self.base[nombre]) != valor]
+        return (x - self.minimos) / self.rangos, sorted(set(fuera) | desconocidos)
+
+    def consultar(self, escenario, confianza=0.95):
+        """
+        {métrica: {'media', 'desviacion', 'intervalo', 'simular', 'motivo'}};
+        simular indica que el metamodelo no es confiable en ese punto.
+        """
+        x, fuera = self.escalar(escenario)
+        cuantil = NormalDist().inv_cdf((1 + confianza) / 2)
+        respuesta = {}
+        for metrica, modelo in self.modelos.items():
+            media, desviacion = modelo.predecir(x)
+            motivos = []
+            if fuera:
+                motivos.append(f"extrapola en {', '.join(fuera)}")
+            if desviacion > self.tolerancias.get(metrica, math.inf):
+                motivos.append('incertidumbre sobre la tolerancia')
+            respuesta[metrica] = {
+                'media': float(media),
+                'desviacion': desviacion,
+                'intervalo': (float(media) - cuantil * desviacion, float(media) + cuantil * desviacion),
+                'simular': bool(motivos),
+                'motivo': '; '.join(motivos),
+            }
+        return respuesta
+
+
+def disenar(cache, tiempo_horas, puntos, replicas, rangos=RANGOS, semilla=0, motor='serial', procesos=None):
+    """Simula un hipercubo latino de puntos escenarios sobre rangos (para ajustar el metamodelo)."""
+    decisiones = [Decision(nombre, inferior, superior, entera) for nombre, (inferior, superior, entera) in rangos.items()]
+    muestra = qmc.LatinHypercube(d=len(decisiones), seed=semilla).random(puntos)
+    escenarios = [
+        construir_escenario(decisiones, [decision.valor(t) for decision, t in zip(decisiones, fila)])
+        for fila in muestra
+    ]
+    cache.lote([(escenario, range(replicas)) for escenario in escenarios], tiempo_horas, semilla, motor, procesos)
+    return escenarios
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Metamodelo de métricas para consultas what-if')
+    parser.add_argument('--cache', required=True, help='archivo JSON lines de CacheResultados')
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--tipo', default='gp', choices=['gp', 'cuadratica'])
+    parser.add_argument('--disenar', type=int, default=0, help='simular antes este número de puntos de diseño')
+    parser.add_argument('--replicas', type=int, default=4, help='réplicas por punto de diseño')
+    parser.add_argument('--consulta', nargs='*', default=[], help='atributo=valor del escenario a consultar')
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    args = parser.parse_args()
+
+    cache = CacheResultados(args.cache)
+    if args.disenar:
+        disenar(cache, args.horas, args.disenar, args.replicas, motor=args.motor)
+    metamodelo = Metamodelo.desde_cache(cache, args.horas, tipo=args.tipo)
+    print(f'{metamodelo.puntos} puntos de diseño; factores: {metamodelo.factores}')
+    for metrica, datos in metamodelo.consultar(leer_escenario(args.consulta)).items():
+        aviso = f"  SIMULAR ({datos['motivo']})" if datos['simular'] else ''
+        print(f"{metrica:<30} {datos['media']:>16,.4f} ± {datos['desviacion']:,.4f}{aviso}")
@@ -0,0 +1,262 @@
+"""
+Muestreo de importancia para eventos raros: pedidos premium tardíos y
+quiebres de stock.
+
+Los flujos elegidos se sortean de una distribución inclinada g en vez de la
+del modelo f (más llamadas en los picos del fin de semana, cocción más
+larga, reposiciones más lentas) y cada sorteo inclinado acumula en la
+réplica el log de la razón de verosimilitud f(x) / g(x). Con el peso
+W = exp(suma) de cada réplica:
+
+    media      = promedio de W * Y                (insesgado)
+    Var(media) = s^2(W * Y) / n,   intervalo t con n - 1 gl
+
+La trayectoria es función de la sucesión de sorteos y la cantidad de
+sorteos es un tiempo de parada, así que el producto de razones de todos los
+sorteos consumidos es la razón de verosimilitud de la réplica completa. Una
+inclinación puede depender del estado al momento del sorteo (ventana, p. ej.
+PicosFinde): la propuesta se decide con el pasado y el estimador sigue
+siendo insesgado.
+
+Una semana tiene cientos de sorteos por flujo y la varianza de log W crece
+con cada sorteo inclinado: conviene inclinar poco, sólo en la ventana que
+produce el evento, y mirar 'tamano_efectivo' (n efectivo de Kish) y
+'media_pesos' (debe estar cerca de 1).
+
+La razón se calcula contra la distribución del modelo del escenario: si el
+escenario cambia los parámetros de un flujo inclinado ('entradas'), la
+inclinación se traslada a esos parámetros (parametrizar) y, si no sabe
+hacerlo, la réplica falla con ValueError.
+
+Uso:
+    python muestreo_importancia.py --replicas 200 --factor-picos 1.08 --comparar
+"""
+
+import argparse
+import math
+from statistics import NormalDist
+
+import numpy as np
+from scipy import stats
+
+from ejecutor_replicas import ejecutar_replicas
+from variables_aleatorias import CONDICIONALES, FLUJOS, PARAMETRICAS, VariablesAleatorias, normalizar_flujos
+
+
+_NORMAL = NormalDist()
+_COCCION = PARAMETRICAS['coccion'][1]  # mu y sigma base del log de la cocción
+
+
+class PicosFinde:
+    """Ventana: fin de semana, en las horas con tasa de llegada >= umbral."""
+
+    def __init__(self, umbral=24):
+        self.umbral = umbral
+
+    def __call__(self, pizzeria):
+        ahora = pizzeria.env.now
+        if int(ahora // 24) % 7 not in (5, 6):
+            return False
+        return pizzeria.tasas_finde.get(int(ahora % 24), 0) >= self.umbral
+
+
+class InclinacionExponencial:
+    """Exponencial(escala) -> Exponencial(escala / factor); factor > 1 acorta los tiempos."""
+
+    def __init__(self, escala=1.0, factor=1.0, ventana=None):
+        self.escala = escala
+        self.factor = factor
+        self.ventana = ventana
+
+    def sortear(self, u):
+        x = -math.log1p(-u) * self.escala / self.factor
+        return x, (self.factor - 1) * x / self.escala - math.log(self.factor)
+
+
+class InclinacionLognormal:
+    """exp(N(mu, sigma)) -> exp(N(mu + desplazamiento, sigma))."""
+
+    def __init__(self, mu, sigma, desplazamiento=0.0, ventana=None):
+        self.mu = mu
+        self.sigma = sigma
+        self.desplazamiento = desplazamiento
+        self.ventana = ventana
+
+    def sortear(self, u):
+        z = self.mu + self.desplazamiento + self.sigma * _NORMAL.inv_cdf(u)
+        log_razon = ((z - self.mu - self.desplazamiento) ** 2 - (z - self.mu) ** 2) / (2 * self.sigma ** 2)
+        return math.exp(z), log_razon
+
+    def parametrizar(self, mu, sigma):
+        # Misma inclinación sobre un modelo con otros parámetros
+        return InclinacionLognormal(mu, sigma, self.desplazamiento, self.ventana)
+
+
+class InclinacionBernoulli:
+    """Bernoulli(p) -> Bernoulli(q), con la convención de INVERSAS (verdadero si u < p)."""
+
+    def __init__(self, p, q, ventana=None):
+        self.p = p
+        self.q = q
+        self.ventana = ventana
+
+    def sortear(self, u):
+        if u < self.q:
+            return True, math.log(self.p / self.q)
+        return False, math.log((1 - self.p) / (1 - self.q))
+
+
+# Carga en los picos del fin de semana: más llamadas y cocción más larga
+INCLINACIONES = {
+    'interarrival': InclinacionExponencial(1.0, 1.08, PicosFinde()),
+    'coccion': InclinacionLognormal(_COCCION['mu'], _COCCION['sigma'], 0.01, PicosFinde()),
+}
+
+
+class VariablesImportancia(VariablesAleatorias):
+
+    def __init__(self, semilla, inclinaciones=INCLINACIONES, antiteticas=None, bloque=512):
+        inclinaciones = dict(inclinaciones)
+        normalizar_flujos(inclinaciones)
+        condicionales = CONDICIONALES & set(inclinaciones)
+        if condicionales:
+            raise ValueError(f'No se pueden inclinar flujos condicionales: {sorted(condicionales)}')
+        self.inclinaciones = inclinaciones
+        self.sorteos_inclinados = dict.fromkeys(FLUJOS, 0)
+        super().__init__(semilla, antiteticas, bloque)
+
+    def vincular(self, pizzeria):
+        super().vincular(pizzeria)
+        for nombre, valores in pizzeria.parametros_entradas.items():
+            if nombre not in self.inclinaciones:
+                continue
+            parametrizar = getattr(self.inclinaciones[nombre], 'parametrizar', None)
+            if parametrizar is None:
+                raise ValueError(f'La inclinación de {nombre} no admite los parámetros de entrada del escenario')
+            self.inclinaciones[nombre] = parametrizar(**dict(PARAMETRICAS[nombre][1], **valores))
+
+    def sortear(self, nombre, *condicion):
+        inclinacion = self.inclinaciones.get(nombre)
+        if inclinacion is None or (inclinacion.ventana is not None and not inclinacion.ventana(self.pizzeria)):
+            return super().sortear(nombre, *condicion)
+        # Misma uniforme (y misma posición del flujo) que el sorteo sin inclinar
+        valor, log_razon = inclinacion.sortear(self.uniforme(nombre))
+        self.log_peso += log_razon
+        self.sorteos_inclinados[nombre] += 1
+        return valor
+
+    def antitetica(self, antiteticas='todas'):
+        return VariablesImportancia(
+            self.semilla, self.inclinaciones, self.antiteticas ^ normalizar_flujos(antiteticas), self.bloque,
+        )
+
+
+# Indicadores de los eventos raros, a partir del resultado de simular_replica
+EVENTOS = {
+    'Tardíos Premium > 5%': lambda resultado: float(resultado['metricas']['Proporcion Tardíos Premium'] > 0.05),
+    'Quiebres de Mix de Carnes >= 4': lambda resultado: float(resultado['quiebres_stock']['mix de carnes'] >= 4),
+}
+
+
+def valores_replica(resultado):
+    """Métricas, indicadores de EVENTOS y quiebres de stock de una réplica."""
+    valores = {nombre: float(valor) for nombre, valor in resultado['metricas'].items()}
+    for nombre, indicador in EVENTOS.items():
+        valores[nombre] = indicador(resultado)
+    for ingrediente, quiebres in resultado['quiebres_stock'].items():
+        valores[f'Quiebres de {ingrediente}'] = float(quiebres)
+    return valores
+
+
+def resumen_ponderado(valores, log_pesos, confianza=0.95):
+    """Estimador de muestreo de importancia de E[Y] con pesos W = exp(log_pesos)."""
+    valores = np.asarray(valores, dtype=float)
+    pesos = np.exp(np.asarray(log_pesos, dtype=float))
+    n = len(valores)
+    ponderados = pesos * valores
+    varianza = ponderados.var(ddof=1) / n if n > 1 else math.nan
+    semiancho = stats.t.ppf((1 + confianza) / 2, n - 1) * math.sqrt(varianza) if n > 1 else math.inf
+    return {
+        'media': float(ponderados.mean()),
+        'varianza': varianza,
+        'semiancho': semiancho,
+        'confianza': confianza,
+        'n': n,
+        # Sesgado pero de menor varianza cuando los pesos están muy dispersos
+        'media_autonormalizada': float(ponderados.sum() / pesos.sum()),
+        'media_pesos': float(pesos.mean()),
+        'tamano_efectivo': float(pesos.sum() ** 2 / (pesos ** 2).sum()),
+    }
+
+
+def resumen_importancia(resultados, confianza=0.95):
+    """{nombre: resumen_ponderado} de cada valor de valores_replica."""
+    filas = [valores_replica(resultado) for resultado in resultados]
+    log_pesos = [resultado['log_peso'] for resultado in resultados]
+    return {
+        nombre: resumen_ponderado([fila[nombre] for fila in filas], log_pesos, confianza)
+        for nombre in filas[0]
+    }
+
+
+def ejecutar_importancia(
+    escenario, tiempo_horas, n, inclinaciones=INCLINACIONES, semilla=0,
+    confianza=0.95, motor='serial', procesos=None, progreso=None,
+):
+    """
+    Corre n réplicas con los flujos de inclinaciones inclinados ({} es Monte
+    Carlo simple con la misma capa). Retorna {nombre: resumen} y los
+    resultados de cada réplica.
+    """
+    variables = [VariablesImportancia([semilla, i], inclinaciones) for i in range(n)]
+    resultados = ejecutar_replicas(
+        escenario, range(n), tiempo_horas, motor=motor, procesos=procesos,
+        progreso=progreso, variables=variables,
+    )
+    return resumen_importancia(resultados, confianza), resultados
+
+
+def imprimir_resumen(resumenes, nombres=None):
+    nombres = nombres or list(EVENTOS)
+    print(f"{'Método':<14} {'Estimación':<36} {'Media':>12} {'± semiancho':>12} {'n efectivo':>11} {'E[W]':>7}")
+    for metodo, resumen in resumenes.items():
+        for nombre in nombres:
+            datos = resumen[nombre]
+            print(
+                f"{metodo:<14} {nombre:<36} {datos['media']:>12.4f} {datos['semiancho']:>12.4f} "
+                f"{datos['tamano_efectivo']:>11.1f} {datos['media_pesos']:>7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Muestreo de importancia de eventos raros')
+    parser.add_argument('--replicas', type=int, default=200)
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--umbral-picos', type=float, default=24, help='tasa mínima de las horas inclinadas del fin de semana')
+    parser.add_argument('--factor-picos', type=float, default=1.08, help='multiplica la tasa de llegada en los picos')
+    parser.add_argument('--desplazamiento-coccion', type=float, default=0.01, help='suma al mu del log de la cocción en los picos')
+    parser.add_argument('--factor-reposicion', type=float, default=1, help='divide la tasa de reposición del mix de carnes (>1: más lenta)')
+    parser.add_argument('--factor-llegadas', type=float, default=1)
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    parser.add_argument('--comparar', action='store_true', help='correr también Monte Carlo simple con las mismas réplicas')
+    args = parser.parse_args()
+
+    picos = PicosFinde(args.umbral_picos)
+    inclinaciones = {
+        'interarrival': InclinacionExponencial(1.0, args.factor_picos, picos),
+        'coccion': InclinacionLognormal(_COCCION['mu'], _COCCION['sigma'], args.desplazamiento_coccion, picos),
+    }
+    if args.factor_reposicion != 1:
+        inclinaciones['reposicion_carnes'] = InclinacionExponencial(5.0, 1 / args.factor_reposicion)
+    escenario = {'factor_llegadas': args.factor_llegadas}
+    resumenes = {
+        'importancia': ejecutar_importancia(
+            escenario, args.horas, args.replicas, inclinaciones, args.semilla, motor=args.motor,
+        )[0],
+    }
+    if args.comparar:
+        resumenes['monte_carlo'] = ejecutar_importancia(
+            escenario, args.horas, args.replicas, {}, args.semilla + 1, motor=args.motor,
+        )[0]
+    imprimir_resumen(resumenes)
@@ -0,0 +1,240 @@
+"""
+Optimización por simulación de dotación, capacidades y políticas de
+inventario con SPSA y números aleatorios comunes.
+
+El objetivo de un candidato es el promedio de Utilidad sobre un conjunto
+fijo de réplicas (las mismas para todos los candidatos, vía
+CacheResultados), menos una penalización si la proporción de pedidos
+tardíos supera el límite. Con réplicas comunes las diferencias entre
+candidatos cercanos tienen poca varianza y los candidatos que se repiten
+(frecuente con variables enteras) salen del cache sin simular.
+
+SPSA (Spall) en coordenadas normalizadas a [0, 1]:
+
+    g_k   = promedio sobre j de (f(θ + c_k Δ_j) - f(θ - c_k Δ_j)) / (x+ - x-)
+    θ_k+1 = θ_k + a_k g_k / escala
+    a_k = a / (k + 1 + A)^0.602,   c_k = c / (k + 1)^0.101
+
+con Δ_j de ±1, x± los puntos ya redondeados (en las variables enteras la
+perturbación es de al menos una unidad) y escala la magnitud del primer
+gradiente, así que a es el tamaño del primer paso. Los 2 x perturbaciones
+candidatos (y el centro) de cada iteración se simulan en un solo lote.
+
+Al final se compara el mejor candidato con el inicial en réplicas nuevas
+(comparación pareada de comparacion_pareada.py): el promedio de las
+réplicas fijas está sesgado a favor del candidato elegido.
+
+Cada decisión debe tener un costo en Utilidad, o la búsqueda sólo la sube
+hasta el límite del rango. Dotación y capacidades lo tienen (salarios y
+costos fijos semanales por unidad de capacidad). Los umbrales y capacidades
+de inventario no: el modelo no cobra pedidos de reposición ni inventario
+mantenido, así que no están en DECISIONES; pueden agregarse como
+Decision('umbral:<inventario>', ...) si se optimiza con una restricción
+(p. ej. limite_tardios) que los acote.
+
+Uso:
+    python optimizacion.py --iteraciones 15 --replicas 8 --limite-tardios 0.1
+"""
+
+import argparse
+import copy
+
+import numpy as np
+
+from cache_resultados import CacheResultados
+from comparacion_pareada import resumen_diferencias
+from simulacion_inventario import INGREDIENTES
+from variables_aleatorias import PARAMETRICAS
+
+
+RESTRICCION = 'Proporcion Pedidos Tardíos'
+
+
+class Decision:
+    """
+    Variable de decisión. nombre es una clave simple del escenario (p. ej.
+    'cantidad_repartidores' o 'factor_finde'), 'umbral:<inventario>' /
+    'capacidad:<inventario>' (p. ej. 'umbral:mix_carnes') o
+    '<parámetro>:<flujo>' de variables_aleatorias.PARAMETRICAS (p. ej.
+    'mu:coccion').
+    """
+
+    def __init__(self, nombre, inferior, superior, entera=True):
+        campo, _, objeto = nombre.partition(':')
+        if objeto in INGREDIENTES:
+            if campo not in ('umbral', 'capacidad'):
+                raise ValueError(f'Decisión de inventario desconocida: {nombre}')
+        elif objeto:
+            if campo not in PARAMETRICAS.get(objeto, (None, {}))[1]:
+                raise ValueError(f'Parámetro de entrada desconocido: {nombre}')
+        self.nombre = nombre
+        self.inferior = inferior
+        self.superior = superior
+        self.entera = entera
+
+    def valor(self, theta):
+        valor = self.inferior + float(np.clip(theta, 0, 1)) * (self.superior - self.inferior)
+        return int(round(valor)) if self.entera else valor
+
+    def normalizar(self, valor):
+        return (valor - self.inferior) / (self.superior - self.inferior)
+
+    def paso_minimo(self):
+        # Perturbación mínima en [0, 1] para que una variable entera cambie
+        return 1 / (self.superior - self.inferior) if self.entera else 0.0
+
+
+# Decisiones con costo en Utilidad (ver el docstring del módulo)
+DECISIONES = [
+    Decision('cantidad_trabajadores', 3, 8),
+    Decision('cantidad_repartidores', 3, 9),
+    Decision('capacidad_horno', 6, 14),
+]
+
+
+def construir_escenario(decisiones, valores, base=None):
+    escenario = copy.deepcopy(base or {})
+    for decision, valor in zip(decisiones, valores):
+        campo, _, objeto = decision.nombre.partition(':')
+        if objeto:
+            seccion = 'inventarios' if objeto in INGREDIENTES else 'entradas'
+            escenario.setdefault(seccion, {}).setdefault(objeto, {})[campo] = valor
+        else:
+            escenario[decision.nombre] = valor
+    return escenario
+
+
+def objetivo(resultados, metrica='Utilidad', limite_tardios=None, penalizacion=1e8):
+    """Promedio de metrica menos penalizacion * (exceso de tardíos sobre el límite)."""
+    valor = float(np.mean([resultado['metricas'][metrica] for resultado in resultados]))
+    if limite_tardios is not None:
+        tardios = np.mean([resultado['metricas'][RESTRICCION] for resultado in resultados])
+        valor -= penalizacion * max(0.0, tardios - limite_tardios)
+    return valor
+
+
+def optimizar_spsa(
+    decisiones=DECISIONES, tiempo_horas=168, inicial=None, replicas=8, iteraciones=15,
+    perturbaciones=2, a=0.15, c=0.1, estabilidad=2, limite_tardios=None, penalizacion=1e8,
+    metrica='Utilidad', escenario_base=None, semilla=0, semilla_spsa=0, n_confirmacion=30,
+    cache=None, motor='serial', procesos=None,
+):
+    """
+    Maximiza el objetivo sobre decisiones. inicial es {nombre: valor} (por
+    defecto el punto medio de cada rango). Retorna el mejor escenario, su
+    objetivo en las réplicas fijas, la historia de la búsqueda y la
+    confirmación contra el inicial en n_confirmacion réplicas nuevas.
+    """
+    cache = cache or CacheResultados()
+    rng = np.random.default_rng(semilla_spsa)
+    inicial = inicial or {}
+    theta = np.array([
+        decision.normalizar(inicial[decision.nombre]) if decision.nombre in inicial else 0.5
+        for decision in decisiones
+    ])
+    pasos_minimos = np.array([decision.paso_minimo() for decision in decisiones])
+    fijas = range(replicas)
+    evaluados = {}
+    historia = []
+    escala = None
+
+    def evaluar(puntos):
+        # Un lote con todos los candidatos no evaluados
+        valores = [tuple(decision.valor(t) for decision, t in zip(decisiones, punto)) for punto in puntos]
+        nuevos = list(dict.fromkeys(v for v in valores if v not in evaluados))
+        escenarios = [construir_escenario(decisiones, v, escenario_base) for v in nuevos]
+        for v, resultados in zip(nuevos, cache.lote(
+            [(escenario, fijas) for escenario in escenarios], tiempo_horas, semilla, motor, procesos,
+        )):
+            evaluados[v] = objetivo(resultados, metrica, limite_tardios, penalizacion)
+        return valores
+
+    inicio = tuple(decision.valor(t) for decision, t in zip(decisiones, theta))
+    for k in range(iteraciones):
+        c_k = np.maximum(c / (k + 1) ** 0.101, pasos_minimos)
+        deltas = rng.choice([-1.0, 1.0], size=(perturbaciones, len(decisiones)))
+        puntos = [theta]
+        for delta in deltas:
+            puntos += [np.clip(theta + c_k * delta, 0, 1), np.clip(theta - c_k * delta, 0, 1)]
+        valores = evaluar(puntos)
+
+        gradiente = np.zeros(len(decisiones))
+        for j in range(perturbaciones):
+            mas, menos = valores[1 + 2 * j], valores[2 + 2 * j]
+            diferencia = evaluados[mas] - evaluados[menos]
+            for i, decision in enumerate(decisiones):
+                distancia = decision.normalizar(mas[i]) - decision.normalizar(menos[i])
+                if distancia != 0:
+                    gradiente[i] += diferencia / distancia / perturbaciones
+        if escala is None:
+            escala = np.abs(gradiente).mean() or 1.0
+        theta = np.clip(theta + a / (k + 1 + estabilidad) ** 0.602 * gradiente / escala, 0, 1)
+        historia.append({
+            'iteracion': k,
+            'centro': dict(zip([d.nombre for d in decisiones], valores[0])),
+            'objetivo': evaluados[valores[0]],
+            'simuladas': cache.simuladas,
+        })
+
+    evaluar([theta])
+    mejor = max(evaluados, key=evaluados.get)
+    escenario_mejor = construir_escenario(decisiones, mejor, escenario_base)
+    escenario_inicial = construir_escenario(decisiones, inicio, escenario_base)
+    nuevas = range(replicas, replicas + n_confirmacion)
+    base, elegido = cache.lote(
+        [(escenario_inicial, nuevas), (escenario_mejor, nuevas)], tiempo_horas, semilla, motor, procesos,
+    )
+    return {
+        'mejor': dict(zip([d.nombre for d in decisiones], mejor)),
+        'escenario': escenario_mejor,
+        'objetivo': evaluados[mejor],
+        'inicial': dict(zip([d.nombre for d in decisiones], inicio)),
+        'objetivo_inicial': evaluados[inicio],
+        'historia': historia,
+        'candidatos_evaluados': len(evaluados),
+        'simuladas': cache.simuladas,
+        'confirmacion': {
+            metrica: resumen_diferencias([r['metricas'][metrica] for r in base], [r['metricas'][metrica] for r in elegido])
+            for metrica in (metrica, RESTRICCION)
+        },
+    }
+
+
+def imprimir_optimizacion(resultado):
+    for paso in resultado['historia']:
+        print(f"{paso['iteracion']:>3} {paso['objetivo']:>16,.0f} {paso['simuladas']:>6}  {paso['centro']}")
+    print(f"Inicial: {resultado['inicial']}  objetivo {resultado['objetivo_inicial']:,.0f}")
+    print(f"Mejor:   {resultado['mejor']}  objetivo {resultado['objetivo']:,.0f}")
+    print(f"Candidatos evaluados: {resultado['candidatos_evaluados']}  réplicas simuladas: {resultado['simuladas']}")
+    for metrica, datos in resultado['confirmacion'].items():
+        print(
+            f"Confirmación {metrica} (mejor - inicial, {datos['n']} réplicas nuevas): "
+            f"{datos['diferencia']:,.4f} ± {datos['semiancho']:,.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Optimización por simulación con SPSA')
+    parser.add_argument('--iteraciones', type=int, default=15)
+    parser.add_argument('--replicas', type=int, default=8, help='réplicas comunes por candidato')
+    parser.add_argument('--perturbaciones', type=int, default=2, help='pares de perturbaciones por iteración')
+    parser.add_argument('--a', type=float, default=0.15, help='tamaño del primer paso (en [0, 1])')
+    parser.add_argument('--c', type=float, default=0.1, help='tamaño de la perturbación (en [0, 1])')
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--limite-tardios', type=float)
+    parser.add_argument('--penalizacion', type=float, default=1e8)
+    parser.add_argument('--confirmacion', type=int, default=30, help='réplicas nuevas para confirmar')
+    parser.add_argument('--cache', help='archivo JSON lines de resultados')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    args = parser.parse_args()
+
+    resultado = optimizar_spsa(
+        DECISIONES, args.horas,
+        inicial={'cantidad_trabajadores': 5, 'cantidad_repartidores': 6, 'capacidad_horno': 10},
+        replicas=args.replicas, iteraciones=args.iteraciones, perturbaciones=args.perturbaciones,
+        a=args.a, c=args.c, limite_tardios=args.limite_tardios, penalizacion=args.penalizacion,
+        semilla=args.semilla, n_confirmacion=args.confirmacion, cache=CacheResultados(args.cache),
+        motor=args.motor,
+    )
+    imprimir_optimizacion(resultado)
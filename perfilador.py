@@ -0,0 +1,145 @@
+"""
+Perfil de CPU de una réplica, agregado por proceso del modelo.
+
+Cada paso del Environment se atribuye a la etapa del modelo que reanuda
+(llegada_llamadas, atender_llamada, preparar_pizza, hornear, embalar,
+despacho, vigilar_revisiones, revisar_inventarios, proceso_reposicion, ... o
+'motor' para los eventos que no reanudan un proceso) y se perfila con un
+cProfile propio de esa etapa. Así el perfil responde "cuánto cuesta
+hornear" y no sólo "cuánto cuesta Environment.step".
+
+La salida para flamegraph usa el formato de pilas colapsadas
+("marco;marco;marco microsegundos" por línea), que leen flamegraph.pl,
+speedscope e inferno. Cada pila es replica;etapa;llamador;función, con el
+tiempo propio de la función en microsegundos.
+
+Uso:
+    python perfilador.py --semilla 3 --horas 168 --factor-llegadas 2 --salida perfil.folded
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import time
+from collections import Counter, defaultdict
+
+from instrumentacion import etapa_del_evento
+
+
+def nombre_funcion(clave):
+    # clave de pstats: (archivo, línea, función)
+    archivo, linea, funcion = clave
+    if archivo == '~':
+        return funcion  # funciones builtin, p. ej. <built-in method heapq.heappush>
+    return f'{os.path.basename(archivo)}:{funcion}:{linea}'
+
+
+class PerfilProcesos:
+
+    def __init__(self, etiqueta='replica'):
+        self.etiqueta = etiqueta
+        self.perfiles = {}  # etapa -> cProfile.Profile
+        self.tiempo_etapa = defaultdict(float)  # segundos de reloj
+        self.pasos_etapa = Counter()
+
+    def instalar(self, pizzeria):
+        env = pizzeria.env
+        step = env.step
+
+        def step_perfilado():
+            if not env._queue:
+                return step()  # SimPy avisa que no quedan eventos
+            etapa = etapa_del_evento(env._queue[0][3])
+            perfil = self.perfiles.get(etapa)
+            if perfil is None:
+                perfil = self.perfiles[etapa] = cProfile.Profile()
+            inicio = time.perf_counter()
+            perfil.enable()
+            try:
+                step()
+            finally:
+                perfil.disable()
+                self.tiempo_etapa[etapa] += time.perf_counter() - inicio
+                self.pasos_etapa[etapa] += 1
+
+        env.step = step_perfilado
+
+    def estadisticas(self, etapa):
+        return pstats.Stats(self.perfiles[etapa])
+
+    def resumen(self, n=10):
+        """
+        Por etapa: segundos de reloj, pasos del Environment y las n funciones
+        con más tiempo propio dentro de esa etapa.
+        """
+        resumen = {}
+        for etapa in sorted(self.perfiles, key=self.tiempo_etapa.get, reverse=True):
+            funciones = [
+                {
+                    'funcion': nombre_funcion(clave),
+                    'llamadas': llamadas,
+                    'tiempo_propio_s': propio,
+                    'tiempo_acumulado_s': acumulado,
+                }
+                for clave, (_, llamadas, propio, acumulado, _) in self.estadisticas(etapa).stats.items()
+            ]
+            funciones.sort(key=lambda f: f['tiempo_propio_s'], reverse=True)
+            resumen[etapa] = {
+                'segundos': self.tiempo_etapa[etapa],
+                'pasos': self.pasos_etapa[etapa],
+                'funciones': funciones[:n],
+            }
+        return resumen
+
+    def pilas_colapsadas(self):
+        """Líneas 'replica;etapa;llamador;función microsegundos' para flamegraph."""
+        lineas = []
+        for etapa in sorted(self.perfiles):
+            for clave, (_, _, propio, _, llamadores) in self.estadisticas(etapa).stats.items():
+                funcion = nombre_funcion(clave)
+                if llamadores:
+                    # pstats reparte el tiempo propio de la función entre sus llamadores
+                    partes = [
+                        (f'{nombre_funcion(llamador)};{funcion}', valores[2])
+                        for llamador, valores in llamadores.items()
+                    ]
+                else:
+                    partes = [(funcion, propio)]
+                for pila, segundos in partes:
+                    microsegundos = int(round(segundos * 1e6))
+                    if microsegundos > 0:
+                        lineas.append(f'{self.etiqueta};{etapa};{pila} {microsegundos}')
+        return lineas
+
+
+def guardar_pilas(lineas, archivo):
+    with open(archivo, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lineas) + '\n')
+
+
+def imprimir_resumen(resumen, n=5):
+    total = sum(datos['segundos'] for datos in resumen.values()) or 1.0
+    for etapa, datos in resumen.items():
+        print(f"{etapa:<28} {datos['segundos']:8.3f} s {datos['segundos'] / total:6.1%} {datos['pasos']:>10,} pasos")
+        for funcion in datos['funciones'][:n]:
+            print(f"    {funcion['tiempo_propio_s']:8.3f} s  {funcion['llamadas']:>9,}  {funcion['funcion']}")
+
+
+if __name__ == "__main__":
+    from ejecutor_replicas import simular_replica
+
+    parser = argparse.ArgumentParser(description='Perfil por proceso del modelo de una réplica')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--factor-llegadas', type=float, default=1)
+    parser.add_argument('--salida', default='perfil_replica.folded', help='pilas colapsadas para flamegraph')
+    parser.add_argument('--funciones', type=int, default=5, help='funciones a mostrar por etapa')
+    args = parser.parse_args()
+
+    resultado = simular_replica(
+        {'factor_llegadas': args.factor_llegadas}, args.semilla, args.horas, perfilar=True,
+    )
+    imprimir_resumen(resultado['perfil']['resumen'], args.funciones)
+    guardar_pilas(resultado['perfil']['pilas'], args.salida)
+    print(f'\nPilas colapsadas guardadas en {args.salida}')
@@ -0,0 +1,133 @@
+"""
+Reporte de avance de una campaña de réplicas.
+
+Muestra réplicas completadas/total, réplicas/s, tiempo restante estimado y
+la media acumulada de una métrica (por defecto 'Utilidad') con su intervalo
+de confianza. Las actualizaciones se limitan a una cada intervalo_s segundos
+(más la final), así que sirve igual para 10 o para 10.000 réplicas. Con
+archivo_json escribe además cada actualización como una línea JSON, para el
+planificador de trabajos.
+
+Las réplicas se registran desde el proceso que las recolecta (en el pool de
+procesos, a medida que terminan), así que no importa cuántos procesos las
+corran.
+
+Uso:
+    progreso = ReporteProgreso(total=200)
+    for ...:
+        progreso.registrar(pizzeria.obtener_metricas())
+    progreso.terminar()
+"""
+
+import json
+import math
+import sys
+import time
+
+from scipy import stats
+
+
+def formato_duracion(segundos):
+    if segundos is None or not math.isfinite(segundos):
+        return '--'
+    segundos = int(round(segundos))
+    horas, resto = divmod(segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    if horas:
+        return f'{horas}h{minutos:02d}m'
+    if minutos:
+        return f'{minutos}m{segundos:02d}s'
+    return f'{segundos}s'
+
+
+class ReporteProgreso:
+
+    def __init__(self, total, metrica='Utilidad', confianza=0.95, intervalo_s=2.0,
+                 salida=sys.stderr, archivo_json=None, etiqueta='Réplicas'):
+        self.total = total
+        self.metrica = metrica
+        self.confianza = confianza
+        self.intervalo_s = intervalo_s
+        self.salida = salida
+        self.archivo_json = archivo_json
+        self.etiqueta = etiqueta
+
+        self.completadas = 0
+        self.media = 0.0
+        self.m2 = 0.0  # suma de cuadrados de desviaciones (Welford)
+        self.inicio = time.perf_counter()
+        self.ultimo_reporte = None
+        self.en_linea = hasattr(salida, 'isatty') and salida.isatty()
+
+    def registrar(self, metricas=None, valor=None):
+        """
+        Registra una réplica completada. El valor de la métrica se toma de
+        metricas[self.metrica] o se entrega directamente en valor.
+        """
+        if valor is None and metricas is not None:
+            valor = metricas.get(self.metrica)
+        self.completadas += 1
+        if valor is not None:
+            valor = float(valor)
+            n = self.completadas
+            delta = valor - self.media
+            self.media += delta / n
+            self.m2 += delta * (valor - self.media)
+
+        ahora = time.perf_counter()
+        if self.ultimo_reporte is None or ahora - self.ultimo_reporte >= self.intervalo_s:
+            self.reportar()
+
+    def estado(self):
+        transcurrido = time.perf_counter() - self.inicio
+        tasa = self.completadas / transcurrido if transcurrido > 0 else 0.0
+        restantes = max(self.total - self.completadas, 0)
+        eta = restantes / tasa if tasa > 0 else None
+        semiancho = None
+        if self.completadas >= 2:
+            desviacion = math.sqrt(self.m2 / (self.completadas - 1))
+            cuantil = stats.t.ppf((1 + self.confianza) / 2, self.completadas - 1)
+            semiancho = cuantil * desviacion / math.sqrt(self.completadas)
+        return {
+            'completadas': self.completadas,
+            'total': self.total,
+            'transcurrido_s': transcurrido,
+            'replicas_por_segundo': tasa,
+            'eta_s': eta,
+            'metrica': self.metrica,
+            'media': self.media if self.completadas else None,
+            'semiancho': semiancho,
+            'confianza': self.confianza,
+        }
+
+    def reportar(self, final=False):
+        self.ultimo_reporte = time.perf_counter()
+        estado = self.estado()
+
+        linea = (
+            f"{self.etiqueta} {estado['completadas']}/{estado['total']} "
+            f"({estado['completadas'] / max(estado['total'], 1):.0%}) "
+            f"{estado['replicas_por_segundo']:.2f} rep/s "
+            f"ETA {formato_duracion(estado['eta_s'])}"
+        )
+        if estado['media'] is not None:
+            linea += f" | {self.metrica} {estado['media']:,.2f}"
+            if estado['semiancho'] is not None:
+                linea += f" ± {estado['semiancho']:,.2f} ({self.confianza:.0%})"
+
+        if self.salida is not None:
+            if self.en_linea:
+                self.salida.write('\r' + linea + ('\n' if final else ''))
+            else:
+                self.salida.write(linea + '\n')
+            self.salida.flush()
+
+        if self.archivo_json is not None:
+            estado['final'] = final
+            estado['fecha'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+            with open(self.archivo_json, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(estado) + '\n')
+
+    def terminar(self):
+        self.reportar(final=True)
+        return self.estado()
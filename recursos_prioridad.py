@@ -0,0 +1,80 @@
+"""
+Recurso con prioridades para el modelo de la pizzería.
+
+sp.PriorityResource guarda las solicitudes pendientes en una lista que se
+reordena completa (por prioridad, tiempo de solicitud) en cada append. En el
+modelo sólo existen unas pocas prioridades (1 = premium, 2 = normal y 0 para
+las revisiones de inventario y las líneas telefónicas), y las solicitudes
+llegan en orden de tiempo, así que basta una cola FIFO por prioridad para
+obtener exactamente el mismo orden con encolar/desencolar en O(1).
+
+El otorgamiento y la liberación siguen siendo los de SimPy (sólo cambia la
+estructura de la cola), por lo que los resultados son idénticos.
+"""
+
+import bisect
+from collections import deque
+
+import simpy as sp
+
+
+class ColaPorPrioridad:
+    """
+    Cola de solicitudes pendientes con una deque FIFO por prioridad.
+    Implementa la interfaz que SimPy usa sobre put_queue: append, len,
+    acceso por índice, pop(idx) y remove (al cancelar una solicitud).
+    """
+
+    def __init__(self):
+        self.colas = {}
+        self.prioridades = []  # prioridades conocidas, de más a menos importante
+        self.largo = 0
+
+    def append(self, solicitud):
+        cola = self.colas.get(solicitud.priority)
+        if cola is None:
+            cola = self.colas[solicitud.priority] = deque()
+            bisect.insort(self.prioridades, solicitud.priority)
+        cola.append(solicitud)
+        self.largo += 1
+
+    def __len__(self):
+        return self.largo
+
+    def _ubicar(self, idx):
+        if idx < 0:
+            idx += self.largo
+        if not 0 <= idx < self.largo:
+            raise IndexError('índice fuera de la cola')
+        for prioridad in self.prioridades:
+            cola = self.colas[prioridad]
+            if idx < len(cola):
+                return cola, idx
+            idx -= len(cola)
+
+    def __getitem__(self, idx):
+        cola, i = self._ubicar(idx)
+        return cola[i]
+
+    def pop(self, idx=-1):
+        cola, i = self._ubicar(idx)
+        self.largo -= 1
+        if i == 0:
+            return cola.popleft()
+        solicitud = cola[i]
+        del cola[i]
+        return solicitud
+
+    def remove(self, solicitud):
+        self.colas[solicitud.priority].remove(solicitud)
+        self.largo -= 1
+
+    def __iter__(self):
+        for prioridad in self.prioridades:
+            yield from self.colas[prioridad]
+
+
+class RecursoPrioridad(sp.PriorityResource):
+    """Reemplazo directo de sp.PriorityResource con colas FIFO por prioridad."""
+
+    PutQueue = ColaPorPrioridad
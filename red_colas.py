@@ -0,0 +1,347 @@
+"""
+Aproximación analítica de la red de colas de un pedido, para descartar
+planes de dotación claramente infactibles antes de simularlos.
+
+Cada hora del calendario se trata como un régimen estacionario (como en
+perdidas_erlang.py) con los pedidos aceptados de esa hora, E[llamadas] x
+(1 - bloqueo de Erlang B). La red se descompone en estaciones multi-servidor
+con dos clases (premium con prioridad no expropiativa, normal):
+
+  - preparación: min(estaciones, trabajadores) servidores, salsa + queso
+    (+ pepperoni, + carnes según el tipo de pizza);
+  - horno: capacidad_horno servidores, cocción;
+  - embalaje: min(estaciones, trabajadores) servidores;
+  - trabajadores: las tareas de preparación y de embalaje compiten por el
+    mismo grupo; la espera de cada tarea es la mayor entre la de su
+    estación y la del grupo de trabajadores;
+  - despacho: repartidores, ocupados ida + vuelta; el pedido termina al
+    llegar al domicilio.
+
+En cada estación (Cobham para prioridades con M/M/c, ajustado por
+Allen-Cunneen a servicio y llegadas generales):
+
+    W_k = C(c, a) E[S] / c / ((1 - σ_k-1)(1 - σ_k)) x (ca² + cs²) / 2
+
+con C la probabilidad de espera de Erlang C y σ_k la utilización de las
+clases de prioridad >= k. Las llegadas a preparación son lotes (las pizzas
+de un pedido), ca² = E[B²] / E[B]; aguas abajo ca² sigue la ecuación de
+salida de Whitt (QNA), cd² = 1 + (1 - ρ²)(ca² - 1) + ρ² (cs² - 1) / sqrt(c).
+
+Un pedido de b pizzas espera la más lenta: con T la estadía de una pizza
+(esperas con varianza de exponencial condicionada a esperar), el máximo de
+b copias se aproxima con normales, E = μ + σ e_b y Var = σ² v_b. Al tiempo
+de ciclo (espera de repartidor + ida) se le ajusta una gamma por momentos y
+P(tardío) = P(ciclo > 60 min).
+
+En las horas con utilización >= 1 (y en las siguientes, mientras se vacía)
+se arrastra un atraso fluido por estación, en minutos de trabajo: R crece a
+razón a - c por minuto (carga menos servidores) desde R = 0 al abrir cada
+día. Los pedidos normales esperan además R promedio de la hora / c en esa
+estación; los premium pasan delante. La parte estacionaria de una hora
+saturada se calcula con la utilización acotada a RHO_MAXIMO.
+
+Es una aproximación para filtrar (menos de 0.1 s por configuración, la
+mayor parte en perdidas_erlang), no un reemplazo de la simulación. Contra
+la simulación sin quiebres de stock (inventarios muy grandes, 6 réplicas)
+es conservadora, porque las puntas duran una o dos horas y no alcanzan el
+régimen estacionario: tardíos 0.03 vs 0.001 con la dotación base, 0.06 vs
+0.01 con 4 trabajadores, 0.22 vs 0.12 con 3, 0.22 vs 0.17 con 4
+repartidores. No modela los quiebres de stock, que en el modelo completo
+agregan pedidos tardíos (0.06 con la dotación base). Por eso
+filtrar_factibles sólo descarta con un margen sobre el límite.
+
+Uso:
+    python red_colas.py --trabajadores 3 4 5 --repartidores 4 5 6 --limite-tardios 0.1
+"""
+
+import argparse
+import itertools
+import math
+
+import numpy as np
+import simpy as sp
+from scipy import stats
+
+from ejecutor_replicas import crear_pizzeria
+from medias_controles import (
+    DISTRIBUCIONES, DISTRIBUCIONES_PARAMETRICAS, PIZZAS_POR_PEDIDO, PROB_PREMIUM, TIPOS_PIZZA, erlang_b,
+)
+from perdidas_erlang import estimar_perdidas
+from variables_aleatorias import PARAMETRICAS
+
+
+LIMITE_RETRASO = 60  # minutos (Pizzeria.despacho: tardío si el pedido demora más de 1 hora)
+RHO_MAXIMO = 0.95  # utilización para la parte estacionaria de una hora saturada
+
+# E[máximo] y Var[máximo] de b normales estándar independientes
+MAXIMOS_NORMALES = {1: (0.0, 1.0), 2: (0.5642, 0.6817), 3: (0.8463, 0.5595), 4: (1.0294, 0.4917)}
+
+CLASES = [(True, PROB_PREMIUM), (False, 1 - PROB_PREMIUM)]  # en orden de prioridad
+ESTACIONES = ['preparacion', 'horno', 'embalaje', 'trabajadores', 'repartidores']
+
+
+def _momentos(distribucion):
+    return float(distribucion.mean()), float(distribucion.var())
+
+
+def _entradas(escenario):
+    # (media, varianza) de cocción, ida y vuelta con los parámetros del escenario
+    entradas = (escenario or {}).get('entradas', {})
+    momentos = {}
+    for flujo, crear in DISTRIBUCIONES_PARAMETRICAS.items():
+        parametros = dict(PARAMETRICAS[flujo][1], **entradas.get(flujo, {}))
+        momentos[flujo] = _momentos(crear(**parametros))
+    return momentos
+
+
+def _preparacion(premium):
+    # (E[S], E[S²]) de la preparación de una pizza de la clase, mezclando tipos
+    salsa = _momentos(DISTRIBUCIONES['Tiempo Promedio Salsa'])
+    queso = _momentos(DISTRIBUCIONES['Tiempo Promedio Queso'])
+    pepperoni = _momentos(DISTRIBUCIONES['Tiempo Promedio Pepperoni'])
+    carnes = _momentos(DISTRIBUCIONES['Tiempo Promedio Carnes'])
+    etapas = {0: [salsa, queso], 1: [salsa, queso, pepperoni], 2: [salsa, queso, pepperoni, carnes]}
+    m1 = m2 = 0.0
+    for tipo, prob in enumerate(TIPOS_PIZZA[premium]):
+        media = sum(m for m, _ in etapas[tipo])
+        varianza = sum(v for _, v in etapas[tipo])
+        m1 += prob * media
+        m2 += prob * (varianza + media ** 2)
+    return m1, m2
+
+
+def _lotes(premium):
+    # (E[B], E[B²]) de pizzas por pedido de la clase
+    cantidades, probs = PIZZAS_POR_PEDIDO[premium]
+    return (
+        sum(n * p for n, p in zip(cantidades, probs)),
+        sum(n * n * p for n, p in zip(cantidades, probs)),
+    )
+
+
+def analizar_estacion(servidores, tasas, m1, m2, ca2):
+    """
+    Estación multi-servidor con prioridad no expropiativa. tasas, m1 y m2 son
+    por clase (en orden de prioridad): tasa de llegada (por minuto), E[S] y
+    E[S²]. Retorna la carga (servidores ocupados en promedio) y la
+    utilización, la espera media y su varianza por clase y el cd² de la
+    salida. Con ρ >= RHO_MAXIMO las esperas son las de ρ = RHO_MAXIMO (el
+    resto es el atraso fluido de analizar_red).
+    """
+    tasa = sum(tasas)
+    if tasa == 0:
+        return {'carga': 0.0, 'rho': 0.0, 'espera': [0.0] * len(tasas), 'var_espera': [0.0] * len(tasas), 'cd2': ca2}
+    media = sum(l * m for l, m in zip(tasas, m1)) / tasa
+    segundo = sum(l * m for l, m in zip(tasas, m2)) / tasa
+    cs2 = segundo / media ** 2 - 1
+    carga_real = carga = tasa * media
+    rho_real = rho = carga / servidores
+    if rho > RHO_MAXIMO:
+        tasas = [l * RHO_MAXIMO / rho for l in tasas]
+        carga, rho = RHO_MAXIMO * servidores, RHO_MAXIMO
+    bloqueo = erlang_b(servidores, carga)
+    espera_erlang = bloqueo / (1 - rho * (1 - bloqueo))  # Erlang C
+    factor = espera_erlang * media / servidores * (ca2 + cs2) / 2
+    esperas, varianzas = [], []
+    sigma = 0.0
+    for l, m in zip(tasas, m1):
+        anterior = sigma
+        sigma += l * m / servidores
+        espera = factor / ((1 - anterior) * (1 - sigma))
+        esperas.append(espera)
+        varianzas.append(espera ** 2 * (2 / espera_erlang - 1) if espera_erlang > 0 else 0.0)
+    cd2 = 1 + (1 - rho ** 2) * (ca2 - 1) + rho ** 2 * (cs2 - 1) / math.sqrt(servidores)
+    return {'carga': carga_real, 'rho': rho_real, 'espera': esperas, 'var_espera': varianzas, 'cd2': cd2}
+
+
+def _analizar_hora(pedidos_por_minuto, pizzeria, momentos):
+    # Estaciones de una hora con esa tasa de pedidos y, por clase, la lista de
+    # (probabilidad, media, varianza) del tiempo de ciclo según pizzas del pedido
+    tasas_pedidos = [pedidos_por_minuto * prob for _, prob in CLASES]
+    lotes = [_lotes(premium) for premium, _ in CLASES]
+    tasas_pizzas = [l * b1 for l, (b1, _) in zip(tasas_pedidos, lotes)]
+    preparacion = [_preparacion(premium) for premium, _ in CLASES]
+    coccion = momentos['coccion']
+    embalaje = _momentos(DISTRIBUCIONES['Tiempo Promedio Embalaje'])
+    ida, vuelta = momentos['despacho_ida'], momentos['despacho_vuelta']
+    total_pizzas = sum(tasas_pizzas)
+    ca2_lotes = (
+        sum(l * b2 for l, (_, b2) in zip(tasas_pedidos, lotes)) / total_pizzas if total_pizzas else 1.0
+    )
+
+    def m2(momento):
+        return momento[1] + momento[0] ** 2
+
+    estaciones = {}
+    estaciones['preparacion'] = analizar_estacion(
+        min(pizzeria.capacidad_estacion_preparacion, pizzeria.cantidad_trabajadores), tasas_pizzas,
+        [m for m, _ in preparacion], [s for _, s in preparacion], ca2_lotes,
+    )
+    estaciones['horno'] = analizar_estacion(
+        pizzeria.capacidad_horno, tasas_pizzas, [coccion[0]] * 2, [m2(coccion)] * 2,
+        estaciones['preparacion']['cd2'],
+    )
+    estaciones['embalaje'] = analizar_estacion(
+        min(pizzeria.capacidad_estacion_embalaje, pizzeria.cantidad_trabajadores), tasas_pizzas,
+        [embalaje[0]] * 2, [m2(embalaje)] * 2, estaciones['horno']['cd2'],
+    )
+    # Grupo de trabajadores: una tarea de preparación y una de embalaje por pizza
+    estaciones['trabajadores'] = analizar_estacion(
+        pizzeria.cantidad_trabajadores, [2 * l for l in tasas_pizzas],
+        [(m + embalaje[0]) / 2 for m, _ in preparacion],
+        [(s + m2(embalaje)) / 2 for _, s in preparacion],
+        (ca2_lotes + estaciones['horno']['cd2']) / 2,
+    )
+    reparto = (ida[0] + vuelta[0], ida[1] + vuelta[1])
+    estaciones['repartidores'] = analizar_estacion(
+        pizzeria.cantidad_repartidores, tasas_pedidos, [reparto[0]] * 2, [m2(reparto)] * 2, 1.0,
+    )
+
+    clases = []
+    for k, (premium, _) in enumerate(CLASES):
+        def espera(estacion, grupo=None):
+            # (media, varianza) de la espera de una tarea: la mayor entre su estación y el grupo
+            if grupo is not None and estaciones[grupo]['espera'][k] > estaciones[estacion]['espera'][k]:
+                estacion = grupo
+            return estaciones[estacion]['espera'][k], estaciones[estacion]['var_espera'][k]
+
+        etapas = [
+            espera('preparacion', 'trabajadores'), (preparacion[k][0], preparacion[k][1] - preparacion[k][0] ** 2),
+            espera('horno'), coccion,
+            espera('embalaje', 'trabajadores'), embalaje,
+        ]
+        media_pizza = sum(m for m, _ in etapas)
+        desvio_pizza = math.sqrt(sum(v for _, v in etapas))
+        despacho = [espera('repartidores'), ida]
+        ciclos = []
+        for b, prob in zip(*PIZZAS_POR_PEDIDO[premium]):
+            e_max, v_max = MAXIMOS_NORMALES[b]
+            ciclos.append((
+                prob,
+                media_pizza + desvio_pizza * e_max + sum(m for m, _ in despacho),
+                desvio_pizza ** 2 * v_max + sum(v for _, v in despacho),
+            ))
+        clases.append(ciclos)
+    return estaciones, clases
+
+
+def _atraso(inicial, carga, servidores, minutos=60):
+    # (atraso final, atraso promedio) en minutos de trabajo durante la hora
+    pendiente = carga - servidores
+    final = max(0.0, inicial + pendiente * minutos)
+    if pendiente >= 0 or inicial + pendiente * minutos >= 0:
+        return final, inicial + pendiente * minutos / 2
+    vaciado = inicial / -pendiente
+    return final, inicial * vaciado / 2 / minutos
+
+
+def analizar_red(escenario=None, tiempo_horas=168):
+    """
+    Aproximación de las métricas de pedidos del escenario. Retorna las
+    métricas con los nombres de obtener_metricas ('Proporcion Pedidos
+    Tardíos', 'Tiempo Medio para Procesar un Pedido (min)', ... por clase),
+    'utilizacion_maxima' por estación, 'fraccion_saturada' (pedidos que
+    llegan en horas con alguna utilización >= 1) y 'por_hora': [{'dia',
+    'hora', 'pedidos', 'utilizaciones', 'atrasos'}], con atrasos la espera
+    extra de los pedidos normales por estación (minutos).
+    """
+    pizzeria = crear_pizzeria(sp.Environment(), escenario)
+    momentos = _entradas(escenario)
+    memo = {}  # los días se repiten: una vez por tasa de pedidos
+    horas = []
+    pesos, medias, varianzas, clases_ciclo = [], [], [], []
+    dia_anterior = None
+    for dia, hora, llamadas, _, bloqueo in estimar_perdidas(escenario, tiempo_horas)['por_hora']:
+        pedidos = llamadas * (1 - bloqueo)
+        clave = round(pedidos, 9)
+        if clave not in memo:
+            memo[clave] = _analizar_hora(pedidos / 60, pizzeria, momentos)
+        estaciones, clases = memo[clave]
+        if dia != dia_anterior:
+            atraso = dict.fromkeys(ESTACIONES, 0.0)
+            dia_anterior = dia
+        extra = {}
+        for estacion in ESTACIONES:
+            servidores = estaciones[estacion]['carga'] / estaciones[estacion]['rho'] if estaciones[estacion]['rho'] else 1
+            atraso[estacion], promedio = _atraso(atraso[estacion], estaciones[estacion]['carga'], servidores)
+            extra[estacion] = promedio / servidores
+        espera_normal = (
+            max(extra['preparacion'], extra['trabajadores']) + extra['horno'] + extra['embalaje']
+            + extra['repartidores']
+        )
+        for k, (_, prob) in enumerate(CLASES):
+            for prob_lote, media, varianza in clases[k]:
+                pesos.append(pedidos * prob * prob_lote)
+                medias.append(media + (espera_normal if k == 1 else 0.0))
+                varianzas.append(varianza)
+                clases_ciclo.append(k)
+        horas.append({
+            'dia': dia, 'hora': hora, 'pedidos': pedidos,
+            'utilizaciones': {estacion: estaciones[estacion]['rho'] for estacion in ESTACIONES},
+            'atrasos': extra,
+        })
+
+    pesos, medias, varianzas = np.array(pesos), np.array(medias), np.array(varianzas)
+    clases_ciclo = np.array(clases_ciclo)
+    tardios = stats.gamma.sf(LIMITE_RETRASO, a=medias ** 2 / varianzas, scale=varianzas / medias)
+    saturados = sum(fila['pedidos'] for fila in horas if max(fila['utilizaciones'].values()) >= 1)
+
+    def promedio(valores, clase=None):
+        filtro = np.ones(len(pesos), bool) if clase is None else clases_ciclo == clase
+        total = pesos[filtro].sum()
+        return float((pesos[filtro] * valores[filtro]).sum() / total) if total else math.nan
+
+    total_pedidos = sum(fila['pedidos'] for fila in horas)
+    return {
+        'Proporcion Pedidos Tardíos': promedio(tardios),
+        'Proporcion Tardíos Premium': promedio(tardios, 0),
+        'Proporcion Tardíos Normal': promedio(tardios, 1),
+        'Tiempo Medio para Procesar un Pedido (min)': promedio(medias),
+        'Tiempo Medio para Procesar un Pedido Premium (min)': promedio(medias, 0),
+        'Tiempo Medio para Procesar un Pedido Normal (min)': promedio(medias, 1),
+        'utilizacion_maxima': {
+            estacion: max(fila['utilizaciones'][estacion] for fila in horas) for estacion in ESTACIONES
+        },
+        'fraccion_saturada': saturados / total_pedidos if total_pedidos else math.nan,
+        'por_hora': horas,
+    }
+
+
+def filtrar_factibles(escenarios, limite_tardios, tiempo_horas=168, margen=0.1):
+    """
+    Separa escenarios en (admitidos, descartados): se descarta el que tiene
+    proporción aproximada de pedidos tardíos > limite_tardios + margen.
+    """
+    admitidos, descartados = [], []
+    for escenario in escenarios:
+        tardios = analizar_red(escenario, tiempo_horas)['Proporcion Pedidos Tardíos']
+        (descartados if tardios > limite_tardios + margen else admitidos).append(escenario)
+    return admitidos, descartados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Aproximación de red de colas de los pedidos')
+    parser.add_argument('--trabajadores', type=int, nargs='+', default=[5])
+    parser.add_argument('--repartidores', type=int, nargs='+', default=[6])
+    parser.add_argument('--horno', type=int, nargs='+', default=[10])
+    parser.add_argument('--factor-llegadas', type=float, default=1)
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--limite-tardios', type=float)
+    parser.add_argument('--margen', type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{'Trab.':>5} {'Rep.':>5} {'Horno':>5} {'Tardíos':>8} {'Ciclo':>7} {'Saturada':>9}  ρ máx (prep, horno, emb, trab, rep)")
+    for trabajadores, repartidores, horno in itertools.product(args.trabajadores, args.repartidores, args.horno):
+        escenario = {
+            'cantidad_trabajadores': trabajadores, 'cantidad_repartidores': repartidores,
+            'capacidad_horno': horno, 'factor_llegadas': args.factor_llegadas,
+        }
+        analisis = analizar_red(escenario, args.horas)
+        rho = ' '.join(f"{valor:.2f}" for valor in analisis['utilizacion_maxima'].values())
+        marca = ''
+        if args.limite_tardios is not None and analisis['Proporcion Pedidos Tardíos'] > args.limite_tardios + args.margen:
+            marca = '  descartada'
+        print(
+            f"{trabajadores:>5} {repartidores:>5} {horno:>5} {analisis['Proporcion Pedidos Tardíos']:>8.3f} "
+            f"{analisis['Tiempo Medio para Procesar un Pedido (min)']:>7.1f} {analisis['fraccion_saturada']:>9.3f}  {rho}{marca}"
+        )
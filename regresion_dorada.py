@@ -0,0 +1,403 @@
+"""
+Regresión contra resultados de referencia ("dorados") del modelo.
+
+Para un conjunto fijo de escenarios y semillas se registra, con el motor
+original (simulacion_E3_antiteticas.py en REVISION_REFERENCIA, antes de
+reescribir revisiones de inventario, colas y procesos):
+  - el diccionario exacto de métricas de obtener_metricas(), y
+  - un digest de la trayectoria: SHA-256 de la secuencia de Timeouts que
+    despiertan a un proceso del modelo (instante y duración, en float.hex).
+    Es independiente de cuántos Process o qué cola de recursos use el
+    motor, pero cambia con cualquier cambio en los números aleatorios o en
+    el orden de servicio. Quedan fuera los temporizadores de revisión de
+    inventario (TEMPORIZADORES_REVISION): el motor original despertaba cada
+    30 o 45 minutos aunque no hubiera nada que revisar y el actual sólo
+    cuando un inventario queda bajo su umbral, con las mismas revisiones
+    efectivas.
+
+Cada métrica debe ser un float (np.float64 incluido); un arreglo de un
+elemento que se filtre al reloj o a los costos hace fallar el caso. Luego
+verifica que cada motor reproduzca la referencia bit a bit. Los modos
+que cambian a propósito el orden de los sorteos (p. ej. streams de
+uniformes por transformada inversa) se verifican estadísticamente: el lote
+de referencia se registra con los sorteos normales del modelo y, al
+verificar, la media de cada métrica en el modo declarado debe ser compatible
+(test t de Welch) con la del lote de referencia.
+
+Con --archivos se compara además con las salidas del repositorio original:
+  - reporte_logs_replica_1.txt (semilla 0, 168 horas, logs=True): mismas
+    líneas en cada minuto, sin las de revisiones periódicas (ver arriba); el
+    orden dentro de un mismo instante cambió al fusionar procesos.
+  - resumen_resultados_parte2.csv: Media y s2 de las filas Base y
+    Antitéticas, recalculadas con simulacion_E3_parte2.py. Las filas con VC
+    no se comparan: su control dejó de ser 'Total Pizzas' (E[X] aproximada).
+  - simulacion_referencia.txt: es la salida de otra implementación (otro
+    generador, sin semilla), así que no se puede reproducir; sus métricas
+    finales deben caer en el intervalo de predicción 1 - ALPHA del lote
+    base registrado.
+
+Uso:
+    python regresion_dorada.py registrar
+    python regresion_dorada.py verificar --motores serial procesos serial_simpy --archivos
+"""
+
+import argparse
+import collections
+import contextlib
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import simpy as sp
+from scipy import stats
+
+from ejecutor_replicas import crear_pizzeria
+from variables_aleatorias import VariablesAleatorias
+
+
+ARCHIVO_REFERENCIA = 'referencia_dorada.json'
+REVISION_REFERENCIA = '0f53a07'  # motor original, antes de las reescrituras del motor
+MOTOR = 'simulacion_E3_antiteticas.py'
+
+# Procesos de revisión de inventario (original y actual), fuera del digest
+TEMPORIZADORES_REVISION = {'temporizador_revision_salsa', 'temporizador_revision_inventarios', 'vigilar_revisiones'}
+
+# (nombre, escenario, semilla, horas)
+CASOS_EXACTOS = [
+    ('base_s0', {}, 0, 168),
+    ('base_s1', {}, 1, 168),
+    ('base_s2', {}, 2, 168),
+    ('base_2semanas_s7', {}, 7, 336),
+    ('carga_x2_s3', {'factor_llegadas': 2}, 3, 168),
+    ('carga_x4_s4', {'factor_llegadas': 4}, 4, 72),
+]
+
+# (nombre, escenario, semillas, horas, modo de sorteo)
+CASOS_ESTADISTICOS = [
+    ('uniformes_base', {}, list(range(1000, 1030)), 168, 'uniformes'),
+    ('inversa_antiteticas', {}, list(range(2000, 2030)), 168, 'antiteticas'),
+]
+
+ALPHA = 0.001
+
+ARCHIVO_LOGS = 'reporte_logs_replica_1.txt'
+# Líneas de revisiones periódicas del motor original (ver el docstring)
+LINEAS_REVISION = re.compile(r'Revisión periódica|suficiente \(|No hay trabajadores disponibles para revisar')
+ARCHIVO_PARTE2 = 'resumen_resultados_parte2.csv'
+ARCHIVO_EXTERNO = 'simulacion_referencia.txt'
+# Métricas finales de simulacion_referencia.txt -> obtener_metricas()
+METRICAS_EXTERNAS = {
+    'Proporcion llamadas perdidas': 'Proporcion Llamadas Perdidas',
+    'Proporcion pedidos tardios': 'Proporcion Pedidos Tardíos',
+    'Proporcion pedidos tardios (NORMAL)': 'Proporcion Tardíos Normal',
+    'Proporcion pedidos tardios (PREMIUM)': 'Proporcion Tardíos Premium',
+    'Tiempo medio para procesar un pedido': 'Tiempo Medio para Procesar un Pedido (min)',
+    'Tiempo medio para procesar un pedido (NORMAL)': 'Tiempo Medio para Procesar un Pedido Normal (min)',
+    'Tiempo medio para procesar un pedido (PREMIUM)': 'Tiempo Medio para Procesar un Pedido Premium (min)',
+    'Utilidad de la pizzeria': 'Utilidad',
+}
+LOTE_BASE = 'uniformes_base'  # lote estadístico registrado con los sorteos normales
+
+# Largo de cada stream de uniformes para una semana (igual que replicas_simulación)
+LARGO_STREAMS = {
+    'uniformes_interarrival': 2000,
+    'uniformes_coccion': 1700,
+    'uniformes_despacho_ida': 1000,
+    'uniformes_despacho_vuelta': 1000,
+    'uniformes_llamada': 1000,
+    'uniformes_premium': 1000,
+    'uniformes_num_pizzas': 4000,
+    'uniformes_tipo_pizza': 1700,
+    'uniformes_cantidad_queso': 1700,
+    'uniformes_tiempo_queso': 1700,
+    'uniformes_cantidad_salsa': 1700,
+    'uniformes_tiempo_salsa': 1700,
+    'uniformes_cantidad_pepperoni': 1700,
+    'uniformes_tiempo_pepperoni': 1700,
+    'uniformes_cantidad_carnes': 1700,
+    'uniformes_tiempo_carnes': 1700,
+    'uniformes_tiempo_embalaje': 1700,
+}
+
+
+def generar_uniformes(seed, tiempo_horas):
+    # Semilla derivada, para que los uniformes no repliquen los sorteos del rng del modelo
+    rng = np.random.default_rng([seed, 1])
+    semanas = max(1, int(np.ceil(tiempo_horas / 168)))
+    return {nombre: rng.uniform(0, 1, largo * semanas) for nombre, largo in LARGO_STREAMS.items()}
+
+
+def cargar_motor_referencia(revision=REVISION_REFERENCIA):
+    """Clase Pizzeria de simulacion_E3_antiteticas.py en revision (git show)."""
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    fuente = subprocess.run(
+        ['git', 'show', f'{revision}:{MOTOR}'], cwd=directorio, capture_output=True, text=True, check=True,
+    ).stdout
+    ruta = os.path.join(tempfile.mkdtemp(), 'motor_referencia.py')
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(fuente)
+    spec = importlib.util.spec_from_file_location('motor_referencia', ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo.Pizzeria
+
+
+def _pizzeria_referencia(clase, env, escenario):
+    # El motor original no tiene crear_pizzeria: sólo se aplica factor_llegadas
+    escenario = dict(escenario)
+    factor = escenario.pop('factor_llegadas', 1)
+    if escenario:
+        raise ValueError(f'El motor de referencia no admite {sorted(escenario)}')
+    pizzeria = clase(env)
+    if factor != 1:
+        pizzeria.tasas_dia_normal = {h: tasa * factor for h, tasa in pizzeria.tasas_dia_normal.items()}
+        pizzeria.tasas_finde = {h: tasa * factor for h, tasa in pizzeria.tasas_finde.items()}
+    return pizzeria
+
+
+def _primer_elemento(valor):
+    # El motor original sortea la atención telefónica con size=1: arreglos de un elemento
+    return float(np.ravel(valor)[0])
+
+
+def _despierta_modelo(evento):
+    # Timeout que reanuda algún proceso del modelo fuera de las revisiones
+    procesos = [
+        callback.__self__._generator.__name__
+        for callback in evento.callbacks
+        if isinstance(getattr(callback, '__self__', None), sp.events.Process)
+    ]
+    return bool(procesos) and not TEMPORIZADORES_REVISION.intersection(procesos)
+
+
+def correr_con_digest(escenario, seed, tiempo_horas, modo='exacto', clase_referencia=None):
+    env = sp.Environment()
+    if clase_referencia is None:
+        pizzeria = crear_pizzeria(env, escenario)
+        a_float = float
+    else:
+        pizzeria = _pizzeria_referencia(clase_referencia, env, escenario)
+        a_float = _primer_elemento
+
+    digest = hashlib.sha256()
+    step = env.step
+
+    def step_con_digest():
+        if not env._queue:
+            return step()  # SimPy avisa que no quedan eventos
+        tiempo, _, _, evento = env._queue[0]
+        if isinstance(evento, sp.events.Timeout) and _despierta_modelo(evento):
+            t = a_float(tiempo)
+            d = a_float(evento._delay)
+            digest.update(f'{t.hex()}|{d.hex()};'.encode())
+        step()
+
+    env.step = step_con_digest
+
+    uniformes = generar_uniformes(seed, tiempo_horas) if modo == 'uniformes' else {}
+    # 'antiteticas': todas las entradas por transformada inversa, todas con 1 - U
+    variables = VariablesAleatorias(seed, 'todas') if modo == 'antiteticas' else None
+    if clase_referencia is not None:
+        with warnings.catch_warnings():
+            # El motor original convierte esos arreglos con int() (obsoleto desde NumPy 1.25)
+            warnings.simplefilter('ignore', DeprecationWarning)
+            pizzeria.iniciar_simulacion(tiempo_horas, seed, logs=False)
+        metricas = {clave: a_float(valor) for clave, valor in pizzeria.obtener_metricas().items()}
+        return metricas, digest.hexdigest()
+    pizzeria.iniciar_simulacion(tiempo_horas, seed, logs=False, variables=variables, **uniformes)
+    metricas = pizzeria.obtener_metricas()
+    no_float = {clave: type(valor).__name__ for clave, valor in metricas.items() if not isinstance(valor, float)}
+    if no_float:
+        raise TypeError(f'Métricas que no son float: {no_float}')
+    return {clave: float(valor) for clave, valor in metricas.items()}, digest.hexdigest()
+
+
+def _correr_tarea(tarea):
+    return correr_con_digest(*tarea)
+
+
+def correr_casos(motor='serial', registrar=False, revision=REVISION_REFERENCIA):
+    """
+    Corre todos los casos con el motor indicado ('serial', 'procesos' o
+    'serial_simpy') y retorna {'exactos': ..., 'estadisticos': ...}.
+    Al registrar se usa, en serie, el motor original de revision y los
+    casos estadísticos usan los sorteos normales del modelo.
+    """
+    def ajustar(escenario):
+        if motor == 'serial_simpy':
+            return dict(escenario, clase_recurso='simpy')
+        return escenario
+
+    clase = None
+    if registrar:
+        motor = 'serial'
+        clase = cargar_motor_referencia(revision)
+    tareas = [(ajustar(esc), seed, horas, 'exacto', clase) for _, esc, seed, horas in CASOS_EXACTOS]
+    for _, esc, semillas, horas, modo in CASOS_ESTADISTICOS:
+        modo = 'exacto' if registrar else modo
+        tareas += [(ajustar(esc), seed, horas, modo, clase) for seed in semillas]
+
+    if motor == 'procesos':
+        with ProcessPoolExecutor() as pool:
+            salidas = list(pool.map(_correr_tarea, tareas))
+    else:
+        salidas = [_correr_tarea(tarea) for tarea in tareas]
+
+    resultados = {'exactos': {}, 'estadisticos': {}}
+    for (nombre, *_), (metricas, digest) in zip(CASOS_EXACTOS, salidas):
+        resultados['exactos'][nombre] = {'metricas': metricas, 'digest': digest}
+    i = len(CASOS_EXACTOS)
+    for nombre, _, semillas, _, _ in CASOS_ESTADISTICOS:
+        lote = [metricas for metricas, _ in salidas[i:i + len(semillas)]]
+        i += len(semillas)
+        resultados['estadisticos'][nombre] = {
+            clave: [m[clave] for m in lote] for clave in lote[0]
+        }
+    return resultados
+
+
+def verificar(referencia, resultados, alpha=ALPHA):
+    """Retorna la lista de diferencias encontradas (vacía si todo coincide)."""
+    fallas = []
+    for nombre, esperado in referencia['exactos'].items():
+        obtenido = resultados['exactos'].get(nombre)
+        if obtenido is None:
+            fallas.append(f'{nombre}: caso no ejecutado')
+            continue
+        for clave, valor in esperado['metricas'].items():
+            if obtenido['metricas'].get(clave) != valor:
+                fallas.append(f"{nombre}: {clave} = {obtenido['metricas'].get(clave)!r}, referencia {valor!r}")
+        if obtenido['digest'] != esperado['digest']:
+            fallas.append(f'{nombre}: la trayectoria (digest) cambió')
+
+    for nombre, esperado in referencia['estadisticos'].items():
+        obtenido = resultados['estadisticos'].get(nombre)
+        if obtenido is None:
+            fallas.append(f'{nombre}: caso no ejecutado')
+            continue
+        for clave, muestra_ref in esperado.items():
+            muestra = obtenido[clave]
+            if np.var(muestra_ref) == 0 and np.var(muestra) == 0:
+                iguales = np.mean(muestra) == np.mean(muestra_ref)
+                p_valor = 1.0 if iguales else 0.0
+            else:
+                p_valor = stats.ttest_ind(muestra, muestra_ref, equal_var=False).pvalue
+            if p_valor < alpha:
+                fallas.append(
+                    f'{nombre}: media de {clave} = {np.mean(muestra):.6g}, '
+                    f'referencia {np.mean(muestra_ref):.6g} (p = {p_valor:.2g})'
+                )
+    return fallas
+
+
+def verificar_logs(archivo=ARCHIVO_LOGS):
+    """Diferencias entre el log de la réplica 1 (semilla 0) y archivo, sin las líneas de revisión."""
+    pizzeria = crear_pizzeria(sp.Environment(), {})
+    with contextlib.redirect_stdout(io.StringIO()):  # log() también imprime
+        pizzeria.iniciar_simulacion(168, 0, logs=True)
+
+    def lineas(texto):
+        return collections.Counter(linea for linea in texto.splitlines() if not LINEAS_REVISION.search(linea))
+
+    with open(archivo, encoding='utf-8') as f:
+        esperadas = lineas(f.read())
+    obtenidas = lineas(pizzeria.log_data)
+    fallas = [f'{archivo}: falta {linea!r}' for linea in esperadas - obtenidas]
+    fallas += [f'{archivo}: sobra {linea!r}' for linea in obtenidas - esperadas]
+    return fallas[:20]
+
+
+def verificar_parte2(archivo=ARCHIVO_PARTE2):
+    """Media y s2 de las filas Base y Antitéticas de archivo (diseño de replicas_mixto)."""
+    from simulacion_E3_parte2 import Pizzeria as PizzeriaParte2
+
+    def utilidad(seed, **opciones):
+        env = sp.Environment()
+        pizzeria = PizzeriaParte2(env)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pizzeria.iniciar_simulacion(168, seed=seed, logs=False, **opciones)
+        return pizzeria.obtener_metricas()['Utilidad']
+
+    with open(archivo, encoding='utf-8') as f:
+        filas = [fila for fila in csv.DictReader(f) if fila['Metodo'] in ('Base', 'Antitéticas')]
+    n_maximo = max(int(fila['N']) for fila in filas)
+    base = [utilidad(i, usar_antiteticas=False) for i in range(n_maximo)]
+    pares = []
+    for i in range(n_maximo // 2):
+        u = np.random.default_rng(123456 + i).uniform(0, 1, 5000)
+        pares.append(0.5 * (
+            utilidad(900000 + i, usar_antiteticas=True, uniformes_interarrival=u)
+            + utilidad(900000 + i, usar_antiteticas=True, uniformes_interarrival=1 - u)
+        ))
+
+    fallas = []
+    for fila in filas:
+        n = int(fila['N'])
+        y = np.array(base[:n] if fila['Metodo'] == 'Base' else pares[:n // 2], dtype=float)
+        for clave, valor in [('Media', np.mean(y)), ('s2', np.var(y, ddof=1))]:
+            if float(fila[clave]) != valor:
+                fallas.append(f"{archivo}: N={n} {fila['Metodo']} {clave} = {valor!r}, referencia {fila[clave]}")
+    return fallas
+
+
+def verificar_externo(referencia, archivo=ARCHIVO_EXTERNO, alpha=ALPHA):
+    """Métricas finales de archivo contra el intervalo de predicción del lote base registrado."""
+    valores = {}
+    with open(archivo, encoding='utf-8') as f:
+        for linea in f:
+            nombre, _, valor = linea.strip().partition(': ')
+            if nombre in METRICAS_EXTERNAS:
+                valores[METRICAS_EXTERNAS[nombre]] = float(valor.split()[0].lstrip('$'))
+    lote = referencia['estadisticos'][LOTE_BASE]
+    fallas = []
+    for clave, valor in valores.items():
+        muestra = np.array(lote[clave])
+        n = len(muestra)
+        semiancho = stats.t.ppf(1 - alpha / 2, n - 1) * muestra.std(ddof=1) * np.sqrt(1 + 1 / n)
+        if abs(valor - muestra.mean()) > semiancho:
+            fallas.append(f'{archivo}: {clave} = {valor:.6g} fuera de {muestra.mean():.6g} ± {semiancho:.3g}')
+    return fallas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Regresión contra resultados de referencia')
+    parser.add_argument('accion', choices=['registrar', 'verificar'])
+    parser.add_argument('--motores', nargs='+', default=['serial'], choices=['serial', 'procesos', 'serial_simpy'])
+    parser.add_argument('--archivo', default=ARCHIVO_REFERENCIA)
+    parser.add_argument('--revision', default=REVISION_REFERENCIA, help='revisión del motor original (registrar)')
+    parser.add_argument('--archivos', action='store_true', help='comparar también con las salidas del repositorio original')
+    args = parser.parse_args()
+
+    if args.accion == 'registrar':
+        resultados = correr_casos('serial', registrar=True, revision=args.revision)
+        resultados['revision'] = args.revision
+        with open(args.archivo, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f'Referencia guardada en {args.archivo}')
+    else:
+        with open(args.archivo, encoding='utf-8') as f:
+            referencia = json.load(f)
+        total_fallas = 0
+        for motor in args.motores:
+            fallas = verificar(referencia, correr_casos(motor))
+            total_fallas += len(fallas)
+            print(f"Motor {motor}: {'OK' if not fallas else f'{len(fallas)} diferencias'}")
+            for falla in fallas:
+                print(f'  {falla}')
+        if args.archivos:
+            fallas = verificar_logs() + verificar_parte2() + verificar_externo(referencia)
+            total_fallas += len(fallas)
+            print(f"Archivos del repositorio original: {'OK' if not fallas else f'{len(fallas)} diferencias'}")
+            for falla in fallas:
+                print(f'  {falla}')
+        sys.exit(1 if total_fallas else 0)
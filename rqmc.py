@@ -0,0 +1,197 @@
+"""
+Réplicas con quasi-Monte Carlo aleatorizado (Sobol con scrambling).
+
+Los primeros sorteos de los flujos elegidos (por defecto tiempos entre
+llamadas, premium y cocción) se toman de un punto de una secuencia de Sobol
+de dimensión d = suma de los sorteos respaldados; el resto de los sorteos
+sigue siendo Monte Carlo. Una aleatorización es un conjunto de n = 2^m
+réplicas (los n puntos de un Sobol con scrambling propio); R
+aleatorizaciones independientes dan el error:
+
+    media      = promedio de las R medias de aleatorización
+    Var(media) = s^2(medias) / R,   intervalo t con R - 1 gl
+
+Los flujos se respaldan en el orden de dimensiones: las primeras
+coordenadas de Sobol son las mejor distribuidas, así que conviene poner
+primero los flujos que más pesan. Los sorteos por semana se escalan al
+horizonte, pero el total no puede superar qmc.Sobol.MAXDIM (21.201, unas
+5 semanas con DIMENSIONES): en horizontes más largos cada flujo se recorta en
+la misma proporción y sus sorteos siguientes salen del generador
+pseudoaleatorio del flujo, como los de los flujos sin Sobol. Las réplicas se conectan con la misma
+capa de transformada inversa (variables=) o, para los scripts que reciben
+listas uniformes_*, con arreglos_uniformes().
+
+Uso:
+    python rqmc.py --m 4 --aleatorizaciones 8 --comparar
+"""
+
+import argparse
+
+import numpy as np
+from scipy.stats import qmc
+
+from ejecutor_replicas import ejecutar_replicas
+from estratificacion import ejecutar_pares, imprimir_comparacion, resumen_disenos
+from variables_aleatorias import FLUJOS, VariablesAleatorias, normalizar_flujos
+
+
+# Sorteos por semana respaldados por Sobol, en orden de importancia
+DIMENSIONES = {'interarrival': 1000, 'premium': 1000, 'coccion': 1700}
+
+# Último conjunto de puntos generado en este proceso: las réplicas de una
+# aleatorización comparten la matriz (el scrambling cuesta ~0.2 s)
+_PUNTOS = {}
+
+
+def dimensiones_horizonte(dimensiones, tiempo_horas):
+    # Escala los sorteos por semana al horizonte simulado, recortando cada
+    # flujo en la misma proporción si el total supera qmc.Sobol.MAXDIM
+    semanas = max(1, int(np.ceil(tiempo_horas / 168)))
+    escaladas = {nombre: sorteos * semanas for nombre, sorteos in dimensiones.items()}
+    total = sum(escaladas.values())
+    if total <= qmc.Sobol.MAXDIM:
+        return escaladas
+    return {nombre: sorteos * qmc.Sobol.MAXDIM // total for nombre, sorteos in escaladas.items()}
+
+
+class VariablesRQMC(VariablesAleatorias):
+
+    def __init__(self, semilla, aleatorizacion, punto, m, dimensiones=DIMENSIONES,
+                 antiteticas=None, bloque=512):
+        if not 0 <= punto < 2 ** m:
+            raise ValueError(f'Punto {punto} fuera del conjunto de 2^{m} puntos')
+        desconocidos = set(dimensiones) - set(FLUJOS)
+        if desconocidos:
+            raise ValueError(f'Flujos desconocidos: {sorted(desconocidos)}')
+        if sum(dimensiones.values()) > qmc.Sobol.MAXDIM:
+            raise ValueError(f'Sobol admite hasta {qmc.Sobol.MAXDIM} dimensiones')
+        self.semilla_rqmc = semilla
+        self.aleatorizacion = aleatorizacion
+        self.punto = punto
+        self.m = m
+        self.dimensiones = dict(dimensiones)
+        self.coordenadas = None
+        self.bloques_cargados = dict.fromkeys(FLUJOS, 0)
+        super().__init__([semilla, aleatorizacion, punto], antiteticas, bloque)
+
+    def obtener_coordenadas(self):
+        """Coordenadas Sobol de esta réplica, por flujo (se calculan una vez)."""
+        if self.coordenadas is None:
+            clave = (self.semilla_rqmc, self.aleatorizacion, self.m, tuple(self.dimensiones.items()))
+            if clave not in _PUNTOS:
+                sobol = qmc.Sobol(
+                    sum(self.dimensiones.values()), scramble=True,
+                    seed=np.random.default_rng([self.semilla_rqmc, self.aleatorizacion]),
+                )
+                _PUNTOS.clear()
+                _PUNTOS[clave] = sobol.random_base2(self.m)
+            fila = _PUNTOS[clave][self.punto]
+            self.coordenadas = {}
+            inicio = 0
+            for nombre, sorteos in self.dimensiones.items():
+                self.coordenadas[nombre] = fila[inicio:inicio + sorteos]
+                inicio += sorteos
+        return self.coordenadas
+
+    def _uniformes_bloque(self, nombre):
+        u = super()._uniformes_bloque(nombre)
+        if nombre in self.dimensiones:
+            inicio = self.bloques_cargados[nombre] * self.bloque
+            self.bloques_cargados[nombre] += 1
+            coordenadas = self.obtener_coordenadas()[nombre][inicio:inicio + self.bloque]
+            u[:len(coordenadas)] = coordenadas
+        return u
+
+    def antitetica(self, antiteticas='todas'):
+        return VariablesRQMC(
+            self.semilla_rqmc, self.aleatorizacion, self.punto, self.m, self.dimensiones,
+            self.antiteticas ^ normalizar_flujos(antiteticas),
+            self.bloque,
+        )
+
+
+def arreglos_uniformes(semilla, aleatorizacion, punto, m, dimensiones=DIMENSIONES):
+    """
+    Las coordenadas Sobol de una réplica como kwargs uniformes_<flujo> de
+    iniciar_simulacion (más allá de ellas el modelo vuelve a su rng).
+    """
+    sin_lista = [nombre for nombre in dimensiones if nombre.startswith('reposicion_')]
+    if sin_lista:
+        raise ValueError(f'iniciar_simulacion no recibe listas para {sin_lista}; usar variables=')
+    coordenadas = VariablesRQMC(semilla, aleatorizacion, punto, m, dimensiones).obtener_coordenadas()
+    return {f'uniformes_{nombre}': valores for nombre, valores in coordenadas.items()}
+
+
+def resumen_metricas(resultados, aleatorizaciones, n, confianza=0.95):
+    """Estimador RQMC (media, semiancho, ...) de cada métrica de obtener_metricas."""
+    segundos = sum(r['segundos'] for r in resultados)
+    resumen = {}
+    for metrica in resultados[0]['metricas']:
+        valores = np.array([float(r['metricas'][metrica]) for r in resultados]).reshape(aleatorizaciones, n)
+        resumen[metrica] = resumen_disenos(valores, segundos, confianza)
+    return resumen
+
+
+def ejecutar_rqmc(
+    escenario, tiempo_horas, m, aleatorizaciones, dimensiones=DIMENSIONES, semilla=0,
+    confianza=0.95, motor='serial', procesos=None, progreso=None,
+):
+    """
+    Corre aleatorizaciones x 2^m réplicas. dimensiones son los sorteos por
+    semana respaldados por Sobol de cada flujo (se escalan al horizonte,
+    hasta qmc.Sobol.MAXDIM en total).
+    Retorna {métrica: resumen} y los resultados de cada réplica.
+    """
+    n = 2 ** m
+    dimensiones = dimensiones_horizonte(dimensiones, tiempo_horas)
+    variables = [
+        VariablesRQMC(semilla, a, punto, m, dimensiones)
+        for a in range(aleatorizaciones) for punto in range(n)
+    ]
+    resultados = ejecutar_replicas(
+        escenario, range(len(variables)), tiempo_horas, motor=motor, procesos=procesos,
+        progreso=progreso, variables=variables,
+    )
+    return resumen_metricas(resultados, aleatorizaciones, n, confianza), resultados
+
+
+def imprimir_intervalos(resumen):
+    for metrica, datos in resumen.items():
+        print(f"{metrica:<45} {datos['media']:>16,.4f} ± {datos['semiancho']:,.4f} ({datos['confianza']:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Réplicas con Sobol aleatorizado')
+    parser.add_argument('--m', type=int, default=4, help='2^m réplicas por aleatorización')
+    parser.add_argument('--aleatorizaciones', type=int, default=8)
+    parser.add_argument('--flujos', nargs='+', default=list(DIMENSIONES), help='flujos respaldados por Sobol, en orden')
+    parser.add_argument('--sorteos', type=int, nargs='+', help='sorteos por semana de cada flujo (por defecto los de DIMENSIONES o 1000)')
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--factor-llegadas', type=float, default=1)
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    parser.add_argument('--comparar', action='store_true', help='comparar Utilidad con Monte Carlo y pares antitéticos')
+    args = parser.parse_args()
+
+    sorteos = args.sorteos or [DIMENSIONES.get(nombre, 1000) for nombre in args.flujos]
+    dimensiones = dict(zip(args.flujos, sorteos))
+    escenario = {'factor_llegadas': args.factor_llegadas}
+    resumen, _ = ejecutar_rqmc(
+        escenario, args.horas, args.m, args.aleatorizaciones, dimensiones, args.semilla, motor=args.motor,
+    )
+    imprimir_intervalos(resumen)
+
+    if args.comparar:
+        total = 2 ** args.m * args.aleatorizaciones
+        # Monte Carlo: mismas réplicas sin Sobol, agrupadas igual
+        monte_carlo, _ = ejecutar_rqmc(
+            escenario, args.horas, args.m, args.aleatorizaciones, {}, args.semilla + 1, motor=args.motor,
+        )
+        print()
+        imprimir_comparacion({
+            'rqmc': resumen['Utilidad'],
+            'monte_carlo': monte_carlo['Utilidad'],
+            'antiteticas': ejecutar_pares(
+                escenario, args.horas, total // 2, list(dimensiones), args.semilla + 2, motor=args.motor,
+            ),
+        })
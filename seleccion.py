@@ -0,0 +1,357 @@
+"""
+Selección del mejor plan de dotación (ranking and selection) sobre Utilidad.
+
+Dos procedimientos sobre una lista de escenarios, ambos con números
+aleatorios comunes (la réplica r de cada escenario usa las mismas entradas)
+y con las réplicas pedidas a CacheResultados, que sólo simula las nuevas:
+
+  - seleccionar_kn: procedimiento totalmente secuencial de Kim y Nelson
+    (KN). Con n0 réplicas iniciales se estiman las varianzas S^2_il de las
+    diferencias; en cada r >= n0 se elimina i si para algún l
+
+        media_i(r) < media_l(r) - max(0, (delta / 2r) (h^2 S^2_il / delta^2 - r))
+
+    con h^2 = (n0 - 1) ((2 alfa / (k - 1))^(-2 / (n0 - 1)) - 1). Termina con
+    un sobreviviente y P(selección correcta) >= 1 - alfa si el mejor supera
+    al resto en al menos delta (zona de indiferencia).
+  - seleccionar_ocba: Optimal Computing Budget Allocation. Reparte un
+    presupuesto de réplicas en incrementos, N_i ∝ (s_i / (media_b - media_i))^2
+    y N_b = s_b sqrt(suma N_i^2 / s_i^2), hasta gastar el presupuesto o que
+    la PCS aproximada (cota de Bonferroni con normales) llegue a 1 - alfa.
+    No da una garantía frecuentista; sirve para presupuestos fijos.
+
+Restricción de pedidos tardíos (limite_tardios): E[Proporcion Pedidos
+Tardíos] <= limite. En KN se decide la factibilidad de cada escenario con
+el chequeo secuencial de Andradóttir y Kim (tolerancia epsilon, mitad del
+alfa): con Z(r) = suma de (tardíos_j - limite),
+
+    factible si Z(r) <= -R(r),  infactible si Z(r) >= R(r),
+    R(r) = max(0, h_f^2 S^2 / (2 epsilon) - epsilon r / 2)
+
+y sólo un escenario declarado factible puede eliminar a otro. En OCBA se
+descartan los escenarios cuyo intervalo de tardíos queda sobre el límite, y
+no se termina antes del presupuesto mientras el intervalo del mejor siga
+cruzando el límite. Si se termina así (o KN llega a n_maximo sin declarar
+factible al elegido), el resultado lo indica con factibilidad_verificada.
+
+Cada ronda (un incremento de KN a los sobrevivientes, una asignación de
+OCBA) pide sus réplicas en un solo CacheResultados.lote, así que el pool
+recibe juntas las de todos los escenarios.
+
+Con --lineas y --limite-perdidas, los escenarios cuya proporción de llamadas
+perdidas estimada con Erlang B (perdidas_erlang.py) supera el límite se
+descartan antes de simular. Con --filtrar-red, lo mismo con los que la
+aproximación de red de colas (red_colas.py) da claramente sobre
+--limite-tardios.
+
+Uso:
+    python seleccion.py --repartidores 5 6 7 --trabajadores 4 5 6 --delta 50000 --limite-tardios 0.1
+    python seleccion.py --lineas 2 3 4 --limite-perdidas 0.02 --procedimiento ocba
+"""
+
+import argparse
+import itertools
+import math
+
+import numpy as np
+from scipy import stats
+
+from cache_resultados import CacheResultados
+from perdidas_erlang import podar_lineas
+from red_colas import filtrar_factibles
+
+
+RESTRICCION = 'Proporcion Pedidos Tardíos'
+
+
+def _h2(alfa, n0, comparaciones):
+    # Constante de la región de continuación de KN (Kim y Nelson, 2001)
+    eta = 0.5 * ((2 * alfa / comparaciones) ** (-2 / (n0 - 1)) - 1)
+    return 2 * eta * (n0 - 1)
+
+
+class _Muestras:
+    # Réplicas acumuladas de cada escenario (métrica y restricción)
+
+    def __init__(self, escenarios, tiempo_horas, metrica, semilla, cache, motor, procesos):
+        self.escenarios = escenarios
+        self.tiempo_horas = tiempo_horas
+        self.metrica = metrica
+        self.semilla = semilla
+        self.cache = cache
+        self.motor = motor
+        self.procesos = procesos
+        self.valores = [[] for _ in escenarios]
+        self.tardios = [[] for _ in escenarios]
+
+    def completar(self, objetivos):
+        # objetivos: {escenario i: réplicas n}; todas las faltantes en un lote
+        pedidos = [(i, range(len(self.valores[i]), n)) for i, n in objetivos.items() if n > len(self.valores[i])]
+        if not pedidos:
+            return
+        grupos = self.cache.lote(
+            [(self.escenarios[i], replicas) for i, replicas in pedidos],
+            self.tiempo_horas, self.semilla, self.motor, self.procesos,
+        )
+        for (i, _), resultados in zip(pedidos, grupos):
+            for resultado in resultados:
+                self.valores[i].append(resultado['metricas'][self.metrica])
+                self.tardios[i].append(resultado['metricas'][RESTRICCION])
+
+    def total(self):
+        return sum(len(valores) for valores in self.valores)
+
+
+def _resultado(muestras, estados, mejor, pcs, garantia, alfa, verificada=True):
+    sistemas = []
+    for i, escenario in enumerate(muestras.escenarios):
+        valores = np.array(muestras.valores[i])
+        sistemas.append({
+            'escenario': escenario,
+            'replicas': len(valores),
+            'media': float(valores.mean()),
+            'desviacion': float(valores.std(ddof=1)) if len(valores) > 1 else math.nan,
+            'tardios': float(np.mean(muestras.tardios[i])),
+            'estado': estados[i],
+        })
+    return {
+        'mejor': mejor,
+        'escenario': None if mejor is None else muestras.escenarios[mejor],
+        'sistemas': sistemas,
+        'pcs': pcs,
+        'garantia': garantia,
+        'alfa': alfa,
+        'factibilidad_verificada': verificada,
+        'replicas_totales': muestras.total(),
+        'simuladas': muestras.cache.simuladas,
+    }
+
+
+def seleccionar_kn(
+    escenarios, tiempo_horas, delta, alfa=0.05, n0=10, lote=5, n_maximo=500,
+    limite_tardios=None, epsilon=0.01, metrica='Utilidad', semilla=0, cache=None,
+    motor='serial', procesos=None,
+):
+    """
+    Procedimiento KN (maximiza metrica). Retorna el mejor escenario, el
+    estado de cada uno ('seleccionado', 'eliminado', 'infactible') y las
+    réplicas usadas. lote es cuántas réplicas se agregan a la vez a cada
+    sobreviviente (para el pool); la regla se aplica igual réplica a
+    réplica. Con n_maximo alcanzado se elige la mayor media sin garantía.
+    """
+    if n0 < 2:
+        raise ValueError('KN necesita n0 >= 2')
+    k = len(escenarios)
+    cache = cache or CacheResultados()
+    muestras = _Muestras(escenarios, tiempo_horas, metrica, semilla, cache, motor, procesos)
+    con_restriccion = limite_tardios is not None
+    alfa_seleccion = alfa / 2 if con_restriccion else alfa
+    h2 = _h2(alfa_seleccion, n0, max(k - 1, 1))
+    h2_factible = _h2(alfa / 2, n0, 2 * k) if con_restriccion else None
+
+    estados = [None] * k
+    factible = [not con_restriccion] * k
+    activos = list(range(k))
+    muestras.completar({i: n0 for i in activos})
+
+    valores = [np.array(muestras.valores[i]) for i in range(k)]
+    s2 = np.zeros((k, k))
+    for i, l in itertools.combinations(range(k), 2):
+        s2[i, l] = s2[l, i] = np.var(valores[i][:n0] - valores[l][:n0], ddof=1)
+    s2_tardios = [np.var(muestras.tardios[i][:n0], ddof=1) for i in range(k)]
+
+    r = n0
+    while True:
+        valores = [np.array(muestras.valores[i]) for i in range(k)]
+        tardios = [np.array(muestras.tardios[i]) for i in range(k)]
+        disponibles = min(len(valores[i]) for i in activos)
+        while r <= disponibles and not _kn_terminado(activos, factible):
+            if con_restriccion:
+                for i in list(activos):
+                    if factible[i]:
+                        continue
+                    z = (tardios[i][:r] - limite_tardios).sum()
+                    radio = max(0.0, h2_factible * s2_tardios[i] / (2 * epsilon) - epsilon * r / 2)
+                    if z <= -radio:
+                        factible[i] = True
+                    elif z >= radio:
+                        estados[i] = 'infactible'
+                        activos.remove(i)
+            medias = {i: valores[i][:r].mean() for i in activos}
+            eliminados = [
+                i for i in activos
+                if any(
+                    l != i and factible[l]
+                    and medias[i] < medias[l] - max(0.0, delta / (2 * r) * (h2 * s2[i, l] / delta ** 2 - r))
+                    for l in activos
+                )
+            ]
+            for i in eliminados:
+                estados[i] = 'eliminado'
+                activos.remove(i)
+            r += 1
+        if _kn_terminado(activos, factible) or disponibles >= n_maximo:
+            break
+        muestras.completar({i: min(disponibles + lote, n_maximo) for i in activos})
+
+    garantia = _kn_terminado(activos, factible) and len(activos) == 1
+    candidatos = [i for i in activos if factible[i]] or activos
+    mejor = max(candidatos, key=lambda i: np.mean(muestras.valores[i])) if candidatos else None
+    for i in activos:
+        estados[i] = 'seleccionado' if i == mejor else 'sin decidir'
+    return _resultado(
+        muestras, estados, mejor, 1 - alfa if garantia else math.nan, garantia, alfa,
+        mejor is None or factible[mejor],
+    )
+
+
+def _kn_terminado(activos, factible):
+    return len(activos) == 0 or (len(activos) == 1 and factible[activos[0]])
+
+
+def _pcs_aproximada(medias, varianzas, replicas, mejor, candidatos):
+    # Cota de Bonferroni: 1 - suma P(media_i > media_mejor) con normales
+    pcs = 1.0
+    for i in candidatos:
+        if i != mejor:
+            escala = math.sqrt(varianzas[mejor] / replicas[mejor] + varianzas[i] / replicas[i])
+            pcs -= stats.norm.cdf(-(medias[mejor] - medias[i]) / escala) if escala > 0 else 0.0
+    return max(pcs, 0.0)
+
+
+def seleccionar_ocba(
+    escenarios, tiempo_horas, presupuesto, n0=10, incremento=20, alfa=0.05,
+    limite_tardios=None, metrica='Utilidad', semilla=0, cache=None,
+    motor='serial', procesos=None,
+):
+    """
+    OCBA (maximiza metrica) con presupuesto total de réplicas. Se detiene al
+    gastarlo o cuando la PCS aproximada llega a 1 - alfa y, con
+    limite_tardios, el intervalo de tardíos del mejor queda bajo el límite.
+    """
+    if n0 < 2:
+        raise ValueError('OCBA necesita n0 >= 2')
+    k = len(escenarios)
+    cache = cache or CacheResultados()
+    muestras = _Muestras(escenarios, tiempo_horas, metrica, semilla, cache, motor, procesos)
+    estados = [None] * k
+    muestras.completar({i: n0 for i in range(k)})
+    # Bonferroni sobre los k intervalos de tardíos
+    cuantil = stats.t.ppf(1 - alfa / (2 * k), n0 - 1)
+
+    while True:
+        replicas = np.array([len(v) for v in muestras.valores], dtype=float)
+        medias = np.array([np.mean(v) for v in muestras.valores])
+        varianzas = np.array([np.var(v, ddof=1) for v in muestras.valores])
+        candidatos = []
+        verificados = set()  # intervalo de tardíos entero bajo el límite
+        for i in range(k):
+            if limite_tardios is not None and estados[i] != 'infactible':
+                tardios = np.array(muestras.tardios[i])
+                semiancho = cuantil * tardios.std(ddof=1) / math.sqrt(len(tardios))
+                if tardios.mean() - semiancho > limite_tardios:
+                    estados[i] = 'infactible'
+                elif tardios.mean() + semiancho <= limite_tardios:
+                    verificados.add(i)
+            if estados[i] != 'infactible':
+                candidatos.append(i)
+        if not candidatos:
+            return _resultado(muestras, estados, None, math.nan, False, alfa)
+        mejor = max(candidatos, key=lambda i: medias[i])
+        verificada = limite_tardios is None or mejor in verificados
+        pcs = _pcs_aproximada(medias, varianzas, replicas, mejor, candidatos)
+        if muestras.total() >= presupuesto or verificada and (pcs >= 1 - alfa or len(candidatos) == 1):
+            break
+
+        # Asignación OCBA del total tras el incremento, entre los candidatos
+        proporciones = {}
+        for i in candidatos:
+            if i != mejor:
+                brecha = max(medias[mejor] - medias[i], 1e-9 * max(abs(medias[mejor]), 1.0))
+                proporciones[i] = varianzas[i] / brecha ** 2
+        proporciones[mejor] = math.sqrt(varianzas[mejor] * sum(
+            proporciones[i] ** 2 / varianzas[i] for i in proporciones if i != mejor and varianzas[i] > 0
+        ))
+        total = sum(replicas[i] for i in candidatos) + min(incremento, presupuesto - muestras.total())
+        suma = sum(proporciones.values())
+        deficit = {
+            i: total * proporciones[i] / suma - replicas[i] if suma > 0 else 1.0
+            for i in candidatos
+        }
+        disponibles = min(incremento, presupuesto - muestras.total())
+        positivos = {i: d for i, d in deficit.items() if d > 0} or {mejor: 1.0}
+        suma_deficit = sum(positivos.values())
+        asignadas = {i: int(disponibles * d / suma_deficit) for i, d in positivos.items()}
+        # Las réplicas que deja el redondeo van al mayor déficit
+        asignadas[max(positivos, key=positivos.get)] += disponibles - sum(asignadas.values())
+        muestras.completar({i: len(muestras.valores[i]) + extra for i, extra in asignadas.items()})
+
+    for i in candidatos:
+        estados[i] = 'seleccionado' if i == mejor else 'no seleccionado'
+    return _resultado(muestras, estados, mejor, pcs, False, alfa, verificada)
+
+
+def imprimir_seleccion(resultado):
+    print(f"{'Escenario':<58} {'Réplicas':>8} {'Media':>14} {'Tardíos':>8}  Estado")
+    for sistema in resultado['sistemas']:
+        print(
+            f"{str(sistema['escenario']):<58} {sistema['replicas']:>8} {sistema['media']:>14,.0f} "
+            f"{sistema['tardios']:>8.4f}  {sistema['estado']}"
+        )
+    garantia = 'garantizada' if resultado['garantia'] else 'aproximada'
+    print(
+        f"Mejor: {resultado['escenario']}  PCS {garantia}: {resultado['pcs']:.3f}  "
+        f"réplicas: {resultado['replicas_totales']} (simuladas {resultado['simuladas']})"
+    )
+    if not resultado['factibilidad_verificada']:
+        print('Atención: no se verificó que el mejor cumpla el límite de tardíos')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Selección del mejor plan de dotación')
+    parser.add_argument('--procedimiento', default='kn', choices=['kn', 'ocba'])
+    parser.add_argument('--repartidores', type=int, nargs='+', default=[5, 6, 7])
+    parser.add_argument('--trabajadores', type=int, nargs='+', default=[4, 5, 6])
+    parser.add_argument('--lineas', type=int, nargs='+', help='líneas telefónicas (por defecto las del modelo)')
+    parser.add_argument('--limite-perdidas', type=float,
+                        help='descarta sin simular los escenarios con Erlang B sobre esta proporción de llamadas perdidas')
+    parser.add_argument('--filtrar-red', action='store_true',
+                        help='descarta sin simular los escenarios que red_colas.py da claramente sobre --limite-tardios')
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--alfa', type=float, default=0.05)
+    parser.add_argument('--delta', type=float, default=50_000, help='zona de indiferencia de KN')
+    parser.add_argument('--n0', type=int, default=10)
+    parser.add_argument('--lote', type=int, default=5)
+    parser.add_argument('--presupuesto', type=int, default=300, help='réplicas totales de OCBA')
+    parser.add_argument('--limite-tardios', type=float, help='E[Proporcion Pedidos Tardíos] máxima')
+    parser.add_argument('--epsilon', type=float, default=0.01, help='tolerancia de la restricción en KN')
+    parser.add_argument('--cache', help='archivo JSON lines de resultados (se reutiliza entre corridas)')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    args = parser.parse_args()
+
+    escenarios = [
+        {'cantidad_repartidores': repartidores, 'cantidad_trabajadores': trabajadores}
+        for repartidores, trabajadores in itertools.product(args.repartidores, args.trabajadores)
+    ]
+    if args.lineas:
+        escenarios = [dict(escenario, cantidad_lineas=lineas) for escenario in escenarios for lineas in args.lineas]
+    if args.limite_perdidas is not None:
+        escenarios, descartados = podar_lineas(escenarios, args.limite_perdidas, args.horas)
+        print(f'Descartados por Erlang B: {len(descartados)} de {len(escenarios) + len(descartados)}')
+    if args.filtrar_red and args.limite_tardios is not None:
+        escenarios, descartados = filtrar_factibles(escenarios, args.limite_tardios, args.horas)
+        print(f'Descartados por la red de colas: {len(descartados)} de {len(escenarios) + len(descartados)}')
+    cache = CacheResultados(args.cache)
+    if args.procedimiento == 'kn':
+        resultado = seleccionar_kn(
+            escenarios, args.horas, args.delta, args.alfa, args.n0, args.lote,
+            limite_tardios=args.limite_tardios, epsilon=args.epsilon, semilla=args.semilla,
+            cache=cache, motor=args.motor,
+        )
+    else:
+        resultado = seleccionar_ocba(
+            escenarios, args.horas, args.presupuesto, args.n0, alfa=args.alfa,
+            limite_tardios=args.limite_tardios, semilla=args.semilla, cache=cache, motor=args.motor,
+        )
+    imprimir_seleccion(resultado)
@@ -0,0 +1,161 @@
+"""
+Análisis de sensibilidad global: índices de Sobol de primer orden y totales
+de las métricas respecto de parámetros del escenario.
+
+Diseño de Saltelli: A y B son N puntos de dimensión d (las dos mitades de un
+Sobol con scrambling de dimensión 2d) y AB_i es A con la columna i de B. Se
+evalúan los N (d + 2) puntos; f es el promedio de las mismas réplicas
+(números aleatorios comunes, vía CacheResultados) en cada punto. Con los
+estimadores de Saltelli et al. (2010) y Jansen:
+
+    V    = Var([f(A), f(B)])
+    S_i  = promedio(f(B) (f(AB_i) - f(A))) / V
+    ST_i = promedio((f(A) - f(AB_i))^2) / (2 V)
+
+Los intervalos son bootstrap sobre las N filas del diseño. El ruido de
+simulación (varianza del promedio de las réplicas) entra en V y en ST_i;
+con réplicas comunes se cancela en buena parte en f(A) - f(AB_i), y el
+resultado informa su tamaño ('varianza_ruido') para juzgarlo.
+
+Los parámetros son optimizacion.Decision: claves del escenario
+('factor_llegadas', capacidades, precios), 'umbral:<inventario>' y
+parámetros de las distribuciones de entrada ('mu:coccion',
+'escala:despacho_ida', ...). Los puntos se simulan en lotes (un pool por
+lote) y los repetidos salen del cache.
+
+Uso:
+    python sensibilidad.py --n 16 --replicas 2 --motor procesos
+"""
+
+import argparse
+
+import numpy as np
+from scipy.stats import qmc
+
+from cache_resultados import CacheResultados
+from optimizacion import Decision, construir_escenario
+
+
+PARAMETROS = [
+    Decision('factor_llegadas', 0.8, 1.2, entera=False),
+    Decision('mu:coccion', 2.4, 2.6, entera=False),
+    Decision('escala:despacho_ida', 0.8, 1.0, entera=False),
+    Decision('escala:despacho_vuelta', 0.8, 1.0, entera=False),
+    Decision('cantidad_trabajadores', 4, 6),
+    Decision('cantidad_repartidores', 5, 7),
+    Decision('precio_pizza_pepperoni', 8000, 10000),
+]
+
+
+def diseno_saltelli(d, n, semilla=0):
+    """(A, B, [AB_1, ..., AB_d]) con N = n filas en [0, 1)^d."""
+    m = int(np.ceil(np.log2(n)))
+    muestra = qmc.Sobol(2 * d, scramble=True, seed=semilla).random_base2(m)[:n]
+    a, b = muestra[:, :d], muestra[:, d:]
+    ab = []
+    for i in range(d):
+        mezcla = a.copy()
+        mezcla[:, i] = b[:, i]
+        ab.append(mezcla)
+    return a, b, ab
+
+
+def indices_sobol(fa, fb, fab):
+    """Primer orden y total de cada parámetro; fab es d x N."""
+    varianza = np.var(np.concatenate([fa, fb]), ddof=1)
+    if varianza == 0:
+        return np.zeros(len(fab)), np.zeros(len(fab))
+    primero = np.mean(fb * (fab - fa), axis=1) / varianza
+    total = 0.5 * np.mean((fa - fab) ** 2, axis=1) / varianza
+    return primero, total
+
+
+def analizar_sensibilidad(
+    parametros=PARAMETROS, tiempo_horas=168, n=16, replicas=2, metricas=('Utilidad',),
+    bootstrap=500, confianza=0.95, semilla=0, escenario_base=None, lote=64,
+    cache=None, motor='serial', procesos=None,
+):
+    """
+    Retorna {métrica: {parámetro: {'primer_orden', 'total', 'ic_primer_orden',
+    'ic_total'}}} más el costo ('evaluaciones', 'simuladas') y, por métrica,
+    la varianza de f y la del ruido de simulación.
+    """
+    cache = cache or CacheResultados()
+    d = len(parametros)
+    a, b, ab = diseno_saltelli(d, n, semilla)
+    filas = np.concatenate([a, b] + ab)
+    escenarios = [
+        construir_escenario(parametros, [p.valor(t) for p, t in zip(parametros, fila)], escenario_base)
+        for fila in filas
+    ]
+    resultados = []
+    for inicio in range(0, len(escenarios), lote):
+        resultados += cache.lote(
+            [(escenario, range(replicas)) for escenario in escenarios[inicio:inicio + lote]],
+            tiempo_horas, semilla, motor, procesos,
+        )
+
+    cola = (1 - confianza) / 2
+    rng = np.random.default_rng(semilla)
+    muestras = [rng.integers(0, n, n) for _ in range(bootstrap)]
+    analisis = {'evaluaciones': len(escenarios) * replicas, 'simuladas': cache.simuladas}
+    for metrica in metricas:
+        valores = np.array([[r['metricas'][metrica] for r in grupo] for grupo in resultados])
+        f = valores.mean(axis=1)
+        fa, fb, fab = f[:n], f[n:2 * n], f[2 * n:].reshape(d, n)
+        primero, total = indices_sobol(fa, fb, fab)
+        remuestreos = [indices_sobol(fa[i], fb[i], fab[:, i]) for i in muestras]
+        primeros = np.array([p for p, _ in remuestreos])
+        totales = np.array([t for _, t in remuestreos])
+        analisis[metrica] = {
+            parametro.nombre: {
+                'primer_orden': float(primero[j]),
+                'total': float(total[j]),
+                'ic_primer_orden': tuple(np.quantile(primeros[:, j], [cola, 1 - cola])),
+                'ic_total': tuple(np.quantile(totales[:, j], [cola, 1 - cola])),
+            }
+            for j, parametro in enumerate(parametros)
+        }
+        analisis[metrica]['varianza'] = float(np.var(np.concatenate([fa, fb]), ddof=1))
+        analisis[metrica]['varianza_ruido'] = (
+            float(valores.var(axis=1, ddof=1).mean() / replicas) if replicas > 1 else float('nan')
+        )
+    return analisis
+
+
+def imprimir_sensibilidad(analisis, metrica='Utilidad'):
+    datos = analisis[metrica]
+    parametros = sorted(
+        (nombre for nombre in datos if nombre not in ('varianza', 'varianza_ruido')),
+        key=lambda nombre: -datos[nombre]['total'],
+    )
+    print(f"{metrica}: Var(f) = {datos['varianza']:,.4g}, Var(ruido) = {datos['varianza_ruido']:,.4g}")
+    print(f"{'Parámetro':<28} {'S_i':>7} {'IC':>17} {'ST_i':>7} {'IC':>17}")
+    for nombre in parametros:
+        indice = datos[nombre]
+        print(
+            f"{nombre:<28} {indice['primer_orden']:>7.3f} [{indice['ic_primer_orden'][0]:>6.3f}, {indice['ic_primer_orden'][1]:>6.3f}] "
+            f"{indice['total']:>7.3f} [{indice['ic_total'][0]:>6.3f}, {indice['ic_total'][1]:>6.3f}]"
+        )
+    print(f"Evaluaciones: {analisis['evaluaciones']} réplicas (simuladas {analisis['simuladas']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Índices de Sobol sobre parámetros del escenario')
+    parser.add_argument('--n', type=int, default=16, help='filas de las matrices A y B')
+    parser.add_argument('--replicas', type=int, default=2, help='réplicas comunes por punto')
+    parser.add_argument('--horas', type=float, default=168)
+    parser.add_argument('--bootstrap', type=int, default=500)
+    parser.add_argument('--metricas', nargs='+', default=['Utilidad', 'Proporcion Pedidos Tardíos'])
+    parser.add_argument('--cache', help='archivo JSON lines de resultados')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--motor', default='serial', choices=['serial', 'procesos'])
+    args = parser.parse_args()
+
+    analisis = analizar_sensibilidad(
+        PARAMETROS, args.horas, args.n, args.replicas, args.metricas, args.bootstrap,
+        semilla=args.semilla, cache=CacheResultados(args.cache), motor=args.motor,
+    )
+    for metrica in args.metricas:
+        imprimir_sensibilidad(analisis, metrica)
+        print()
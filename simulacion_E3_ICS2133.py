@@ -2,6 +2,8 @@ import numpy as np
 import simpy as sp
 import math
 
+from progreso import ReporteProgreso
+
 logs = True
 tiempo_simulacion = 168 # horas
 numero_replicas = 1
@@ -969,39 +971,32 @@ class Pizzeria:
 
 def replicas_simulación(iteraciones, tiempo_horas):
     lista_resultados = []
+    progreso = ReporteProgreso(iteraciones)
     for i in range(iteraciones):
         # np.random.seed(i)
         env = sp.Environment()
         pizzeria = Pizzeria(env)
         pizzeria.iniciar_simulacion(tiempo_horas, i, logs=False)
         lista_resultados.append(pizzeria.obtener_metricas())
-
-        print(f'Replica {i+1} completada.')
-        # print()
+        progreso.registrar(lista_resultados[-1])
         # print(lista_resultados[i])
-
-        print("")
-        print("--------------------------------")
-        print("")
+    progreso.terminar()
 
     return lista_resultados
             
 
 if __name__ == "__main__":
+    progreso = ReporteProgreso(numero_replicas)
     for i in range(numero_replicas):
         env = sp.Environment()
         pizzeria = Pizzeria(env)
         pizzeria.iniciar_simulacion(tiempo_simulacion, i, logs=logs)
 
-        print(f'Replica {i+1} completada.')
-        print()
         print(pizzeria.obtener_metricas())
         if logs:
             pizzeria.generar_reporte_logs(f'reporte_logs_replica_{i+1}.txt')
-
-        print("")
-        print("--------------------------------")
-        print("")
+        progreso.registrar(pizzeria.obtener_metricas())
+    progreso.terminar()
 
 
 
@@ -1,7 +1,12 @@
 import numpy as np
 import simpy as sp
 import math
-from scipy.stats import norm, gamma as gamma_dist, triang, nbinom
+import bisect
+
+from recursos_prioridad import RecursoPrioridad
+from instrumentacion import Instrumentacion
+from progreso import ReporteProgreso
+from variables_aleatorias import INVERSAS, VariablesAleatorias, normalizar_flujos
 
 logs = True
 tiempo_simulacion = 168  # horas
@@ -10,28 +15,32 @@ numero_replicas = 1
 
 class Pizzeria:
 
+    # Clase usada para todos los recursos con prioridad (sp.PriorityResource
+    # produce los mismos resultados, con colas más lentas)
+    clase_recurso = RecursoPrioridad
+
     def __init__(self, env):
         self.env = env
 
         # Recursos
         self.cantidad_lineas = 3
-        self.lineas_telefonicas = sp.PriorityResource(env, capacity=self.cantidad_lineas)
+        self.lineas_telefonicas = self.clase_recurso(env, capacity=self.cantidad_lineas)
 
         self.capacidad_estacion_preparacion = 3
-        self.estacion_preparacion = sp.PriorityResource(env, capacity=self.capacidad_estacion_preparacion)
+        self.estacion_preparacion = self.clase_recurso(env, capacity=self.capacidad_estacion_preparacion)
 
         self.capacidad_horno = 10
-        self.horno = sp.PriorityResource(env, capacity=self.capacidad_horno)
+        self.horno = self.clase_recurso(env, capacity=self.capacidad_horno)
 
         self.capacidad_estacion_embalaje = 3
-        self.estacion_embalaje = sp.PriorityResource(env, capacity=self.capacidad_estacion_embalaje)
+        self.estacion_embalaje = self.clase_recurso(env, capacity=self.capacidad_estacion_embalaje)
 
         # Empleados
         self.cantidad_trabajadores = 5
-        self.trabajadores = sp.PriorityResource(env, capacity=self.cantidad_trabajadores)
+        self.trabajadores = self.clase_recurso(env, capacity=self.cantidad_trabajadores)
 
         self.cantidad_repartidores = 6
-        self.repartidores = sp.PriorityResource(env, capacity=self.cantidad_repartidores)
+        self.repartidores = self.clase_recurso(env, capacity=self.cantidad_repartidores)
 
         # Inventarios
         self.salsa_de_tomate = sp.Container(env, init=15000, capacity=15000)  # continuo: ml
@@ -80,17 +89,13 @@ class Pizzeria:
         self.costo_hora_trabajador = 4000
         self.costo_hora_repartidor = 3000
 
-        # Costos fijos semanales (por capacidad instalada)
-        self.costo_fijo_lineas_telefonicas = 50000 * 3  # semanal
-        self.costo_fijo_espacio_preparacion = 60000 * 3  # semanal
-        self.costo_fijo_horno = 40000 * 10  # semanal
-        self.costo_fijo_embalaje = 30000 * 3  # semanal
-        self.costos_fijos_semanales = (
-            self.costo_fijo_lineas_telefonicas
-            + self.costo_fijo_espacio_preparacion
-            + self.costo_fijo_horno
-            + self.costo_fijo_embalaje
-        )
+        # Costos fijos semanales por unidad de capacidad instalada (los totales
+        # se recalculan con las capacidades vigentes, ver calcular_costos_fijos)
+        self.costo_fijo_linea = 50000  # semanal, por línea
+        self.costo_fijo_puesto_preparacion = 60000  # semanal, por puesto
+        self.costo_fijo_espacio_horno = 40000  # semanal, por pizza de capacidad
+        self.costo_fijo_puesto_embalaje = 30000  # semanal, por puesto
+        self.calcular_costos_fijos()
 
         # Es actualmente fin de semana?
         self.finde = False
@@ -150,6 +155,9 @@ class Pizzeria:
 
         self.compensacion = 0
 
+        # Pizzas que encontraron el inventario sin stock suficiente, por ingrediente
+        self.quiebres_stock = dict.fromkeys(self.nombres_inventarios.values(), 0)
+
         self.horas_extras = 0
         self.ultima_hora_fin_por_dia = {}  # día -> hora fin último pedido
 
@@ -174,7 +182,80 @@ class Pizzeria:
 
         self.utilidad = self.ingresos - self.costos
 
-    def iniciar_simulacion(
+        # Registro opcional de consumos (instante, inventario, cantidad); None = desactivado
+        self.registro_consumo = None
+        # Parámetros de distribuciones de entrada ({flujo: {parámetro: valor}},
+        # ver variables_aleatorias.PARAMETRICAS); sólo se aplican con variables=
+        self.parametros_entradas = {}
+        # Instrumentación opcional de la réplica (ver iniciar_simulacion)
+        self.instrumentacion = None
+        # sp.Resource de despachos del proveedor, si se comparte (cadena.py);
+        # None: cada reposición se despacha sin esperar
+        self.proveedor = None
+
+    # Atributo de capacidad -> atributo del recurso (ver configurar_recursos)
+    recursos_configurables = {
+        'cantidad_lineas': 'lineas_telefonicas',
+        'capacidad_estacion_preparacion': 'estacion_preparacion',
+        'capacidad_horno': 'horno',
+        'capacidad_estacion_embalaje': 'estacion_embalaje',
+        'cantidad_trabajadores': 'trabajadores',
+        'cantidad_repartidores': 'repartidores',
+    }
+
+    def configurar_recursos(self, **capacidades):
+        """
+        Cambia la capacidad de recursos, identificados por su atributo de
+        capacidad (p. ej. cantidad_repartidores=7): se actualiza el atributo
+        (que también usan los costos: salarios o costos fijos semanales) y se
+        crea el recurso con la nueva capacidad. Debe llamarse antes de
+        iniciar_simulacion.
+        """
+        for atributo, capacidad in capacidades.items():
+            if atributo not in self.recursos_configurables:
+                raise ValueError(f'Recurso desconocido: {atributo}')
+            setattr(self, atributo, capacidad)
+            setattr(self, self.recursos_configurables[atributo], self.clase_recurso(self.env, capacity=capacidad))
+        self.calcular_costos_fijos()
+
+    def calcular_costos_fijos(self):
+        """Costos fijos semanales con las capacidades y costos unitarios actuales."""
+        self.costo_fijo_lineas_telefonicas = self.costo_fijo_linea * self.cantidad_lineas
+        self.costo_fijo_espacio_preparacion = self.costo_fijo_puesto_preparacion * self.capacidad_estacion_preparacion
+        self.costo_fijo_horno = self.costo_fijo_espacio_horno * self.capacidad_horno
+        self.costo_fijo_embalaje = self.costo_fijo_puesto_embalaje * self.capacidad_estacion_embalaje
+        self.costos_fijos_semanales = (
+            self.costo_fijo_lineas_telefonicas
+            + self.costo_fijo_espacio_preparacion
+            + self.costo_fijo_horno
+            + self.costo_fijo_embalaje
+        )
+
+    def configurar_inventario(self, nombre, umbral=None, capacidad=None):
+        """
+        Cambia el umbral de reposición y/o la capacidad (que también es el nivel
+        inicial) de un inventario, identificado por su atributo:
+        'salsa_de_tomate', 'queso_mozzarella', 'pepperoni' o 'mix_carnes'.
+        Debe llamarse antes de iniciar_simulacion.
+        """
+        anterior = getattr(self, nombre)
+        if umbral is None:
+            umbral = self.umbral_reposicion[anterior]
+        if capacidad is None:
+            capacidad = anterior.capacity
+
+        nuevo = sp.Container(self.env, init=capacidad, capacity=capacidad)
+        setattr(self, nombre, nuevo)
+        self.inventarios[self.inventarios.index(anterior)] = nuevo
+        self.nombres_inventarios[nuevo] = self.nombres_inventarios.pop(anterior)
+        self.en_reposicion[nuevo] = self.en_reposicion.pop(anterior)
+        self.umbral_reposicion.pop(anterior)
+        self.umbral_reposicion[nuevo] = umbral
+        if anterior in self.inventarios_discretos:
+            self.inventarios_discretos.discard(anterior)
+            self.inventarios_discretos.add(nuevo)
+
+    def preparar_simulacion(
         self,
         tiempo_horas,
         seed,
@@ -196,6 +277,9 @@ class Pizzeria:
         uniformes_cantidad_carnes=None,
         uniformes_tiempo_embalaje=None,
         uniformes_interarrival=None,  # 🔹 NUEVO: interarrivals
+        instrumentar=False,
+        perfilador=None,
+        variables=None,
     ):
         self.tiempo_limite = tiempo_horas + 10  # simulación empieza a las 10 AM
         self.logs = logs
@@ -267,9 +351,59 @@ class Pizzeria:
         self.idx_tiempo_embalaje = 0
         self.idx_interarrival = 0  # 🔹 índice nuevo
 
+        # Listas entregadas por flujo y capa de transformada inversa (ver _sortear)
+        self.uniformes_flujos = {
+            nombre: lista
+            for nombre, lista in [
+                ('coccion', self.uniformes_coccion),
+                ('despacho_ida', self.uniformes_despacho_ida),
+                ('despacho_vuelta', self.uniformes_despacho_vuelta),
+                ('llamada', self.uniformes_llamada),
+                ('cantidad_queso', self.uniformes_cantidad_queso),
+                ('tiempo_queso', self.uniformes_tiempo_queso),
+                ('premium', self.uniformes_premium),
+                ('num_pizzas', self.uniformes_num_pizzas),
+                ('tipo_pizza', self.uniformes_tipo_pizza),
+                ('tiempo_salsa', self.uniformes_tiempo_salsa),
+                ('cantidad_salsa', self.uniformes_cantidad_salsa),
+                ('tiempo_pepperoni', self.uniformes_tiempo_pepperoni),
+                ('cantidad_pepperoni', self.uniformes_cantidad_pepperoni),
+                ('tiempo_carnes', self.uniformes_tiempo_carnes),
+                ('cantidad_carnes', self.uniformes_cantidad_carnes),
+                ('tiempo_embalaje', self.uniformes_tiempo_embalaje),
+            ]
+            if len(lista)
+        }
+        # variables: VariablesAleatorias (todas las entradas por transformada
+        # inversa, con flujos antitéticos a elección) o None para usar self.rng
+        self.variables = variables
+        if variables is not None:
+            variables.vincular(self)
+        elif self.parametros_entradas:
+            raise ValueError('parametros_entradas requiere variables= (entradas por transformada inversa)')
+
+        # Suma y cantidad de los sorteos de cada stream (ver obtener_controles)
+        self.sumas_controles = {}
+        self.conteos_controles = {}
+
         if self.logs:
             self.log(f'Iniciando simulación por {tiempo_horas} horas con semilla {seed}')
 
+        if instrumentar:
+            self.instrumentacion = Instrumentacion()
+            self.instrumentacion.instalar(self, {
+                'lineas_telefonicas': self.lineas_telefonicas,
+                'estacion_preparacion': self.estacion_preparacion,
+                'horno': self.horno,
+                'estacion_embalaje': self.estacion_embalaje,
+                'trabajadores': self.trabajadores,
+                'repartidores': self.repartidores,
+            })
+        if perfilador is not None:
+            # Gancho de perfilado: cualquier objeto con instalar(pizzeria),
+            # p. ej. perfilador.PerfilProcesos
+            perfilador.instalar(self)
+
         self.ultima_atencion = None
         self.evento_termino_simulacion = self.env.event()
         self.pedidos_activos = []
@@ -277,13 +411,49 @@ class Pizzeria:
         self.evento_inventario_repuesto = {
             inventario: self.env.event() for inventario in self.inventarios
         }
+        # Se dispara cuando un inventario queda bajo su umbral y requiere revisión
+        self.evento_nivel_bajo = {
+            inventario: self.env.event() for inventario in self.inventarios
+        }
+
+        # Políticas de revisión periódica. El orden de la lista es el orden en que
+        # los temporizadores originales procesaban los instantes coincidentes.
+        self.politicas_revision = [
+            (
+                [self.queso_mozzarella, self.pepperoni, self.mix_carnes],
+                self.revisar_inventarios,
+                'Revisión periódica de inventarios.',
+            ),
+            (
+                [self.salsa_de_tomate],
+                self.revisar_inventario_salsa,
+                'Revisión periódica de inventario de salsa de tomate.',
+            ),
+        ]
+        # Calendario de revisión precalculado: (instante, índice de política)
+        self.calendario_revision = self.construir_calendario_revision(
+            [
+                self.obtener_tiempo_proxima_revision_inventarios,
+                self.obtener_tiempo_proxima_revision_salsa,
+            ]
+        )
 
         self.env.process(self.llegada_llamadas())
-        self.env.process(self.temporizador_revision_salsa())
-        self.env.process(self.temporizador_revision_inventarios())
+        self.env.process(self.vigilar_revisiones())
 
+    def iniciar_simulacion(self, tiempo_horas, seed, **opciones):
+        """
+        Prepara la réplica (preparar_simulacion, mismos parámetros) y corre el
+        entorno hasta evento_termino_simulacion. Para simular varias pizzerías
+        en un mismo entorno se llama preparar_simulacion en cada una (ver
+        cadena.py).
+        """
+        self.preparar_simulacion(tiempo_horas, seed, **opciones)
         try:
-            self.env.run(until=self.evento_termino_simulacion)
+            if self.instrumentacion is not None:
+                self.instrumentacion.medir(self.env.run, until=self.evento_termino_simulacion)
+            else:
+                self.env.run(until=self.evento_termino_simulacion)
         except RuntimeError:
             if self.logs:
                 self.log('Simulación terminó sin eventos pendientes.')
@@ -299,6 +469,7 @@ class Pizzeria:
         """
         Genera un tiempo ~ Exponencial(λ = tasa) usando:
         - uniformes_interarrival (si disponible)
+        - el flujo 'interarrival' de self.variables (si se entregó)
         - rng.exponential(1/tasa) como fallback
         """
         if self.idx_interarrival < len(self.uniformes_interarrival):
@@ -308,9 +479,27 @@ class Pizzeria:
             if u >= 1.0:
                 u = np.nextafter(1.0, 0.0)
             return -math.log(1 - u) / tasa
+        elif self.variables is not None:
+            self.idx_interarrival += 1
+            return self.variables.sortear('interarrival') / tasa
         else:
             return self.rng.exponential(1 / tasa)
 
+    def _sortear(self, nombre, *condicion):
+        """
+        Valor F^-1(U) del flujo nombre (ver variables_aleatorias.py): de la
+        lista uniformes_<nombre> mientras alcance y después de self.variables.
+        Retorna None si no hay ninguna de las dos (sortea self.rng).
+        """
+        lista = self.uniformes_flujos.get(nombre)
+        if lista is not None:
+            indice = getattr(self, 'idx_' + nombre)
+            if indice < len(lista):
+                return INVERSAS[nombre](lista[indice], *condicion)
+        if self.variables is not None:
+            return self.variables.sortear(nombre, *condicion)
+        return None
+
     def obtener_metricas(self):
         # Calculamos métricas
 
@@ -330,6 +519,7 @@ class Pizzeria:
         horas_jornada_total = horas_normales + horas_finde
 
         # Semanas completas (redondeo hacia arriba)
+        self.calcular_costos_fijos()
         semanas = int(math.ceil(tiempo_simulacion_horas / 168.0)) if tiempo_simulacion_horas > 0 else 0
 
         costo_trabajadores = (
@@ -353,7 +543,7 @@ class Pizzeria:
         )
 
         self.proporcion_llamadas_perdidas = (
-            self.llamadas_perdidas / self.llamadas_totales if self.llamadas_totales > 0 else 0
+            self.llamadas_perdidas / self.llamadas_totales if self.llamadas_totales > 0 else 0.0
         )
 
         if self.pedidos_normales_totales > 0:
@@ -361,14 +551,14 @@ class Pizzeria:
                 self.pedidos_tardios_normales_finde + self.pedidos_tardios_normales_semana
             ) / self.pedidos_normales_totales
         else:
-            self.proporcion_pedidos_tardios_normales = 0
+            self.proporcion_pedidos_tardios_normales = 0.0
 
         if self.pedidos_premium_totales > 0:
             self.proporcion_pedidos_tardios_premium = (
                 self.pedidos_tardios_premium_finde + self.pedidos_tardios_premium_semana
             ) / self.pedidos_premium_totales
         else:
-            self.proporcion_pedidos_tardios_premium = 0
+            self.proporcion_pedidos_tardios_premium = 0.0
 
         total_pedidos = self.pedidos_normales_totales + self.pedidos_premium_totales
         if total_pedidos > 0:
@@ -379,7 +569,7 @@ class Pizzeria:
                 + self.pedidos_tardios_premium_semana
             ) / total_pedidos
         else:
-            self.proporcion_pedidos_tardios = 0
+            self.proporcion_pedidos_tardios = 0.0
 
         # Helper para aplanar tiempos
         def procesar_tiempos(lista):
@@ -395,7 +585,7 @@ class Pizzeria:
             self.tiempos_procesamiento_normales_semana + self.tiempos_procesamiento_normales_finde
         )
         self.tiempo_promedio_procesamiento_normales = (
-            np.mean(tiempos_normales_flat) * 60 if tiempos_normales_flat else 0
+            np.mean(tiempos_normales_flat) * 60 if tiempos_normales_flat else 0.0
         )
 
         tiempos_premium_flat = procesar_tiempos(
@@ -403,7 +593,7 @@ class Pizzeria:
             + self.tiempos_procesamiento_premium_semana
         )
         self.tiempo_promedio_procesamiento_premium = (
-            np.mean(tiempos_premium_flat) * 60 if tiempos_premium_flat else 0
+            np.mean(tiempos_premium_flat) * 60 if tiempos_premium_flat else 0.0
         )
 
         tiempos_todos_flat = procesar_tiempos(
@@ -413,7 +603,7 @@ class Pizzeria:
             + self.tiempos_procesamiento_normales_finde
         )
         self.tiempo_promedio_procesamiento = (
-            np.mean(tiempos_todos_flat) * 60 if tiempos_todos_flat else 0
+            np.mean(tiempos_todos_flat) * 60 if tiempos_todos_flat else 0.0
         )
 
         self.utilidad = self.ingresos - self.costos
@@ -429,6 +619,35 @@ class Pizzeria:
             'Utilidad': self.utilidad,
         }
 
+    def observar_control(self, nombre, valor):
+        valor = float(valor)
+        self.sumas_controles[nombre] = self.sumas_controles.get(nombre, 0.0) + valor
+        self.conteos_controles[nombre] = self.conteos_controles.get(nombre, 0) + 1
+
+    def obtener_controles(self):
+        # Observaciones de las variables de control de la réplica. Sus medias
+        # teóricas están en medias_controles.py (mismos nombres).
+        pedidos = self.pedidos_premium_totales + self.pedidos_normales_totales
+        controles = {
+            'Llamadas Totales': self.llamadas_totales,
+            'Total Pizzas': self.pizzas_queso + self.pizzas_pepperoni + self.pizzas_carnes,
+        }
+        if pedidos > 0:
+            controles['Proporcion Premium'] = self.pedidos_premium_totales / pedidos
+            controles['Pizzas por Pedido'] = controles['Total Pizzas'] / pedidos
+            controles['Pizzas Queso por Pedido'] = self.pizzas_queso / pedidos
+            controles['Pizzas Pepperoni por Pedido'] = self.pizzas_pepperoni / pedidos
+            controles['Pizzas Carnes por Pedido'] = self.pizzas_carnes / pedidos
+        for nombre, suma in self.sumas_controles.items():
+            controles[nombre] = suma / self.conteos_controles[nombre]
+        return controles
+
+    def obtener_instrumentacion(self):
+        # Reporte de la instrumentación (None si la réplica no se instrumentó)
+        if self.instrumentacion is None:
+            return None
+        return self.instrumentacion.reporte()
+
     def log(self, mensaje):
         time = self.timestamp()
         print(f'{time}: {mensaje}')
@@ -563,11 +782,9 @@ class Pizzeria:
             
         
     def atender_llamada(self, cliente):
-        # Vemos si este cliente es premium o no (usar variable antitética)
-        if self.idx_premium < len(self.uniformes_premium):
-            u = self.uniformes_premium[self.idx_premium]
-            premium = u < 3/20  # Bernoulli con p=3/20
-        else:
+        # Vemos si este cliente es premium o no: Bernoulli con p=3/20
+        premium = self._sortear('premium')
+        if premium is None:
             premium = self.rng.choice(a=[True, False], p=[3/20, 17/20])
         
         self.idx_premium += 1
@@ -583,17 +800,16 @@ class Pizzeria:
             if self.logs:
                 self.log(f'Cliente {cliente} es común')
 
-        # Generamos el tiempo que toma la atención por teléfono.
-        # Usar variable antitética si está disponible
-        if self.idx_llamada < len(self.uniformes_llamada):
-            u = self.uniformes_llamada[self.idx_llamada]
-            # Transformación inversa para gamma
-            beta = gamma_dist.ppf(u, a=4, scale=0.5) / 60
+        # Generamos el tiempo que toma la atención por teléfono (Gamma)
+        beta = self._sortear('llamada')
+        if beta is not None:
+            beta = beta / 60
         else:
-            beta = self.rng.gamma(shape=4, scale=0.5, size=1)/60
+            beta = self.rng.gamma(shape=4, scale=0.5)/60
         
         # SIEMPRE incrementar el contador
         self.idx_llamada += 1
+        self.observar_control('Tiempo Promedio Llamada', beta * 60)
         
         with self.lineas_telefonicas.request() as linea:
             yield self.env.timeout(beta) # Esperamos
@@ -604,30 +820,10 @@ class Pizzeria:
         inicio_tiempo_orden = self.env.now
         
         
-        # Vemos la cantidad de pizzas a preparar (usar variable antitética)
-        if self.idx_num_pizzas < len(self.uniformes_num_pizzas):
-            u = self.uniformes_num_pizzas[self.idx_num_pizzas]
-            if premium:
-                # Transformación inversa para [1,2,3,4] con p=[0.3,0.4,0.2,0.1]
-                if u < 0.3:
-                    cantidad_pizzas_a_preparar = 1
-                elif u < 0.7:
-                    cantidad_pizzas_a_preparar = 2
-                elif u < 0.9:
-                    cantidad_pizzas_a_preparar = 3
-                else:
-                    cantidad_pizzas_a_preparar = 4
-            else:
-                # Transformación inversa para [1,2,3,4] con p=[0.6,0.2,0.15,0.05]
-                if u < 0.6:
-                    cantidad_pizzas_a_preparar = 1
-                elif u < 0.8:
-                    cantidad_pizzas_a_preparar = 2
-                elif u < 0.95:
-                    cantidad_pizzas_a_preparar = 3
-                else:
-                    cantidad_pizzas_a_preparar = 4
-        else:
+        # Vemos la cantidad de pizzas a preparar: [1,2,3,4] con
+        # p=[0.3,0.4,0.2,0.1] (premium) o p=[0.6,0.2,0.15,0.05] (normal)
+        cantidad_pizzas_a_preparar = self._sortear('num_pizzas', premium)
+        if cantidad_pizzas_a_preparar is None:
             if premium:
                 cantidad_pizzas_a_preparar = self.rng.choice(a=[1,2,3,4], p=[0.3,0.4,0.2,0.1])
             else:
@@ -643,26 +839,9 @@ class Pizzeria:
         # 3. Todas carnes
         tipos_pizzas = []
         for i in range(cantidad_pizzas_a_preparar):
-            # Usar variable antitética para tipo de pizza
-            if self.idx_tipo_pizza < len(self.uniformes_tipo_pizza):
-                u = self.uniformes_tipo_pizza[self.idx_tipo_pizza]
-                if premium:
-                    # Transformación inversa para [1,2,3] con p=[0.3,0.6,0.1]
-                    if u < 0.3:
-                        tipo_pizza = 1
-                    elif u < 0.9:
-                        tipo_pizza = 2
-                    else:
-                        tipo_pizza = 3
-                else:
-                    # Transformación inversa para [1,2,3] con p=[0.1,0.4,0.5]
-                    if u < 0.1:
-                        tipo_pizza = 1
-                    elif u < 0.5:
-                        tipo_pizza = 2
-                    else:
-                        tipo_pizza = 3
-            else:
+            # Tipo [1,2,3] con p=[0.3,0.6,0.1] (premium) o p=[0.1,0.4,0.5] (normal)
+            tipo_pizza = self._sortear('tipo_pizza', premium)
+            if tipo_pizza is None:
                 if premium:
                     tipo_pizza = self.rng.choice(a=[1,2,3], p=[0.3,0.6,0.1])
                 else:
@@ -681,19 +860,19 @@ class Pizzeria:
             lista_de_procesos_pizzas.append(self.env.process(self.preparar_pizza(cliente, premium, i+1, prioridad, tipos_pizzas[i])))
             
             if tipos_pizzas[i]==1:
-                valor_orden += 7_000
+                valor_orden += self.precio_pizza_queso
             elif tipos_pizzas[i]==2:
-                valor_orden += 9_000
+                valor_orden += self.precio_pizza_pepperoni
             else:
-                valor_orden += 12_000
+                valor_orden += self.precio_pizza_mix_carnes
             
         # Esperamos a que todas las pizzas estén listas (preparadas, cocinadas y embaladas) para proceder al despacho.
         yield sp.AllOf(self.env, lista_de_procesos_pizzas)
         if self.logs:
             self.log(f'Todas las pizzas del cliente {cliente} están listas. Se procede al despacho')
-        
-        
-        yield self.env.process(self.despacho(cliente, premium, prioridad, inicio_tiempo_orden, valor_orden))
+
+        # El despacho corre dentro del mismo proceso del pedido (sin crear otro Process)
+        yield from self.despacho(cliente, premium, prioridad, inicio_tiempo_orden, valor_orden)
         
         # Nota: el cálculo de horas extras se hace una sola vez por día en obtener_metricas.
         
@@ -721,17 +900,16 @@ class Pizzeria:
                 if self.logs:
                     self.log(f'Se comienza a preparar la pizza {num_pizza} del cliente {cliente}')
 
-                # Vemos cuanta salsa se añadirá (continua - usar variable antitética)
-                if self.idx_cantidad_salsa < len(self.uniformes_cantidad_salsa):
-                    u = self.uniformes_cantidad_salsa[self.idx_cantidad_salsa]
-                    from scipy.stats import expon
-                    xi_1 = expon.ppf(u, scale=250)
-                else:
+                # Vemos cuanta salsa se añadirá (continua)
+                xi_1 = self._sortear('cantidad_salsa')
+                if xi_1 is None:
                     xi_1 = self.rng.exponential(scale = 250)
                 
                 self.idx_cantidad_salsa += 1
+                self.observar_control('Cantidad Promedio Salsa', xi_1)
                 
                 if xi_1 > self.obtener_nivel_inventario(self.salsa_de_tomate):
+                    self.quiebres_stock[self.nombres_inventarios[self.salsa_de_tomate]] += 1
                     if not self.en_reposicion[self.salsa_de_tomate]:
                         if self.logs:
                             self.log(f'No hay suficiente salsa de tomate para la pizza {num_pizza} del cliente {cliente}. Iniciando reposición.')
@@ -740,33 +918,34 @@ class Pizzeria:
                         if self.logs:
                             self.log(f'Esperando reposición de salsa de tomate para la pizza {num_pizza} del cliente {cliente}.')
                         yield self.evento_inventario_repuesto[self.salsa_de_tomate]
-                # Agregamos Salsa (usar variable antitética para tiempo)
-                if self.idx_tiempo_salsa < len(self.uniformes_tiempo_salsa):
-                    u = self.uniformes_tiempo_salsa[self.idx_tiempo_salsa]
-                    from scipy.stats import beta as beta_dist
-                    gamma_1 = beta_dist.ppf(u, a=5, b=2.2) / 60
+                # Agregamos Salsa
+                gamma_1 = self._sortear('tiempo_salsa')
+                if gamma_1 is not None:
+                    gamma_1 = gamma_1 / 60
                 else:
                     gamma_1 = self.rng.beta(a = 5, b = 2.2)/60
                 
                 self.idx_tiempo_salsa += 1
+                self.observar_control('Tiempo Promedio Salsa', gamma_1 * 60)
                 
                 yield self.env.timeout(gamma_1) # Esperamos a que se ponga la salsa
                 # Descontamos la salsa (continuo)
                 yield self.salsa_de_tomate.get(xi_1)
+                self.registrar_consumo(self.salsa_de_tomate, xi_1)
                 
                 # Vemos cuanto queso se añadirá (discreto)
-                # Usar variable antitética si está disponible
-                if self.idx_cantidad_queso < len(self.uniformes_cantidad_queso):
-                    u = self.uniformes_cantidad_queso[self.idx_cantidad_queso]
-                    # Transformación inversa para negative binomial
-                    xi_2 = int(nbinom.ppf(u, n=25, p=0.52))
+                xi_2 = self._sortear('cantidad_queso')
+                if xi_2 is not None:
+                    xi_2 = int(xi_2)
                 else:
                     xi_2 = self.rng.negative_binomial(n = 25, p = 0.52)
                 
                 # SIEMPRE incrementar el contador
                 self.idx_cantidad_queso += 1
+                self.observar_control('Cantidad Promedio Queso', xi_2)
                 
                 if xi_2 > self.obtener_nivel_inventario(self.queso_mozzarella):
+                    self.quiebres_stock[self.nombres_inventarios[self.queso_mozzarella]] += 1
                     if not self.en_reposicion[self.queso_mozzarella]:
                         if self.logs:
                             self.log(f'No hay suficiente queso mozzarella para la pizza {num_pizza} del cliente {cliente}. Iniciando reposición.')  
@@ -777,38 +956,36 @@ class Pizzeria:
                         yield self.evento_inventario_repuesto[self.queso_mozzarella]
                         if self.logs:
                             self.log(f'Reposición de queso mozzarella completada, ahora se puede preparar la pizza {num_pizza} del cliente {cliente}.')
-                # Agregamos queso
-                # Usar variable antitética si está disponible
-                if self.idx_tiempo_queso < len(self.uniformes_tiempo_queso):
-                    u = self.uniformes_tiempo_queso[self.idx_tiempo_queso]
-                    # Transformación inversa para triangular
-                    # Parámetros: left=0.9, mode=1, right=1.2
-                    # Normalizar para scipy: c = (mode - left) / (right - left)
-                    c = (1 - 0.9) / (1.2 - 0.9)  # = 0.1 / 0.3 = 0.333...
-                    gamma_2 = triang.ppf(u, c=c, loc=0.9, scale=0.3) / 60
+                # Agregamos queso: triangular(0.9, 1, 1.2)
+                gamma_2 = self._sortear('tiempo_queso')
+                if gamma_2 is not None:
+                    gamma_2 = gamma_2 / 60
                 else:
                     gamma_2 = self.rng.triangular(left = 0.9, mode = 1, right = 1.2)/60
                 
                 # SIEMPRE incrementar el contador
                 self.idx_tiempo_queso += 1
+                self.observar_control('Tiempo Promedio Queso', gamma_2 * 60)
                 
                 yield self.env.timeout(gamma_2) # Esperamos a que se ponga el queso
                 # Descontamos queso
                 yield self.queso_mozzarella.get(xi_2)
+                self.registrar_consumo(self.queso_mozzarella, xi_2)
                 
                 # Agregamos Pepperoni si pizza es de pepperoni o mix de carnes
                 if tipo_pizza==2 or tipo_pizza==3:
-                    # Vemos cuanto pepperoni se añadirá (discreto - usar variable antitética)
-                    if self.idx_cantidad_pepperoni < len(self.uniformes_cantidad_pepperoni):
-                        u = self.uniformes_cantidad_pepperoni[self.idx_cantidad_pepperoni]
-                        from scipy.stats import poisson
-                        xi_3 = int(poisson.ppf(u, mu=20))
+                    # Vemos cuanto pepperoni se añadirá (discreto)
+                    xi_3 = self._sortear('cantidad_pepperoni')
+                    if xi_3 is not None:
+                        xi_3 = int(xi_3)
                     else:
                         xi_3 = self.rng.poisson(lam = 20)
                     
                     self.idx_cantidad_pepperoni += 1
+                    self.observar_control('Cantidad Promedio Pepperoni', xi_3)
                     
                     if xi_3 > self.obtener_nivel_inventario(self.pepperoni):
+                        self.quiebres_stock[self.nombres_inventarios[self.pepperoni]] += 1
                         if not self.en_reposicion[self.pepperoni]:
                             if self.logs:
                                 self.log(f'No hay suficiente pepperoni para la pizza {num_pizza} del cliente {cliente}. Iniciando reposición.')
@@ -819,36 +996,36 @@ class Pizzeria:
                             yield self.evento_inventario_repuesto[self.pepperoni]
                             if self.logs:
                                 self.log(f'Reposición de pepperoni completada, ahora se puede preparar la pizza {num_pizza} del cliente {cliente}.')
-                    # Agregamos pepperoni (usar variable antitética para tiempo)
-                    if self.idx_tiempo_pepperoni < len(self.uniformes_tiempo_pepperoni):
-                        u = self.uniformes_tiempo_pepperoni[self.idx_tiempo_pepperoni]
-                        from scipy.stats import lognorm
-                        # numpy lognormal(mean, sigma) vs scipy lognorm(s, scale)
-                        # scipy: s=sigma, scale=exp(mean)
-                        gamma_3 = lognorm.ppf(u, s=0.25, scale=np.exp(0.5)) / 60
+                    # Agregamos pepperoni
+                    gamma_3 = self._sortear('tiempo_pepperoni')
+                    if gamma_3 is not None:
+                        gamma_3 = gamma_3 / 60
                     else:
                         gamma_3 = self.rng.lognormal(mean=0.5, sigma=0.25)/60
                     
                     self.idx_tiempo_pepperoni += 1
+                    self.observar_control('Tiempo Promedio Pepperoni', gamma_3 * 60)
                     
                     yield self.env.timeout(gamma_3) # Esperamos a que se ponga el pepperoni
                     # Descontamos pepperoni
                     if xi_3 > 0:
                         yield self.pepperoni.get(xi_3)
+                        self.registrar_consumo(self.pepperoni, xi_3)
                     
                 # Agregamos Mix
                 if tipo_pizza==3:
-                    # Vemos cuanta carne se añadirá (discreto - usar variable antitética)
-                    if self.idx_cantidad_carnes < len(self.uniformes_cantidad_carnes):
-                        u = self.uniformes_cantidad_carnes[self.idx_cantidad_carnes]
-                        from scipy.stats import binom
-                        xi_4 = int(binom.ppf(u, n=16, p=0.42))
+                    # Vemos cuanta carne se añadirá (discreto)
+                    xi_4 = self._sortear('cantidad_carnes')
+                    if xi_4 is not None:
+                        xi_4 = int(xi_4)
                     else:
                         xi_4 = self.rng.binomial(n = 16, p = 0.42)
                     
                     self.idx_cantidad_carnes += 1
+                    self.observar_control('Cantidad Promedio Carnes', xi_4)
                     
                     if xi_4 > self.obtener_nivel_inventario(self.mix_carnes):
+                        self.quiebres_stock[self.nombres_inventarios[self.mix_carnes]] += 1
                         if not self.en_reposicion[self.mix_carnes]:
                             if self.logs:
                                 self.log(f'No hay suficiente mix de carnes para la pizza {num_pizza} del cliente {cliente}. Iniciando reposición.')
@@ -859,24 +1036,26 @@ class Pizzeria:
                             yield self.evento_inventario_repuesto[self.mix_carnes]
                             if self.logs:
                                 self.log(f'Reposición de mix de carnes completada, ahora se puede preparar la pizza {num_pizza} del cliente {cliente}.')
-                    # Agregamos mix (usar variable antitética para tiempo)
-                    if self.idx_tiempo_carnes < len(self.uniformes_tiempo_carnes):
-                        u = self.uniformes_tiempo_carnes[self.idx_tiempo_carnes]
-                        # Transformación inversa para uniforme(1, 1.8)
-                        gamma_4 = (1 + u * 0.8) / 60
+                    # Agregamos mix: uniforme(1, 1.8)
+                    gamma_4 = self._sortear('tiempo_carnes')
+                    if gamma_4 is not None:
+                        gamma_4 = gamma_4 / 60
                     else:
                         gamma_4 = self.rng.uniform(low = 1, high = 1.8)/60
                     
                     self.idx_tiempo_carnes += 1
+                    self.observar_control('Tiempo Promedio Carnes', gamma_4 * 60)
                     
                     yield self.env.timeout(gamma_4) # Esperamos a que se ponga el mix
                     # Descontamos Mix
                     if xi_4 > 0:
                         yield self.mix_carnes.get(xi_4)
+                        self.registrar_consumo(self.mix_carnes, xi_4)
         if self.logs:
             self.log(f'Se terminó de preparar la pizza {num_pizza} del cliente {cliente}, solicitando horno...')
-        # Procedemos a hornear la pizza
-        yield self.env.process(self.hornear(cliente, premium, prioridad, num_pizza))
+        # Procedemos a hornear la pizza. Horneado y embalaje corren dentro del
+        # mismo proceso de la pizza (yield from), sin crear un Process por etapa.
+        yield from self.hornear(cliente, premium, prioridad, num_pizza)
         
         
     def hornear(self, cliente, premium,  prioridad, num_pizza):
@@ -885,25 +1064,23 @@ class Pizzeria:
             if self.logs:
                 self.log(f'La pizza {num_pizza} del cliente {cliente} está en el horno.')
             
-            # Usar variable antitética si está disponible, sino generar normalmente
-            if self.idx_coccion < len(self.uniformes_coccion):
-                u = self.uniformes_coccion[self.idx_coccion]
-                # Transformación inversa para lognormal
-                # numpy lognormal(mean, sigma) genera exp(N(mean, sigma))
-                z = norm.ppf(u, loc=2.5, scale=0.2)
-                delta = np.exp(z) / 60
+            # Tiempo de cocción: lognormal (exp de una N(2.5, 0.2))
+            delta = self._sortear('coccion')
+            if delta is not None:
+                delta = delta / 60
             else:
                 # numpy: lognormal(mean, sigma) donde mean y sigma son parámetros de la normal subyacente
                 delta = self.rng.lognormal(mean=2.5, sigma=0.2)/60
             
             # SIEMPRE incrementar el contador (para contar en simulación preliminar)
             self.idx_coccion += 1
+            self.observar_control('Tiempo Promedio Coccion', delta * 60)
             
             yield self.env.timeout(delta)
             if self.logs:
                 self.log(f'La pizza {num_pizza} del cliente {cliente} salió del horno, solicitando embalaje.')
         
-        yield self.env.process(self.embalar(cliente, premium, prioridad, num_pizza))
+        yield from self.embalar(cliente, premium, prioridad, num_pizza)
             
             
     def embalar(self, cliente, premium, prioridad, num_pizza):
@@ -915,21 +1092,15 @@ class Pizzeria:
                 if self.logs:
                     self.log(f'La pizza {num_pizza} del cliente {cliente} está siendo embalada.')
                 
-                # Usar variable antitética para tiempo de embalaje
-                if self.idx_tiempo_embalaje < len(self.uniformes_tiempo_embalaje):
-                    u = self.uniformes_tiempo_embalaje[self.idx_tiempo_embalaje]
-                    # Transformación inversa para triangular(1.1, 2, 2.3)
-                    # F(x) para triangular con left=a, mode=c, right=b
-                    a, c, b = 1.1, 2, 2.3
-                    Fc = (c - a) / (b - a)  # CDF en el mode
-                    if u < Fc:
-                        epsilon = (a + np.sqrt(u * (b - a) * (c - a))) / 60
-                    else:
-                        epsilon = (b - np.sqrt((1 - u) * (b - a) * (b - c))) / 60
+                # Tiempo de embalaje: triangular(1.1, 2, 2.3)
+                epsilon = self._sortear('tiempo_embalaje')
+                if epsilon is not None:
+                    epsilon = epsilon / 60
                 else:
                     epsilon = self.rng.triangular(left=1.1, mode=2, right=2.3) / 60
                 
                 self.idx_tiempo_embalaje += 1
+                self.observar_control('Tiempo Promedio Embalaje', epsilon * 60)
                 
                 yield self.env.timeout(epsilon)
                 if self.logs:
@@ -943,16 +1114,16 @@ class Pizzeria:
             if self.logs:
                 self.log(f'El repartidor procede a llevar el pedido del cliente {cliente}.')
             
-            # Usar variable antitética si está disponible, sino generar normalmente
-            if self.idx_despacho_ida < len(self.uniformes_despacho_ida):
-                u = self.uniformes_despacho_ida[self.idx_despacho_ida]
-                # Transformación inversa para gamma
-                tiempo_local_domicilio = gamma_dist.ppf(u, a=7.5, scale=0.9) / 60
+            # Tiempo de viaje al domicilio (Gamma)
+            tiempo_local_domicilio = self._sortear('despacho_ida')
+            if tiempo_local_domicilio is not None:
+                tiempo_local_domicilio = tiempo_local_domicilio / 60
             else:
                 tiempo_local_domicilio = self.rng.gamma(shape = 7.5, scale = 0.9)/60
             
             # SIEMPRE incrementar el contador
             self.idx_despacho_ida += 1
+            self.observar_control('Tiempo Promedio Despacho', tiempo_local_domicilio * 60)
             
             yield self.env.timeout(tiempo_local_domicilio)
             if self.logs:
@@ -1003,38 +1174,114 @@ class Pizzeria:
                 # Pedido entregado a tiempo: sumar ingresos normalmente
                 self.ingresos += valor_orden
             
-            # Usar variable antitética si está disponible, sino generar normalmente
-            if self.idx_despacho_vuelta < len(self.uniformes_despacho_vuelta):
-                u = self.uniformes_despacho_vuelta[self.idx_despacho_vuelta]
-                # Transformación inversa para gamma
-                tiempo_domicilio_local = gamma_dist.ppf(u, a=7.5, scale=0.9) / 60
+            # Tiempo de vuelta al local (Gamma)
+            tiempo_domicilio_local = self._sortear('despacho_vuelta')
+            if tiempo_domicilio_local is not None:
+                tiempo_domicilio_local = tiempo_domicilio_local / 60
             else:
                 tiempo_domicilio_local = self.rng.gamma(shape = 7.5, scale = 0.9)/60
             
             # SIEMPRE incrementar el contador
             self.idx_despacho_vuelta += 1
+            self.observar_control('Tiempo Promedio Despacho', tiempo_domicilio_local * 60)
             
             yield self.env.timeout(tiempo_domicilio_local)
             if self.logs:
                 self.log(f'Llega el repartidor del cliente {cliente} al local.')
                 
 
-    def temporizador_revision_salsa(self):
-        yield self.env.timeout(10) # Iniciar simulación a las 10 AM 
-        
+    def construir_calendario_revision(self, funciones_proxima_revision):
+        # Instantes que recorrerían los temporizadores periódicos (desde las
+        # 10 AM hasta el tiempo límite), calculados una sola vez por réplica.
+        calendario = []
+        for politica, obtener_tiempo_proxima_revision in enumerate(funciones_proxima_revision):
+            t = 10
+            while True:
+                t = t + obtener_tiempo_proxima_revision(t)
+                if t >= self.tiempo_limite:
+                    break
+                calendario.append((t, politica))
+        calendario.sort()
+        return calendario
+
+    def requiere_revision(self, inventario):
+        return (
+            self.obtener_nivel_inventario(inventario) < self.umbral_reposicion[inventario]
+            and not self.en_reposicion[inventario]
+        )
+
+    def registrar_consumo(self, inventario, cantidad):
+        if self.registro_consumo is not None:
+            self.registro_consumo.append((self.env.now, inventario, cantidad))
+        # Avisamos al vigilante según el estado y no según el cruce del umbral:
+        # otros consumos del mismo instante pueden haber vaciado el contenedor
+        # antes de que este se reanude. Sólo se dispara el evento si el
+        # vigilante lo está esperando (si no, recalcula desde el estado).
+        if self.evento_nivel_bajo[inventario].callbacks and self.requiere_revision(inventario):
+            self.notificar_nivel_bajo(inventario)
+
+    def notificar_nivel_bajo(self, inventario):
+        self.evento_nivel_bajo[inventario].succeed()
+        self.evento_nivel_bajo[inventario] = self.env.event()
+
+    def vigilar_revisiones(self):
+        # Política de revisión disparada por nivel: en vez de despertar en cada
+        # instante del calendario, el proceso duerme hasta que algún inventario
+        # queda bajo su umbral y agenda la revisión en el primer instante
+        # posterior de su política. Las revisiones efectivas ocurren en los
+        # mismos instantes que con los temporizadores periódicos.
+        instantes = [t for t, _ in self.calendario_revision]
+        siguiente = 0
         while True:
-            if self.env.now >= self.tiempo_limite:
-                break
-            tiempo_proxima_revision = self.obtener_tiempo_proxima_revision_salsa(self.env.now)
-            yield self.env.timeout(tiempo_proxima_revision) # Revisamos cada 30 minutos en jornada laboral
-            if self.env.now >= self.tiempo_limite:
+            pendientes = {
+                politica
+                for politica, (inventarios, _, _) in enumerate(self.politicas_revision)
+                if any(self.requiere_revision(inv) for inv in inventarios)
+            }
+            en_espera = [
+                self.evento_nivel_bajo[inv]
+                for politica, (inventarios, _, _) in enumerate(self.politicas_revision)
+                if politica not in pendientes
+                for inv in inventarios
+            ]
+            if not pendientes:
+                yield self.env.any_of(en_espera)
+                continue
+
+            # Primer instante del calendario de alguna política pendiente
+            siguiente = max(siguiente, bisect.bisect_right(instantes, self.env.now))
+            j = siguiente
+            while j < len(instantes) and self.calendario_revision[j][1] not in pendientes:
+                j += 1
+            if j >= len(instantes):
                 break
-                
-            if self.logs:
-                self.log(f'Revisión periódica de inventario de salsa de tomate.')
+            instante = instantes[j]
+
+            # Si otra política cruza su umbral mientras esperamos, recalculamos
+            espera = self.env.timeout(instante - self.env.now)
+            yield self.env.any_of([espera] + en_espera)
+            if not espera.processed:
+                continue
+
+            # Revisiones del instante. Si alguna es necesaria se lanzan todas,
+            # igual que los temporizadores (una revisión sin efecto igualmente
+            # ocupa un trabajador en ese instante).
+            revisiones = []
+            siguiente = bisect.bisect_left(instantes, instante)
+            while siguiente < len(instantes) and instantes[siguiente] == instante:
+                revisiones.append(self.calendario_revision[siguiente][1])
+                siguiente += 1
+            if any(
+                self.requiere_revision(inv)
+                for politica in revisiones
+                for inv in self.politicas_revision[politica][0]
+            ):
+                for politica in revisiones:
+                    _, revisar, mensaje = self.politicas_revision[politica]
+                    if self.logs:
+                        self.log(mensaje)
+                    self.env.process(revisar())
 
-            self.env.process(self.revisar_inventario_salsa())
-    
     # Funcion solicitada a Github Copilot
     def obtener_tiempo_proxima_revision_salsa(self, now):
         # Retorna 30 minutos (0.5 horas) si estamos en jornada laboral
@@ -1115,20 +1362,6 @@ class Pizzeria:
             if self.logs:
                 self.log(f'{self.env.now}: No hay trabajadores disponibles para revisar inventario de salsa de tomate, se omite esta revisión.')
 
-    def temporizador_revision_inventarios(self):
-        yield self.env.timeout(10) # Iniciar simulación a las 10 AM
-
-        while True:
-            if self.env.now >= self.tiempo_limite:
-                break
-            tiempo_proxima_revision = self.obtener_tiempo_proxima_revision_inventarios(self.env.now)
-            yield self.env.timeout(tiempo_proxima_revision) # Revisamos cada 45 minutos
-            if self.env.now >= self.tiempo_limite:
-                break
-            if self.logs:
-                self.log(f'Revisión periódica de inventarios.')
-            self.env.process(self.revisar_inventarios())
-    
     # Funcion solicitada a Github Copilot
     def obtener_tiempo_proxima_revision_inventarios(self, now):
         # Retorna 45 minutos (0.75 horas) si estamos en jornada laboral
@@ -1230,7 +1463,14 @@ class Pizzeria:
         if self.logs:
             self.log(f'Tiempo estimado de reposición para {self.nombres_inventarios[inventario]}: {tiempo_reposicion} horas.')
         self.en_reposicion[inventario] = True
-        yield self.env.timeout(tiempo_reposicion)
+        if self.proveedor is None:
+            yield self.env.timeout(tiempo_reposicion)
+        else:
+            # Proveedor compartido entre pizzerías (cadena.py): la reposición
+            # espera un despacho libre y lo ocupa durante su tiempo
+            with self.proveedor.request() as despacho:
+                yield despacho
+                yield self.env.timeout(tiempo_reposicion)
         
         # Redondear cantidad si es inventario discreto
         if inventario in self.inventarios_discretos:
@@ -1246,8 +1486,20 @@ class Pizzeria:
             self.log(f'Reposición de {self.nombres_inventarios[inventario]} completada. Nuevo nivel: {nivel_nuevo} unidades.')
 
         self.en_reposicion[inventario] = False
+        # Si el consumo durante la reposición dejó el nivel bajo el umbral, se vuelve a revisar
+        if self.requiere_revision(inventario):
+            self.notificar_nivel_bajo(inventario)
     
     def obtener_tiempo_reposicion(self, inventario):
+        # En horas; con self.variables, por transformada inversa del flujo del inventario
+        if self.variables is not None:
+            flujo = {
+                self.salsa_de_tomate: 'reposicion_salsa',
+                self.queso_mozzarella: 'reposicion_queso',
+                self.pepperoni: 'reposicion_pepperoni',
+                self.mix_carnes: 'reposicion_carnes',
+            }[inventario]
+            return self.variables.sortear(flujo) / 60
         if inventario == self.salsa_de_tomate:
             tiempo = self.rng.weibull(a=1.2) * 10 / 60 # En horas
         elif inventario == self.queso_mozzarella:
@@ -1312,127 +1564,49 @@ class Pizzeria:
         return horas
 
 
-def replicas_simulación(iteraciones, tiempo_horas, usar_antiteticas=False):
+def replicas_simulación(iteraciones, tiempo_horas, usar_antiteticas=False, flujos_antiteticos=('interarrival',)):
     """
     - Caso base: réplicas independientes.
-    - Con antitéticas: SOLO en tiempos entre llamadas (interarrival),
-      usando:
+    - Con antitéticas: pares con todas las entradas por transformada inversa
+      (variables_aleatorias.py), usando:
         U  en la réplica 1
-        1-U en la réplica 2
-      y Common Random Numbers (CRN) para el resto de los streams.
+        1-U en la réplica 2 para los flujos de flujos_antiteticos ('todas'
+      para invertir todos) y Common Random Numbers (CRN) para el resto.
     """
 
     lista_resultados = []
     estimadores_utilidad = []
 
     if usar_antiteticas:
-        # Cotas razonables por semana
-        n_interarrival = 2000  # llamadas esperadas (~1000) + margen
-        n_coccion = 1700
-        n_despacho = 1000
-        n_llamada = 1000
-        n_premium = 1000
-        n_num_pizzas = 4000
-        n_tipo_pizza = 1700
-        n_cantidad_queso = 1700
-        n_tiempo_queso = 1700
-        n_cantidad_salsa = 1700
-        n_tiempo_salsa = 1700
-        n_cantidad_pepperoni = 1700
-        n_tiempo_pepperoni = 1700
-        n_cantidad_carnes = 1700
-        n_tiempo_carnes = 1700
-        n_tiempo_embalaje = 1700
-
         pares = iteraciones // 2
 
         utils_1 = []
         utils_2 = []
+        # La media acumulada es la del estimador del par (U, 1-U)
+        progreso = ReporteProgreso(pares, etiqueta='Pares')
 
         for i in range(pares):
-            rng_U = np.random.default_rng(123456 + i)
-
-            # 🔹 Interarrivals (los ÚNICOS antitéticos)
-            U_interarrival = rng_U.uniform(0, 1, n_interarrival)
-
-            # CRN en el resto de los streams
-            U_coccion = rng_U.uniform(0, 1, n_coccion)
-            U_despacho_ida = rng_U.uniform(0, 1, n_despacho)
-            U_despacho_vuelta = rng_U.uniform(0, 1, n_despacho)
-            U_llamada = rng_U.uniform(0, 1, n_llamada)
-            U_premium = rng_U.uniform(0, 1, n_premium)
-            U_num_pizzas = rng_U.uniform(0, 1, n_num_pizzas)
-            U_tipo_pizza = rng_U.uniform(0, 1, n_tipo_pizza)
-            U_cant_queso = rng_U.uniform(0, 1, n_cantidad_queso)
-            U_time_queso = rng_U.uniform(0, 1, n_tiempo_queso)
-            U_cant_salsa = rng_U.uniform(0, 1, n_cantidad_salsa)
-            U_time_salsa = rng_U.uniform(0, 1, n_tiempo_salsa)
-            U_cant_pepp = rng_U.uniform(0, 1, n_cantidad_pepperoni)
-            U_time_pepp = rng_U.uniform(0, 1, n_tiempo_pepperoni)
-            U_cant_carnes = rng_U.uniform(0, 1, n_cantidad_carnes)
-            U_time_carnes = rng_U.uniform(0, 1, n_tiempo_carnes)
-            U_time_embalaje = rng_U.uniform(0, 1, n_tiempo_embalaje)
-
             seed_global = 900000 + i
+            variables = VariablesAleatorias(123456 + i)
 
             # =========================
             # Réplica 1 (U)
             # =========================
             env1 = sp.Environment()
             p1 = Pizzeria(env1)
-            p1.iniciar_simulacion(
-                tiempo_horas,
-                seed_global,
-                logs=False,
-                uniformes_coccion=U_coccion,
-                uniformes_despacho_ida=U_despacho_ida,
-                uniformes_despacho_vuelta=U_despacho_vuelta,
-                uniformes_llamada=U_llamada,
-                uniformes_premium=U_premium,
-                uniformes_num_pizzas=U_num_pizzas,
-                uniformes_tipo_pizza=U_tipo_pizza,
-                uniformes_cantidad_queso=U_cant_queso,
-                uniformes_tiempo_queso=U_time_queso,
-                uniformes_cantidad_salsa=U_cant_salsa,
-                uniformes_tiempo_salsa=U_time_salsa,
-                uniformes_cantidad_pepperoni=U_cant_pepp,
-                uniformes_tiempo_pepperoni=U_time_pepp,
-                uniformes_cantidad_carnes=U_cant_carnes,
-                uniformes_tiempo_carnes=U_time_carnes,
-                uniformes_tiempo_embalaje=U_time_embalaje,
-                uniformes_interarrival=U_interarrival,
-            )
+            p1.iniciar_simulacion(tiempo_horas, seed_global, logs=False, variables=variables)
             met1 = p1.obtener_metricas()
             util1 = met1['Utilidad']
             lista_resultados.append(met1)
             utils_1.append(util1)
 
             # =========================
-            # Réplica 2 (1-U) SOLO en interarrival
+            # Réplica 2 (1-U en flujos_antiteticos)
             # =========================
             env2 = sp.Environment()
             p2 = Pizzeria(env2)
             p2.iniciar_simulacion(
-                tiempo_horas,
-                seed_global,
-                logs=False,
-                uniformes_coccion=U_coccion,
-                uniformes_despacho_ida=U_despacho_ida,
-                uniformes_despacho_vuelta=U_despacho_vuelta,
-                uniformes_llamada=U_llamada,
-                uniformes_premium=U_premium,
-                uniformes_num_pizzas=U_num_pizzas,
-                uniformes_tipo_pizza=U_tipo_pizza,
-                uniformes_cantidad_queso=U_cant_queso,
-                uniformes_tiempo_queso=U_time_queso,
-                uniformes_cantidad_salsa=U_cant_salsa,
-                uniformes_tiempo_salsa=U_time_salsa,
-                uniformes_cantidad_pepperoni=U_cant_pepp,
-                uniformes_tiempo_pepperoni=U_time_pepp,
-                uniformes_cantidad_carnes=U_cant_carnes,
-                uniformes_tiempo_carnes=U_time_carnes,
-                uniformes_tiempo_embalaje=U_time_embalaje,
-                uniformes_interarrival=1 - U_interarrival,
+                tiempo_horas, seed_global, logs=False, variables=variables.antitetica(flujos_antiteticos),
             )
             met2 = p2.obtener_metricas()
             util2 = met2['Utilidad']
@@ -1440,6 +1614,9 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_antiteticas=False):
             utils_2.append(util2)
 
             estimadores_utilidad.append((util1 + util2) / 2.0)
+            progreso.registrar(valor=estimadores_utilidad[-1])
+
+        progreso.terminar()
 
         pares_efectivos = len(estimadores_utilidad)
         media = np.mean(estimadores_utilidad)
@@ -1447,7 +1624,8 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_antiteticas=False):
         std_est = np.sqrt(var_est)
         rho = np.corrcoef(utils_1, utils_2)[0, 1]
 
-        print("\n===== RESULTADOS CON VARIABLES ANTITÉTICAS (interarrival) =====")
+        flujos = ', '.join(sorted(normalizar_flujos(flujos_antiteticos)))
+        print(f"\n===== RESULTADOS CON VARIABLES ANTITÉTICAS ({flujos}) =====")
         print(f"Número de pares efectivos   = {pares_efectivos}")
         print(f"Media estimador utilidad    = {media:,.2f}")
         print(f"Varianza del estimador     = {var_est:,.2f}")
@@ -1456,7 +1634,8 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_antiteticas=False):
         print("================================================================\n")
 
         return lista_resultados, {
-            'metodo': 'antiteticas_interarrival',
+            'metodo': 'antiteticas',
+            'flujos_antiteticos': sorted(normalizar_flujos(flujos_antiteticos)),
             'media': media,
             'varianza': var_est,
             'std': std_est,
@@ -1467,6 +1646,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_antiteticas=False):
 
     else:
         # Caso base
+        progreso = ReporteProgreso(iteraciones)
         for i in range(iteraciones):
             env = sp.Environment()
             p = Pizzeria(env)
@@ -1474,6 +1654,8 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_antiteticas=False):
             met = p.obtener_metricas()
             lista_resultados.append(met)
             estimadores_utilidad.append(met['Utilidad'])
+            progreso.registrar(met)
+        progreso.terminar()
 
         media = np.mean(estimadores_utilidad)
         var_est = np.var(estimadores_utilidad, ddof=1) / iteraciones
@@ -3,6 +3,9 @@ import simpy as sp
 import math
 from scipy.stats import norm, gamma as gamma_dist, triang, nbinom
 
+from medias_controles import APROXIMADAS, vector_medias
+from progreso import ReporteProgreso
+
 logs = True
 tiempo_simulacion = 168 # horas
 numero_replicas = 1
@@ -1094,40 +1097,53 @@ class Pizzeria:
         return horas
 
 
-def aplicar_variables_control(utilidades, X_matrix):
+# Variables X1..X10, en el orden de X_matrix
+NOMBRES_X = [
+    'Tiempo Promedio Llamada',
+    'Tiempo Promedio Salsa',
+    'Tiempo Promedio Queso',
+    'Tiempo Promedio Pepperoni',
+    'Tiempo Promedio Carnes',
+    'Tiempo Promedio Coccion',
+    'Tiempo Promedio Embalaje',
+    'Tiempo Promedio Despacho',
+    'Tiempo Promedio Entre Llamadas',
+    'Proporcion Premium',
+]
+# Sólo se controla con las de E[X] exacta: el tiempo de llamada y el tiempo
+# entre llamadas tienen medias aproximadas, que sesgarían el estimador
+COLUMNAS_VC = [j for j, nombre in enumerate(NOMBRES_X) if nombre not in APROXIMADAS]
+NOMBRES_VC = [NOMBRES_X[j] for j in COLUMNAS_VC]
+
+
+def medias_teoricas_VC(tiempo_horas=168):
+    # E[X] de medias_controles.py con las tasas de llegada de esta pizzería
+    pizzeria = Pizzeria(sp.Environment())
+    escenario = {
+        'tasas_dia_normal': pizzeria.tasas_dia_normal,
+        'tasas_finde': pizzeria.tasas_finde,
+    }
+    return vector_medias(NOMBRES_VC, escenario, tiempo_horas)
+
+
+def aplicar_variables_control(utilidades, X_matrix, tiempo_horas=168):
     """
     Aplica variables de control múltiples ortogonales a las utilidades.
     
     Args:
         utilidades: array de utilidades observadas
-        X_matrix: matriz n x 10 con las variables de control
+        X_matrix: matriz n x 10 con X1..X10 (se usan las columnas COLUMNAS_VC)
+        tiempo_horas: horizonte de las réplicas (para E[X])
     
     Returns:
         utilidades_controladas: array con utilidades ajustadas
         coeficientes_beta: coeficientes de control calculados
     """
     Y = np.array(utilidades)
-    X = np.array(X_matrix)
-    
-    # Calcular medias teóricas E[X] para las variables de control
-    # X1-X8: Usar medias observadas
-    E_X_tiempos = np.mean(X[:, :8], axis=0)
+    X = np.array(X_matrix)[:, COLUMNAS_VC]
     
-    # X9: Tiempo promedio entre llamadas (proceso de renovación no homogéneo)
-    tasas_normal = [2, 6, 12, 20, 12, 14, 12, 10, 9, 8, 6, 4]
-    tiempos_normal = [1/tasa for tasa in tasas_normal]
-    E_T_normal = np.mean(tiempos_normal)
-    
-    tasas_finde = [2, 8, 18, 25, 25, 24, 18, 12, 11, 10, 9, 8, 6, 4]
-    tiempos_finde = [1/tasa for tasa in tasas_finde]
-    E_T_finde = np.mean(tiempos_finde)
-    
-    E_X9 = (5 * E_T_normal + 2 * E_T_finde) / 7
-    
-    # X10: Proporción de pedidos premium
-    E_X10 = 3/20
-    
-    E_X = np.concatenate([E_X_tiempos, [E_X9, E_X10]])
+    # Medias teóricas E[X] para las variables de control
+    E_X = medias_teoricas_VC(tiempo_horas)
     
     # Centrar variables
     X_centered = X - E_X
@@ -1140,7 +1156,7 @@ def aplicar_variables_control(utilidades, X_matrix):
     except np.linalg.LinAlgError:
         print("⚠️  Error en regresión: matriz singular")
         Y_control = Y
-        beta = np.zeros(10)
+        beta = np.zeros(len(COLUMNAS_VC))
     
     return Y_control, beta
 
@@ -1186,6 +1202,8 @@ def replicas_simulacion_combinada(iteraciones, tiempo_horas):
     print(f"Réplicas totales: {iteraciones}")
     print("="*80 + "\n")
     
+    # La media acumulada es la utilidad promedio del par (U, 1-U)
+    progreso = ReporteProgreso(pares, etiqueta='Pares')
     for i in range(pares):
         # Generar números uniformes para las variables antitéticas
         rng_antiteticas = np.random.default_rng(999999 + i)
@@ -1228,8 +1246,6 @@ def replicas_simulacion_combinada(iteraciones, tiempo_horas):
         todas_X_matrix.append([x1, x2, x3, x4, x5, x6, x7, x8, x9, x10])
         indices_pares.append((len(todas_utilidades) - 1, -1))  # Marcador temporal
         
-        print(f'Par {i+1}: Réplica {2*i+1} (normal) completada.')
-        
         # ========== RÉPLICA ANTITÉTICA (1-U) ==========
         uniformes_coccion_anti = 1 - uniformes_coccion
         uniformes_despacho_ida_anti = 1 - uniformes_despacho_ida
@@ -1271,8 +1287,8 @@ def replicas_simulacion_combinada(iteraciones, tiempo_horas):
         # Actualizar índice del par
         indices_pares[-1] = (indices_pares[-1][0], len(todas_utilidades) - 1)
         
-        print(f'Par {i+1}: Réplica {2*i+2} (antitética) completada.')
-        print("")
+        progreso.registrar(valor=(utilidad_normal + utilidad_anti) / 2)
+    progreso.terminar()
     
     # ========== APLICAR VARIABLES DE CONTROL ==========
     print("\nCalculando promedios de pares antitéticos...")
@@ -1291,11 +1307,11 @@ def replicas_simulacion_combinada(iteraciones, tiempo_horas):
         X_matrix_pares.append(X_par.tolist())
     
     print("Aplicando variables de control a los promedios de pares...")
-    utilidades_pares_controladas, beta_pares = aplicar_variables_control(utilidades_pares, X_matrix_pares)
+    utilidades_pares_controladas, beta_pares = aplicar_variables_control(utilidades_pares, X_matrix_pares, tiempo_horas)
     
     # ENFOQUE 2: Aplicar VC individualmente, luego promediar
     print("Aplicando variables de control a réplicas individuales...")
-    utilidades_controladas, beta = aplicar_variables_control(todas_utilidades, todas_X_matrix)
+    utilidades_controladas, beta = aplicar_variables_control(todas_utilidades, todas_X_matrix, tiempo_horas)
     
     estimadores_vc_luego_antiteticas = []
     for idx_normal, idx_anti in indices_pares:
@@ -1336,8 +1352,9 @@ def replicas_simulacion_combinada(iteraciones, tiempo_horas):
     print("\nCoeficientes de control para ENFOQUE 1 (Antitéticas → VC):")
     coef_labels = ['llamada', 'salsa', 'queso', 'pepperoni', 'carnes', 'horno', 
                    'embalaje', 'despacho', 'tiempo_inter', 'prop_prem']
-    for i, label in enumerate(coef_labels):
-        print(f"  β{i+1:2d} ({label:13s}) = {beta_pares[i]:,.4f}")
+    for k, j in enumerate(COLUMNAS_VC):
+        print(f"  β{j+1:2d} ({coef_labels[j]:13s}) = {beta_pares[k]:,.4f}")
+    print(f"  (X1 y X9 sin control: E[X] aproximada)")
     
     print(f"\n1. CASO BASE (sin reducción):")
     print(f"   Media: ${media_base:,.2f}")
@@ -2,6 +2,9 @@ import numpy as np
 import simpy as sp
 import math
 
+from medias_controles import APROXIMADAS, vector_medias
+from progreso import ReporteProgreso
+
 logs = True
 tiempo_simulacion = 168 # horas
 numero_replicas = 1
@@ -283,6 +286,7 @@ class Pizzeria:
             'Utilidad': self.utilidad,
             # Variables de control independientes (NO incluir Ingresos porque es componente directo)
             'Total Pizzas': total_pizzas,
+            'Llamadas Totales': self.llamadas_totales,
             'Tiempo Promedio Coccion': tiempo_promedio_coccion,
             'Tiempo Promedio Despacho': tiempo_promedio_despacho
         }
@@ -1003,19 +1007,15 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
     Ejecuta réplicas de la simulación.
     
     Si usar_variable_control=True, aplica la técnica de MÚLTIPLES variables de control:
-    - X1 = Ingresos totales, E[X1] = $14,784,870 (correlación ~0.98 con utilidad)
-    - X2 = Total pizzas producidas, E[X2] = 1589 pizzas (correlación ~0.41 con utilidad)
-    
-    Cálculo de E[X1] (Ingresos):
-    - 925 llamadas atendidas (99% de 935)
-    - 15% premium, 85% normal
-    - Proporción a tiempo: 92.95%
-    - E[Ingresos] = pedidos_premium_a_tiempo × 2.1 × 8,700 + pedidos_normal_a_tiempo × 1.65 × 10,300
+    - X1 = Llamadas que llegan, E[X1] ≈ 914.5 por semana
+    - X2 = Tiempo promedio de cocción, E[X2] = exp(2.5 + 0.04/2) minutos
+    - X3 = Tiempo promedio de despacho, E[X3] = 7.5 × 0.9 minutos
     
-    Cálculo de E[X2] (Pizzas):
-    - E[pizzas] = 925 × (0.15×2.1 + 0.85×1.65) = 925 × 1.7175 ≈ 1589
+    Las tres medias son exactas (medias_controles.py). El total de pizzas no
+    se usa: su media depende de las llamadas perdidas, que sólo se conocen
+    aproximadamente, y ese error sesgaría el estimador.
     
-    Estimador con múltiples VC: Y* = Y - c1(X1 - E[X1]) - c2(X2 - E[X2])
+    Estimador con múltiples VC: Y* = Y - c1(X1 - E[X1]) - c2(X2 - E[X2]) - c3(X3 - E[X3])
     donde c = (Σ^-1) * Cov(Y, X) y Σ = matriz de covarianza de X
     
     Retorna:
@@ -1024,16 +1024,18 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
     """
     # Valores esperados teóricos de las variables de control
     # NO usar Ingresos porque es componente directo de Utilidad = Ingresos - Costos
-    E_pizzas = 1589  # 925 llamadas × 1.7175 pizzas/llamada
-    E_tiempo_coccion = 12.43  # exp(2.5 + 0.04/2) minutos (LogNormal)
-    E_tiempo_despacho = 6.75  # 7.5 × 0.9 minutos (Gamma)
+    E_llamadas, E_tiempo_coccion, E_tiempo_despacho = vector_medias(
+        ['Llamadas Totales', 'Tiempo Promedio Coccion', 'Tiempo Promedio Despacho'],
+        escenario_pizzeria(), tiempo_horas,
+    )
     
     lista_resultados = []
     utilidades = []
-    X1_list = []  # Total pizzas
+    X1_list = []  # Llamadas totales
     X2_list = []  # Tiempo promedio cocción
     X3_list = []  # Tiempo promedio despacho
     
+    progreso = ReporteProgreso(iteraciones)
     for i in range(iteraciones):
         env = sp.Environment()
         pizzeria = Pizzeria(env)
@@ -1042,19 +1044,17 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         lista_resultados.append(metricas)
         
         utilidades.append(metricas['Utilidad'])
-        X1_list.append(metricas['Total Pizzas'])
+        X1_list.append(metricas['Llamadas Totales'])
         X2_list.append(metricas['Tiempo Promedio Coccion'])
         X3_list.append(metricas['Tiempo Promedio Despacho'])
         
-        print(f'Replica {i+1} completada.')
-        print("")
-        print("--------------------------------")
-        print("")
+        progreso.registrar(metricas)
+    progreso.terminar()
     
     if usar_variable_control:
         # Convertir a arrays de numpy
         Y = np.array(utilidades)
-        X1 = np.array(X1_list)  # Total pizzas
+        X1 = np.array(X1_list)  # Llamadas totales
         X2 = np.array(X2_list)  # Tiempo promedio cocción
         X3 = np.array(X3_list)  # Tiempo promedio despacho
         
@@ -1096,7 +1096,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         c3 = -cov_Y_X3_calib / var_X3_calib
         
         # FASE 2: ESTIMACIÓN - Aplicar coeficientes al conjunto de estimación
-        Y_ajustado = Y_estim - c1 * (X1_estim - E_pizzas) - c2 * (X2_estim - E_tiempo_coccion) - c3 * (X3_estim - E_tiempo_despacho)
+        Y_ajustado = Y_estim - c1 * (X1_estim - E_llamadas) - c2 * (X2_estim - E_tiempo_coccion) - c3 * (X3_estim - E_tiempo_despacho)
         
         # Estadísticas del estimador ajustado (solo sobre conjunto de estimación)
         media_ajustada = np.mean(Y_ajustado)
@@ -1117,10 +1117,10 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         print(f"  - Calibración: {n_calib} réplicas (40%)")
         print(f"  - Estimación: {n_estim} réplicas (60%)")
         print(f"\nVariables de control:")
-        print(f"  X1 = Total pizzas producidas")
-        print(f"    E[X1] = {E_pizzas} pizzas (teórico)")
-        print(f"    X̄1 calibración = {np.mean(X1_calib):.2f} pizzas")
-        print(f"    X̄1 estimación = {np.mean(X1_estim):.2f} pizzas")
+        print(f"  X1 = Llamadas que llegan")
+        print(f"    E[X1] = {E_llamadas:.1f} llamadas (teórico)")
+        print(f"    X̄1 calibración = {np.mean(X1_calib):.2f} llamadas")
+        print(f"    X̄1 estimación = {np.mean(X1_estim):.2f} llamadas")
         print(f"    Correlación(Y, X1) = {corr_Y_X1:.4f} [en calibración]")
         print(f"\n  X2 = Tiempo promedio cocción")
         print(f"    E[X2] = {E_tiempo_coccion:.2f} minutos (teórico)")
@@ -1137,7 +1137,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         print(f"    Corr(X1, X3) = {corr_X1_X3:.4f}")
         print(f"    Corr(X2, X3) = {corr_X2_X3:.4f}")
         print(f"\nCoeficientes de control óptimos (calculados con calibración):")
-        print(f"  c1 (Pizzas) = {c1:.4f}")
+        print(f"  c1 (Llamadas) = {c1:.4f}")
         print(f"  c2 (Cocción) = {c2:.4f}")
         print(f"  c3 (Despacho) = {c3:.4f}")
         print(f"\nResultados del estimador ajustado (sobre {n_estim} réplicas de estimación):")
@@ -1155,7 +1155,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
             'varianza': varianza_ajustada,
             'std': np.sqrt(varianza_ajustada),
             'estimadores': Y_ajustado.tolist(),
-            'coeficientes': {'c1_pizzas': c1, 'c2_coccion': c2, 'c3_despacho': c3},
+            'coeficientes': {'c1_llamadas': c1, 'c2_coccion': c2, 'c3_despacho': c3},
             'correlaciones': {
                 'Y_X1': corr_Y_X1,
                 'Y_X2': corr_Y_X2,
@@ -1164,7 +1164,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
                 'X1_X3': corr_X1_X3,
                 'X2_X3': corr_X2_X3
             },
-            'E_pizzas': E_pizzas,
+            'E_llamadas': E_llamadas,
             'E_tiempo_coccion': E_tiempo_coccion,
             'E_tiempo_despacho': E_tiempo_despacho,
             'X1_mean_calib': np.mean(X1_calib),
@@ -1183,8 +1183,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         print("RESULTADOS SIN REDUCCIÓN DE VARIANZA (CASO BASE)")
         print("="*60)
         print(f"Número de réplicas: {iteraciones}")
-        print(f"Pizzas promedio: {np.mean(X1_list):.2f}")
-        print(f"Pedidos promedio: {np.mean(X2_list):.2f}")
+        print(f"Llamadas promedio: {np.mean(X1_list):.2f}")
         print(f"Media del estimador (utilidad): ${media:,.2f}")
         print(f"Varianza del estimador: {varianza:,.2f}")
         print(f"Desviación estándar: ${np.sqrt(varianza):,.2f}")
@@ -1202,6 +1201,38 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
     return lista_resultados, estadisticas
 
 
+# Variables X1..X10, en el orden de X_matrix
+NOMBRES_X = [
+    'Tiempo Promedio Llamada',
+    'Tiempo Promedio Salsa',
+    'Tiempo Promedio Queso',
+    'Tiempo Promedio Pepperoni',
+    'Tiempo Promedio Carnes',
+    'Tiempo Promedio Coccion',
+    'Tiempo Promedio Embalaje',
+    'Tiempo Promedio Despacho',
+    'Tiempo Promedio Entre Llamadas',
+    'Proporcion Premium',
+]
+# Sólo se controla con las de E[X] exacta: el tiempo de llamada y el tiempo
+# entre llamadas tienen medias aproximadas, que sesgarían el estimador
+COLUMNAS_VC = [j for j, nombre in enumerate(NOMBRES_X) if nombre not in APROXIMADAS]
+NOMBRES_VC = [NOMBRES_X[j] for j in COLUMNAS_VC]
+
+
+def escenario_pizzeria():
+    # Tasas de llegada de esta pizzería, para medias_controles.py
+    pizzeria = Pizzeria(sp.Environment())
+    return {
+        'tasas_dia_normal': pizzeria.tasas_dia_normal,
+        'tasas_finde': pizzeria.tasas_finde,
+    }
+
+
+def medias_teoricas_VC(tiempo_horas=168):
+    return vector_medias(NOMBRES_VC, escenario_pizzeria(), tiempo_horas)
+
+
 def replicas_control_multiple_ortogonal(n_replicas=100, tiempo_horas=168, semilla_inicial=42):
     """
     Variables de control con múltiples variables ORTOGONALES usando tiempos REALES de la simulación.
@@ -1210,6 +1241,8 @@ def replicas_control_multiple_ortogonal(n_replicas=100, tiempo_horas=168, semill
     X1-X8: tiempos promedio reales de proceso (beta, gamma_1, ..., delta, epsilon, despacho)
     X9: tiempo promedio entre llamadas (proceso de renovación no homogéneo)
     X10: proporción de pedidos premium (Bernoulli(3/20))
+    X1 y X9 entran al diagnóstico de correlaciones pero no al estimador (su
+    E[X] es aproximada, ver medias_controles.py).
     """
     
     print("="*80)
@@ -1276,32 +1309,11 @@ def replicas_control_multiple_ortogonal(n_replicas=100, tiempo_horas=168, semill
     var_Y = np.var(Y, ddof=1)
     var_simple = var_Y / n_replicas
     
-    # Calcular medias teóricas E[X] para las variables de control
-    # X1-X8: Usar medias observadas (distribuciones con parámetros conocidos pero cálculo complejo)
-    E_X_tiempos = np.mean(X_matrix[:, :8], axis=0)
+    # Medias teóricas E[X] de las variables de control (medias_controles.py)
+    E_X = medias_teoricas_VC(tiempo_horas)
     
-    # X9: Tiempo promedio entre llamadas (proceso de renovación no homogéneo)
-    # E[T] = suma ponderada de 1/λ_i por el tiempo en cada estado
-    # Días laborables (5/7): 10-22h, 12 horas operativas
-    tasas_normal = [2, 6, 12, 20, 12, 14, 12, 10, 9, 8, 6, 4]  # λ por hora
-    tiempos_normal = [1/tasa for tasa in tasas_normal]  # E[T_i] = 1/λ_i horas
-    E_T_normal = np.mean(tiempos_normal)  # Promedio ponderado uniforme
-    
-    # Fines de semana (2/7): 10-23h, 14 horas operativas
-    tasas_finde = [2, 8, 18, 25, 25, 24, 18, 12, 11, 10, 9, 8, 6, 4]  # última hora: 23h con tasa 4
-    tiempos_finde = [1/tasa for tasa in tasas_finde]
-    E_T_finde = np.mean(tiempos_finde)
-    
-    # Media teórica global (5 días laborables + 2 días fin de semana)
-    E_X9 = (5 * E_T_normal + 2 * E_T_finde) / 7
-    
-    # X10: Proporción de pedidos premium ~ Bernoulli(p=3/20)
-    E_X10 = 3/20  # = 0.15
-    
-    E_X = np.concatenate([E_X_tiempos, [E_X9, E_X10]])
-    
-    # Centrar variables USANDO MEDIAS TEÓRICAS para X9 y X10
-    X_centered = X_matrix - E_X
+    # Centrar las variables de control USANDO MEDIAS TEÓRICAS
+    X_centered = X_matrix[:, COLUMNAS_VC] - E_X
     Y_centered = Y - media_Y
     
     # Diagnóstico de correlación
@@ -1346,22 +1358,19 @@ def replicas_control_multiple_ortogonal(n_replicas=100, tiempo_horas=168, semill
         print("\n⚠️  Error: Matriz singular. Variables altamente correlacionadas.")
         media_control = media_Y
         var_control = var_simple
-        beta = np.zeros(10)
+        beta = np.zeros(len(COLUMNAS_VC))
     
     # Resultados
     print("\n" + "="*80)
     print("RESULTADOS")
     print("="*80)
     
-    print(f"\nMedias teóricas E[X] calculadas:")
-    print(f"  E[X9 ] (tiempo entre llamadas) = {E_X9:.4f} horas")
-    print(f"  E[X10] (proporción premium)    = {E_X10:.4f}")
-    
-    print(f"\nCoeficientes de control (β):")
+    print(f"\nCoeficientes de control (β) y medias teóricas E[X]:")
     coef_labels = ['llamada', 'salsa', 'queso', 'pepperoni', 'carnes', 'horno', 'embalaje', 'despacho',
                    'tiempo_inter', 'prop_prem']
-    for i, label in enumerate(coef_labels):
-        print(f"  β{i+1:2d} ({label:13s}) = {beta[i]:,.4f}")
+    for k, j in enumerate(COLUMNAS_VC):
+        print(f"  β{j+1:2d} ({coef_labels[j]:13s}) = {beta[k]:,.4f}   E[X{j+1}] = {E_X[k]:.4f}")
+    print(f"  (X1 y X9 sin control: E[X] aproximada)")
     
     print(f"\nMuestreo simple:")
     print(f"  Utilidad media: ${media_Y:,.2f}")
@@ -3,6 +3,8 @@ import simpy as sp
 import math
 import csv
 
+from medias_controles import APROXIMADAS, vector_medias
+
 
 # Tiempo de simulación por defecto (1 semana)
 tiempo_simulacion = 168  # horas
@@ -721,6 +723,7 @@ class Pizzeria:
 
             # Variables de control "viejas"
             "Total Pizzas": total_pizzas,
+            "Llamadas Totales": self.llamadas_totales,
             "Tiempo Promedio Coccion": tiempo_promedio_coccion,
             "Tiempo Promedio Despacho": tiempo_promedio_despacho,
 
@@ -777,13 +780,35 @@ class Pizzeria:
 
         return horas
 
-def medias_teoricas_VC(pizzeria, prob_premium=3/20, factor_atencion=0.99):
+
+# Nombres de las variables de control de replicas_mixto, en el orden de X
+NOMBRES_X = [
+    'Llamadas Totales',
+    'Tiempo Promedio Llamada',
+    'Tiempo Promedio Salsa',
+    'Tiempo Promedio Queso',
+    'Tiempo Promedio Pepperoni',
+    'Tiempo Promedio Carnes',
+    'Tiempo Promedio Coccion',
+    'Tiempo Promedio Embalaje',
+    'Tiempo Promedio Despacho',
+    'Tiempo Promedio Entre Llamadas',
+    'Proporcion Premium',
+]
+# Variables de control: las de E[X] exacta. El tiempo de llamada y el tiempo
+# entre llamadas sólo tienen medias aproximadas, que sesgarían el estimador
+# controlado (por lo mismo no se usa el total de pizzas).
+NOMBRES_VC = [nombre for nombre in NOMBRES_X if nombre not in APROXIMADAS]
+
+
+def medias_teoricas_VC(pizzeria, tiempo_horas=168):
     """
-    Calcula las medias teóricas E[X] de TODAS las variables de control, en el
-    MISMO orden en que se arma la matriz X en replicas_mixto:
+    Calcula las medias teóricas E[X] de las variables de control NOMBRES_VC:
+    las de E[X] exacta entre las que se recolectan en replicas_mixto (todas
+    menos X_llam y X_inter), en este orden:
 
         X = [
-          X_pizzas,  # 1) Total Pizzas
+          X_llamadas,  # 1) Llamadas Totales
           X_llam,    # 2) Tiempo Promedio Llamada (min)
           X_salsa,   # 3) Tiempo Promedio Salsa (min)
           X_queso,   # 4) Tiempo Promedio Queso (min)
@@ -796,113 +821,14 @@ def medias_teoricas_VC(pizzeria, prob_premium=3/20, factor_atencion=0.99):
           X_prem     # 11) Proporción Premium
         ]
 
-    Retorna:
-        np.array([E_pizzas_totales, E_t_llam, E_t_salsa, E_t_queso, E_t_pepp,
-                  E_t_carnes, E_t_horno, E_t_embal, E_t_desp, E_T_inter, E_prop_premium])
+    Las medias salen de medias_controles.py (derivadas de las tasas de
+    llegada de la pizzería y de las distribuciones del modelo).
     """
-
-    prob_normal = 1 - prob_premium
-
-    # ------------------------------------------------------------------
-    # 1) E[Total Pizzas en la semana]
-    # ------------------------------------------------------------------
-    # 1.a) E[pizzas por pedido premium]  (soporte {1,2,3,4})
-    E_pizzas_premium = 1*0.3 + 2*0.4 + 3*0.2 + 4*0.1   # = 2.1
-
-    # 1.b) E[pizzas por pedido normal]  (soporte {1,2,3,4})
-    E_pizzas_normal = 1*0.6 + 2*0.2 + 3*0.15 + 4*0.05  # = 1.65
-
-    # 1.c) E[pizzas por pedido] (mezcla premium/normal)
-    E_pizzas_por_pedido = prob_premium * E_pizzas_premium + prob_normal * E_pizzas_normal
-    #   = 0.15*2.1 + 0.85*1.65 = 1.7175
-
-    # 1.d) E[número de llamadas que llegan por semana]
-    tasas_normal = list(pizzeria.tasas_dia_normal.values())  # 12 horas (10–21)
-    tasas_finde  = list(pizzeria.tasas_finde.values())       # 14 horas (10–23)
-
-    E_llamadas_dia_normal = sum(tasas_normal)
-    E_llamadas_dia_finde  = sum(tasas_finde)
-
-    # 5 días normales + 2 días de finde por semana
-    E_llamadas_semana = 5 * E_llamadas_dia_normal + 2 * E_llamadas_dia_finde
-
-    # 1.e) E[pedidos atendidos] ≈ factor_atencion * llamadas que llegan
-    E_pedidos_atendidos = factor_atencion * E_llamadas_semana  # ~0.99*935 = 925
-
-    # 1.f) E[Total Pizzas] = E[pedidos atendidos] × E[pizzas por pedido]
-    E_pizzas_totales = E_pedidos_atendidos * E_pizzas_por_pedido
-
-    # ------------------------------------------------------------------
-    # 2) Tiempos de proceso: medias teóricas de las distribuciones
-    # ------------------------------------------------------------------
-
-    # X2: Tiempo de llamada ~ Gamma(4, 0.5) horas  ⇒ *60 → minutos
-    shape_llam, scale_llam = 4, 0.5
-    E_t_llam = shape_llam * scale_llam * 60
-
-    # X3: Tiempo salsa ~ Beta(a=5, b=2.2) horas ⇒ *60 → minutos
-    a_salsa, b_salsa = 5, 2.2
-    E_t_salsa = (a_salsa / (a_salsa + b_salsa)) * 60
-
-    # X4: Tiempo queso ~ Triangular(0.9, 1.0, 1.2) minutos
-    left_q, mode_q, right_q = 0.9, 1.0, 1.2
-    E_t_queso = (left_q + mode_q + right_q) / 3
-
-    # X5: Tiempo pepperoni ~ Lognormal(mean=0.5, sigma=0.25) horas ⇒ *60 → minutos
-    mu_pepp, sigma_pepp = 0.5, 0.25
-    E_t_pepp = np.exp(mu_pepp + 0.5 * sigma_pepp**2) * 60
-
-    # X6: Tiempo carnes ~ Uniform(1, 1.8) minutos
-    a_c, b_c = 1.0, 1.8
-    E_t_carnes = (a_c + b_c) / 2
-
-    # X7: Tiempo horno ~ Lognormal(mean=2.5, sigma=0.2) horas ⇒ *60 → minutos
-    mu_h, sigma_h = 2.5, 0.2
-    E_t_horno = np.exp(mu_h + 0.5 * sigma_h**2) * 60
-
-    # X8: Tiempo embalaje ~ Triangular(1.1, 2.0, 2.3) minutos
-    left_e, mode_e, right_e = 1.1, 2.0, 2.3
-    E_t_embal = (left_e + mode_e + right_e) / 3
-
-    # X9: Tiempo despacho ~ Gamma(7.5, 0.9) horas ⇒ *60 → minutos
-    k_d, theta_d = 7.5, 0.9
-    E_t_desp = k_d * theta_d * 60
-
-    # ------------------------------------------------------------------
-    # 3) Tiempo entre llamadas (proceso de renovación no homogéneo)
-    # ------------------------------------------------------------------
-    # E[T] ≈ promedio ponderado de 1/λ por hora de operación
-
-    # Días normales: 10–22h (12 tasas en tasas_dia_normal)
-    E_T_normal = np.mean([1.0 / lam for lam in tasas_normal])
-
-    # Fines de semana: 10–23h (14 tasas en tasas_finde)
-    E_T_finde = np.mean([1.0 / lam for lam in tasas_finde])
-
-    # Mezcla semanal 5 días normales + 2 finde
-    E_T_inter = (5 * E_T_normal + 2 * E_T_finde) / 7  # en horas
-
-    # ------------------------------------------------------------------
-    # 4) Proporción de pedidos premium
-    # ------------------------------------------------------------------
-    E_prop_premium = prob_premium
-
-    # ------------------------------------------------------------------
-    # Empaquetar en vector (11 elementos) en el mismo orden que X
-    # ------------------------------------------------------------------
-    return np.array([
-        E_pizzas_totales,  # 1) Total Pizzas
-        E_t_llam,          # 2) Tiempo Llamada (min)
-        E_t_salsa,         # 3) Tiempo Salsa (min)
-        E_t_queso,         # 4) Tiempo Queso (min)
-        E_t_pepp,          # 5) Tiempo Pepperoni (min)
-        E_t_carnes,        # 6) Tiempo Carnes (min)
-        E_t_horno,         # 7) Tiempo Cocción (min)
-        E_t_embal,         # 8) Tiempo Embalaje (min)
-        E_t_desp,          # 9) Tiempo Despacho (min)
-        E_T_inter,         # 10) Tiempo Entre Llamadas (horas)
-        E_prop_premium,    # 11) Proporción Premium
-    ])
+    escenario = {
+        'tasas_dia_normal': pizzeria.tasas_dia_normal,
+        'tasas_finde': pizzeria.tasas_finde,
+    }
+    return vector_medias(NOMBRES_VC, escenario, tiempo_horas)
 
 
 
@@ -920,7 +846,7 @@ def replicas_mixto(
     """
     Ejecuta la simulación con las siguientes opciones:
       - usar_antiteticas: aplica variables antitéticas en tiempos entre llamadas
-      - usar_vc: aplica variables de control (Total Pizzas)
+      - usar_vc: aplica variables de control (Llamadas Totales)
     Si usar_antiteticas=True, n_replicas debe ser PAR (trabajamos por pares).
 
     IMPORTANTE:
@@ -933,7 +859,7 @@ def replicas_mixto(
     Y = []   # utilidades (o estimador antitético por par)
 
     # Variables de control que recolectamos de la simulación
-    X_pizzas = []   # Total de pizzas
+    X_llamadas = []   # Llamadas que llegan
 
     # (resto de VC que no usamos ahora, pero las dejamos por si amplías a multi-VC)
     X_llam = []
@@ -998,7 +924,7 @@ def replicas_mixto(
             Y.append(Y_par)
 
             # Promedio por par de variables de control
-            X_pizzas.append(0.5 * (met1["Total Pizzas"] + met2["Total Pizzas"]))
+            X_llamadas.append(0.5 * (met1["Llamadas Totales"] + met2["Llamadas Totales"]))
 
             X_llam.append(0.5 * (met1["Tiempo Promedio Llamada"] + met2["Tiempo Promedio Llamada"]))
             X_salsa.append(0.5 * (met1["Tiempo Promedio Salsa"] + met2["Tiempo Promedio Salsa"]))
@@ -1028,7 +954,7 @@ def replicas_mixto(
             met = p.obtener_metricas()
 
             Y.append(met["Utilidad"])
-            X_pizzas.append(met["Total Pizzas"])
+            X_llamadas.append(met["Llamadas Totales"])
 
             X_llam.append(met["Tiempo Promedio Llamada"])
             X_salsa.append(met["Tiempo Promedio Salsa"])
@@ -1045,7 +971,7 @@ def replicas_mixto(
 
     # Pasamos a arrays numpy
     Y        = np.array(Y,        dtype=float)
-    X_pizzas = np.array(X_pizzas, dtype=float)
+    X_llamadas = np.array(X_llamadas, dtype=float)
     X_llam   = np.array(X_llam,   dtype=float)
     X_salsa  = np.array(X_salsa,  dtype=float)
     X_queso  = np.array(X_queso,  dtype=float)
@@ -1086,15 +1012,14 @@ def replicas_mixto(
         }
 
     # --------------------------------------------------------------
-    # 3) CASO CON VC: usamos SOLO Total Pizzas como VC
+    # 3) CASO CON VC: usamos SOLO Llamadas Totales como VC
     # --------------------------------------------------------------
     # Matriz X con una sola VC
-    X = X_pizzas.reshape(-1, 1)
+    X = X_llamadas.reshape(-1, 1)
 
     # Medias teóricas de las VC (vector largo, ya calculado)
-    E_X_full = medias_teoricas_VC(Pizzeria(sp.Environment()))
-    # Índice 0: Total Pizzas
-    E_X = np.array([E_X_full[0]])
+    E_X_full = medias_teoricas_VC(Pizzeria(sp.Environment()), tiempo_horas)
+    E_X = np.array([E_X_full[NOMBRES_VC.index('Llamadas Totales')]])
 
     # ---------- División Calibración / Estimación ----------
     n_calib = max(1, n_eff // 5)   # 1/5 para calibrar β
@@ -1142,7 +1067,7 @@ def replicas_mixto(
     print(f"  Réplicas de calibración     = {n_calib}")
     print(f"  Réplicas de estimación      = {n_estim}\n")
 
-    nombres_vc = ["Total Pizzas"]
+    nombres_vc = ["Llamadas Totales"]
 
     if n_calib > 1:
         print("Correlación con la utilidad (CALIBRACIÓN):")
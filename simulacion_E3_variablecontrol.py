@@ -2,6 +2,9 @@ import numpy as np
 import simpy as sp
 import math
 
+from medias_controles import vector_medias
+from progreso import ReporteProgreso
+
 logs = True
 tiempo_simulacion = 168 # horas
 numero_replicas = 1
@@ -266,8 +269,9 @@ class Pizzeria:
             'Tiempo Medio para Procesar un Pedido Normal (min)': self.tiempo_promedio_procesamiento_normales,
             'Tiempo Medio para Procesar un Pedido Premium (min)': self.tiempo_promedio_procesamiento_premium,
             'Utilidad': self.utilidad,
-            # Variable de control: Total Pizzas (NO usar Ingresos porque es componente directo)
-            'Total Pizzas': self.pizzas_queso + self.pizzas_pepperoni + self.pizzas_carnes
+            'Total Pizzas': self.pizzas_queso + self.pizzas_pepperoni + self.pizzas_carnes,
+            # Variable de control: llamadas que llegan (E[X] exacta en medias_controles.py)
+            'Llamadas Totales': self.llamadas_totales,
         }
     
     def log(self, mensaje):
@@ -979,26 +983,28 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
     Ejecuta réplicas de la simulación.
     
     Si usar_variable_control=True, aplica la técnica de variable de control usando:
-    - X = Número total de pizzas producidas
-    - E[X] = 1589 pizzas por semana (calculado teóricamente)
+    - X = Número de llamadas que llegan en el horizonte
+    - E[X] ≈ 914.5 llamadas por semana, exacta (medias_controles.py, ecuación
+      de Kolmogorov del proceso de llegadas)
     
-    Cálculo de E[X]:
-    - E[llamadas atendidas] = 925 (935 llamadas × 0.99 atendidas)
-    - E[pizzas|premium] = 2.1, E[pizzas|normal] = 1.65
-    - E[pizzas por pedido] = 0.15×2.1 + 0.85×1.65 = 1.7175
-    - E[total pizzas] = 925 × 1.7175 ≈ 1589
+    El total de pizzas no sirve de control: su media depende de las llamadas
+    perdidas, que sólo se conocen aproximadamente, y el error de E[X] sesgaría
+    el estimador.
     
     Retorna:
     - lista_resultados: métricas de cada réplica
     - estadisticas: dict con media, varianza y análisis del estimador
     """
-    # Valor esperado teórico de total pizzas (NO usar Ingresos)
-    E_pizzas = 1589  # 925 llamadas × 1.7175 pizzas/llamada
+    # Valor esperado teórico de las llamadas (NO usar Ingresos)
+    pizzeria = Pizzeria(sp.Environment())
+    escenario = {'tasas_dia_normal': pizzeria.tasas_dia_normal, 'tasas_finde': pizzeria.tasas_finde}
+    E_llamadas = vector_medias(['Llamadas Totales'], escenario, tiempo_horas)[0]
     
     lista_resultados = []
     utilidades = []
-    X_list = []  # Total Pizzas por réplica
+    X_list = []  # Llamadas Totales por réplica
     
+    progreso = ReporteProgreso(iteraciones)
     for i in range(iteraciones):
         env = sp.Environment()
         pizzeria = Pizzeria(env)
@@ -1007,12 +1013,10 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         lista_resultados.append(metricas)
         
         utilidades.append(metricas['Utilidad'])
-        X_list.append(metricas['Total Pizzas'])
+        X_list.append(metricas['Llamadas Totales'])
         
-        print(f'Replica {i+1} completada.')
-        print("")
-        print("--------------------------------")
-        print("")
+        progreso.registrar(metricas)
+    progreso.terminar()
     
     if usar_variable_control:
         # Convertir a arrays de numpy
@@ -1024,7 +1028,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         c = np.cov(Y, X)[0, 1] / np.var(X, ddof=1)
         
         # Estimador ajustado: Y* = Y - c(X - E[X])
-        Y_ajustado = Y - c * (X - E_pizzas)
+        Y_ajustado = Y - c * (X - E_llamadas)
         
         # Estadísticas del estimador ajustado
         media_ajustada = np.mean(Y_ajustado)
@@ -1038,9 +1042,9 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         print("="*60)
         print(f"Número de réplicas: {iteraciones}")
         print(f"\nVariable de control:")
-        print(f"  X = Total pizzas producidas")
-        print(f"  E[X] = {E_pizzas} pizzas (teórico)")
-        print(f"  X̄ (observado) = {np.mean(X):.2f} pizzas")
+        print(f"  X = Llamadas que llegan")
+        print(f"  E[X] = {E_llamadas:.1f} llamadas (teórico)")
+        print(f"  X̄ (observado) = {np.mean(X):.2f} llamadas")
         print(f"\nCoeficiente de control:")
         print(f"  c = {c:.4f}")
         print(f"  Correlación(Y, X) = {correlacion:.4f}")
@@ -1058,7 +1062,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
             'estimadores': Y_ajustado.tolist(),
             'coeficiente': c,
             'correlacion': correlacion,
-            'E_pizzas': E_pizzas,
+            'E_llamadas': E_llamadas,
             'X_mean': np.mean(X)
         }
     else:
@@ -1070,7 +1074,7 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
         print("RESULTADOS SIN REDUCCIÓN DE VARIANZA (CASO BASE)")
         print("="*60)
         print(f"Número de réplicas: {iteraciones}")
-        print(f"Ingresos promedio: ${np.mean(X_list):,.2f}")
+        print(f"Llamadas promedio: {np.mean(X_list):,.2f}")
         print(f"Media del estimador (utilidad): ${media:,.2f}")
         print(f"Varianza del estimador: {varianza:,.2f}")
         print(f"Desviación estándar: ${np.sqrt(varianza):,.2f}")
@@ -1089,20 +1093,17 @@ def replicas_simulación(iteraciones, tiempo_horas, usar_variable_control=False)
             
 
 if __name__ == "__main__":
+    progreso = ReporteProgreso(numero_replicas)
     for i in range(numero_replicas):
         env = sp.Environment()
         pizzeria = Pizzeria(env)
         pizzeria.iniciar_simulacion(tiempo_simulacion, i, logs=logs)
 
-        print(f'Replica {i+1} completada.')
-        print()
         print(pizzeria.obtener_metricas())
         if logs:
             pizzeria.generar_reporte_logs(f'reporte_logs_replica_{i+1}.txt')
-
-        print("")
-        print("--------------------------------")
-        print("")
+        progreso.registrar(pizzeria.obtener_metricas())
+    progreso.terminar()
 
 
 
@@ -0,0 +1,261 @@
+"""
+Simulador de inventarios vectorizado para ajustar políticas (s, S).
+
+Los inventarios sólo afectan al resto del modelo a través de las esperas por
+quiebre de stock en preparar_pizza. Por eso se puede:
+  1. Registrar, con una simulación completa, la secuencia de consumos por
+     pizza de cada ingrediente (instante y cantidad).
+  2. Reproducir esa demanda sobre miles de combinaciones (umbral s,
+     capacidad S) a la vez, con arreglos de numpy (una columna por política).
+  3. Confirmar los mejores candidatos en el modelo completo.
+
+Simplificaciones del sub-modelo (documentadas para interpretar resultados):
+  - La demanda registrada es fija: una espera por quiebre no retrasa a los
+    consumos siguientes.
+  - Un consumo sin stock suficiente queda pendiente (nivel negativo) hasta
+    la llegada del pedido en curso, y los consumos siguientes que encuentran
+    el nivel insuficiente antes de esa llegada también esperan.
+  - Las revisiones periódicas siempre encuentran un trabajador libre.
+  - Los tiempos de reposición usan números aleatorios comunes: el k-ésimo
+    pedido de cada política usa el mismo tiempo de reposición.
+"""
+
+import numpy as np
+import simpy as sp
+import time
+
+from simulacion_E3_antiteticas import Pizzeria
+
+
+INGREDIENTES = ['salsa_de_tomate', 'queso_mozzarella', 'pepperoni', 'mix_carnes']
+
+# Política de revisión (índice en Pizzeria.politicas_revision) de cada ingrediente
+POLITICA_REVISION = {
+    'salsa_de_tomate': 1,
+    'queso_mozzarella': 0,
+    'pepperoni': 0,
+    'mix_carnes': 0,
+}
+
+
+def generar_tiempos_reposicion(ingrediente, rng, n):
+    """Mismas distribuciones que Pizzeria.obtener_tiempo_reposicion (en horas)."""
+    if ingrediente == 'salsa_de_tomate':
+        return rng.weibull(a=1.2, size=n) * 10 / 60
+    elif ingrediente == 'queso_mozzarella':
+        return rng.lognormal(mean=1.58, sigma=0.25, size=n) / 60
+    elif ingrediente == 'pepperoni':
+        return rng.weibull(a=1.3, size=n) * 3.9 / 60
+    elif ingrediente == 'mix_carnes':
+        return rng.exponential(scale=5, size=n) / 60
+    raise ValueError(f'Ingrediente desconocido: {ingrediente}')
+
+
+def registrar_demanda(tiempo_horas, seed):
+    """
+    Corre una réplica completa del modelo y devuelve, por ingrediente, la
+    demanda registrada y el calendario de revisiones:
+        {ingrediente: {'tiempos': array, 'cantidades': array,
+                       'revisiones': array, 'umbral': ..., 'capacidad': ...}}
+    """
+    env = sp.Environment()
+    pizzeria = Pizzeria(env)
+    pizzeria.registro_consumo = []
+    pizzeria.iniciar_simulacion(tiempo_horas, seed, logs=False)
+
+    demanda = {}
+    for ingrediente in INGREDIENTES:
+        inventario = getattr(pizzeria, ingrediente)
+        registros = [(t, c) for t, inv, c in pizzeria.registro_consumo if inv is inventario]
+        tiempos = np.hstack([t for t, _ in registros]).astype(float) if registros else np.zeros(0)
+        cantidades = np.array([float(c) for _, c in registros])
+        revisiones = np.array([
+            float(t) for t, politica in pizzeria.calendario_revision
+            if politica == POLITICA_REVISION[ingrediente]
+        ])
+        demanda[ingrediente] = {
+            'tiempos': tiempos,
+            'cantidades': cantidades,
+            'revisiones': revisiones,
+            'umbral': pizzeria.umbral_reposicion[inventario],
+            'capacidad': inventario.capacity,
+        }
+    return demanda
+
+
+def evaluar_politicas(demanda_ingrediente, ingrediente, umbrales, capacidades, seed=0):
+    """
+    Evalúa simultáneamente las políticas (umbrales[k], capacidades[k]) sobre
+    la demanda registrada de un ingrediente.
+
+    Retorna un diccionario de arreglos (uno por política):
+      - 'quiebres': pizzas que tuvieron que esperar una reposición
+      - 'espera_total': horas totales de espera por quiebre
+      - 'reposiciones': pedidos de reposición realizados
+      - 'nivel_promedio': nivel medio observado en cada consumo
+    """
+    umbrales = np.asarray(umbrales, dtype=float)
+    capacidades = np.asarray(capacidades, dtype=float)
+    umbrales, capacidades = np.broadcast_arrays(umbrales, capacidades)
+    k = umbrales.size
+    discreto = ingrediente != 'salsa_de_tomate'
+
+    tiempos = demanda_ingrediente['tiempos']
+    cantidades = demanda_ingrediente['cantidades']
+    revisiones = demanda_ingrediente['revisiones']
+
+    # Eventos ordenados por tiempo: consumos (tipo 0) y revisiones (tipo 1).
+    # Ante empate se procesa primero el consumo.
+    instantes = np.concatenate([tiempos, revisiones])
+    tipos = np.concatenate([np.zeros(len(tiempos), dtype=int), np.ones(len(revisiones), dtype=int)])
+    valores = np.concatenate([cantidades, np.zeros(len(revisiones))])
+    orden = np.lexsort((tipos, instantes))
+
+    # Tiempos de reposición comunes a todas las políticas (CRN)
+    rng = np.random.default_rng(seed)
+    tiempos_reposicion = generar_tiempos_reposicion(ingrediente, rng, len(instantes) + 1)
+
+    nivel = capacidades.copy()
+    en_reposicion = np.zeros(k, dtype=bool)
+    llegada = np.full(k, np.inf)
+    cantidad_pedida = np.zeros(k)
+    pedidos = np.zeros(k, dtype=int)
+
+    quiebres = np.zeros(k, dtype=int)
+    espera_total = np.zeros(k)
+    suma_niveles = np.zeros(k)
+
+    def pedir(mascara, t):
+        cantidad = capacidades[mascara] - nivel[mascara]
+        if discreto:
+            cantidad = np.round(cantidad)
+        cantidad_pedida[mascara] = cantidad
+        llegada[mascara] = t + tiempos_reposicion[pedidos[mascara]]
+        pedidos[mascara] += 1
+        en_reposicion[mascara] = True
+
+    for e in orden:
+        t = instantes[e]
+
+        # Llegadas de reposición pendientes
+        llegan = en_reposicion & (llegada <= t)
+        if llegan.any():
+            nivel[llegan] += cantidad_pedida[llegan]
+            en_reposicion[llegan] = False
+
+        if tipos[e] == 1:
+            revisar = (nivel < umbrales) & ~en_reposicion
+            if revisar.any():
+                pedir(revisar, t)
+            continue
+
+        cantidad = valores[e]
+        falta = cantidad > nivel
+        if falta.any():
+            nuevos = falta & ~en_reposicion
+            if nuevos.any():
+                pedir(nuevos, t)
+            # La pizza espera la llegada de la reposición; el pedido se
+            # acredita recién en llegada (rama de llegadas pendientes)
+            quiebres[falta] += 1
+            espera_total[falta] += llegada[falta] - t
+        nivel -= cantidad
+        suma_niveles += np.maximum(nivel, 0)
+
+    return {
+        'umbral': umbrales,
+        'capacidad': capacidades,
+        'quiebres': quiebres,
+        'espera_total': espera_total,
+        'reposiciones': pedidos,
+        'nivel_promedio': suma_niveles / max(len(tiempos), 1),
+    }
+
+
+def evaluar_grilla(demandas, ingrediente, umbrales, capacidades, seed=0):
+    """
+    Evalúa la grilla completa umbrales x capacidades (sólo combinaciones con
+    umbral < capacidad) promediando sobre una o más demandas registradas.
+    """
+    s, S = np.meshgrid(np.asarray(umbrales, dtype=float), np.asarray(capacidades, dtype=float))
+    validas = s < S
+    s, S = s[validas], S[validas]
+
+    acumulado = None
+    for i, demanda in enumerate(demandas):
+        resultado = evaluar_politicas(demanda[ingrediente], ingrediente, s, S, seed=seed + i)
+        if acumulado is None:
+            acumulado = {clave: np.asarray(valor, dtype=float) for clave, valor in resultado.items()}
+        else:
+            for clave in ('quiebres', 'espera_total', 'reposiciones', 'nivel_promedio'):
+                acumulado[clave] = acumulado[clave] + resultado[clave]
+    for clave in ('quiebres', 'espera_total', 'reposiciones', 'nivel_promedio'):
+        acumulado[clave] = acumulado[clave] / len(demandas)
+    return acumulado
+
+
+def mejores_politicas(resultados, n=5, criterio='espera_total', capacidad_maxima=None):
+    """
+    Ordena las políticas por el criterio (menor es mejor) y, a igualdad,
+    por menor capacidad y mayor umbral. Retorna lista de (umbral, capacidad, valor).
+    """
+    valores = resultados[criterio]
+    permitidas = np.ones(len(valores), dtype=bool)
+    if capacidad_maxima is not None:
+        permitidas = resultados['capacidad'] <= capacidad_maxima
+    indices = np.flatnonzero(permitidas)
+    orden = np.lexsort((
+        -resultados['umbral'][indices],
+        resultados['capacidad'][indices],
+        valores[indices],
+    ))
+    return [
+        (resultados['umbral'][i], resultados['capacidad'][i], valores[i])
+        for i in indices[orden[:n]]
+    ]
+
+
+def confirmar_politicas(ingrediente, candidatos, iteraciones, tiempo_horas, semilla_inicial=0):
+    """
+    Corre el modelo completo para cada candidato (umbral, capacidad) con las
+    mismas semillas y retorna [(umbral, capacidad, métricas promedio)].
+    """
+    confirmados = []
+    for umbral, capacidad, *_ in candidatos:
+        metricas = []
+        for i in range(iteraciones):
+            env = sp.Environment()
+            pizzeria = Pizzeria(env)
+            pizzeria.configurar_inventario(ingrediente, umbral=umbral, capacidad=capacidad)
+            pizzeria.iniciar_simulacion(tiempo_horas, semilla_inicial + i, logs=False)
+            metricas.append(pizzeria.obtener_metricas())
+        promedio = {clave: np.mean([m[clave] for m in metricas]) for clave in metricas[0]}
+        confirmados.append((umbral, capacidad, promedio))
+    return confirmados
+
+
+if __name__ == "__main__":
+    tiempo_simulacion = 168
+    demandas = [registrar_demanda(tiempo_simulacion, seed) for seed in range(5)]
+
+    for ingrediente in INGREDIENTES:
+        capacidad_actual = demandas[0][ingrediente]['capacidad']
+        umbrales = np.linspace(0, capacidad_actual, 60)
+        capacidades = np.linspace(capacidad_actual / 4, capacidad_actual * 1.5, 60)
+
+        inicio = time.perf_counter()
+        resultados = evaluar_grilla(demandas, ingrediente, umbrales, capacidades)
+        duracion = time.perf_counter() - inicio
+
+        print(f"\n===== {ingrediente} =====")
+        print(f"Políticas evaluadas: {len(resultados['umbral'])} en {duracion:.2f} s")
+        for umbral, capacidad, espera in mejores_politicas(resultados, n=3, capacidad_maxima=capacidad_actual):
+            print(f"  s = {umbral:,.0f}, S = {capacidad:,.0f}: espera media por quiebre = {espera * 60:.2f} min/semana")
+
+    mejores = mejores_politicas(
+        evaluar_grilla(demandas, 'salsa_de_tomate', np.linspace(0, 15000, 60), np.linspace(3750, 15000, 60)),
+        n=2,
+        capacidad_maxima=15000,
+    )
+    for umbral, capacidad, metricas in confirmar_politicas('salsa_de_tomate', mejores, 5, tiempo_simulacion):
+        print(f"\nModelo completo s = {umbral:,.0f}, S = {capacidad:,.0f}: utilidad media = {metricas['Utilidad']:,.0f}")
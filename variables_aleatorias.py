@@ -0,0 +1,203 @@
+"""
+Capa de variables aleatorias del modelo por transformada inversa.
+
+Cada entrada aleatoria de Pizzeria (simulacion_E3_antiteticas.py) es un
+flujo con nombre y se genera como F^-1(U), con un generador de uniformes
+independiente por flujo (SeedSequence(semilla).spawn). Así:
+  - el k-ésimo sorteo de un flujo es el mismo en dos réplicas con la misma
+    semilla aunque los demás flujos se consuman en otro orden (números
+    aleatorios comunes sincronizados por flujo), y
+  - cualquier subconjunto de flujos se puede volver antitético (1 - U) sin
+    tocar los demás.
+
+Las entradas discretas (premium, pizzas por pedido, tipo de pizza,
+cantidades de ingredientes) también son monótonas en U, así que la
+correlación negativa del par antitético se conserva.
+
+Uso:
+    variables = VariablesAleatorias(semilla, antiteticas={'interarrival', 'coccion'})
+    pizzeria.iniciar_simulacion(168, semilla, variables=variables)
+
+    normal, antitetica = par_antitetico(semilla)  # todos los flujos
+"""
+
+import bisect
+
+import numpy as np
+from scipy.stats import beta as beta_dist, binom, expon, gamma as gamma_dist, lognorm, nbinom, norm, poisson, triang, weibull_min
+
+
+# Orden fijo: define qué hijo de la SeedSequence usa cada flujo
+FLUJOS = [
+    'interarrival',
+    'premium',
+    'llamada',
+    'num_pizzas',
+    'tipo_pizza',
+    'cantidad_salsa',
+    'tiempo_salsa',
+    'cantidad_queso',
+    'tiempo_queso',
+    'cantidad_pepperoni',
+    'tiempo_pepperoni',
+    'cantidad_carnes',
+    'tiempo_carnes',
+    'coccion',
+    'tiempo_embalaje',
+    'despacho_ida',
+    'despacho_vuelta',
+    'reposicion_salsa',
+    'reposicion_queso',
+    'reposicion_pepperoni',
+    'reposicion_carnes',
+]
+
+# Probabilidades acumuladas de las entradas discretas, por premium
+ACUMULADAS_NUM_PIZZAS = {True: [0.3, 0.7, 0.9], False: [0.6, 0.8, 0.95]}
+ACUMULADAS_TIPO_PIZZA = {True: [0.3, 0.9], False: [0.1, 0.5]}
+
+
+def _triangular_embalaje(u, a=1.1, c=2, b=2.3):
+    # Inversa de la triangular(1.1, 2, 2.3), en forma cerrada
+    fc = (c - a) / (b - a)
+    return np.where(
+        u < fc,
+        a + np.sqrt(u * (b - a) * (c - a)),
+        b - np.sqrt((1 - u) * (b - a) * (b - c)),
+    )
+
+
+# F^-1(u) de cada flujo: tiempos en minutos, cantidades en unidades y el
+# tiempo entre llamadas como Exponencial(1) (el modelo lo divide por la tasa).
+# Funcionan con escalares y con arreglos.
+INVERSAS = {
+    'interarrival': lambda u: -np.log1p(-u),
+    'premium': lambda u: u < 3/20,
+    'llamada': lambda u: gamma_dist.ppf(u, a=4, scale=0.5),
+    'num_pizzas': lambda u, premium: bisect.bisect_right(ACUMULADAS_NUM_PIZZAS[bool(premium)], u) + 1,
+    'tipo_pizza': lambda u, premium: bisect.bisect_right(ACUMULADAS_TIPO_PIZZA[bool(premium)], u) + 1,
+    'cantidad_salsa': lambda u: expon.ppf(u, scale=250),
+    'tiempo_salsa': lambda u: beta_dist.ppf(u, a=5, b=2.2),
+    'cantidad_queso': lambda u: nbinom.ppf(u, n=25, p=0.52).astype(int),
+    'tiempo_queso': lambda u: triang.ppf(u, c=(1 - 0.9) / (1.2 - 0.9), loc=0.9, scale=0.3),
+    'cantidad_pepperoni': lambda u: poisson.ppf(u, mu=20).astype(int),
+    'tiempo_pepperoni': lambda u: lognorm.ppf(u, s=0.25, scale=np.exp(0.5)),
+    'cantidad_carnes': lambda u: binom.ppf(u, n=16, p=0.42).astype(int),
+    'tiempo_carnes': lambda u: 1 + u * 0.8,
+    'coccion': lambda u: np.exp(norm.ppf(u, loc=2.5, scale=0.2)),
+    'tiempo_embalaje': _triangular_embalaje,
+    'despacho_ida': lambda u: gamma_dist.ppf(u, a=7.5, scale=0.9),
+    'despacho_vuelta': lambda u: gamma_dist.ppf(u, a=7.5, scale=0.9),
+    'reposicion_salsa': lambda u: weibull_min.ppf(u, c=1.2) * 10,
+    'reposicion_queso': lambda u: lognorm.ppf(u, s=0.25, scale=np.exp(1.58)),
+    'reposicion_pepperoni': lambda u: weibull_min.ppf(u, c=1.3) * 3.9,
+    'reposicion_carnes': lambda u: expon.ppf(u, scale=5),
+}
+
+# Flujos cuya inversa depende del estado del pedido (se transforman sorteo a sorteo)
+CONDICIONALES = {'num_pizzas', 'tipo_pizza'}
+
+# Inversas con parámetros que un escenario puede cambiar ('entradas' en
+# ejecutor_replicas.crear_pizzeria): flujo -> (F^-1(u, **parámetros), parámetros base)
+PARAMETRICAS = {
+    'coccion': (lambda u, mu, sigma: np.exp(norm.ppf(u, loc=mu, scale=sigma)), {'mu': 2.5, 'sigma': 0.2}),
+    'despacho_ida': (lambda u, forma, escala: gamma_dist.ppf(u, a=forma, scale=escala), {'forma': 7.5, 'escala': 0.9}),
+    'despacho_vuelta': (lambda u, forma, escala: gamma_dist.ppf(u, a=forma, scale=escala), {'forma': 7.5, 'escala': 0.9}),
+}
+
+
+def inversas_parametrizadas(parametros):
+    """INVERSAS con las de los flujos de parametros ({flujo: {parámetro: valor}}) reemplazadas."""
+    inversas = dict(INVERSAS)
+    for flujo, valores in parametros.items():
+        if flujo not in PARAMETRICAS:
+            raise ValueError(f'El flujo {flujo} no tiene parámetros configurables')
+        inversa, base = PARAMETRICAS[flujo]
+        desconocidos = set(valores) - set(base)
+        if desconocidos:
+            raise ValueError(f'Parámetros desconocidos de {flujo}: {sorted(desconocidos)}')
+        completos = dict(base, **valores)
+        inversas[flujo] = lambda u, inversa=inversa, completos=completos: inversa(u, **completos)
+    return inversas
+
+
+def normalizar_flujos(flujos):
+    """Conjunto de nombres de flujos; acepta un nombre, 'todas' o None."""
+    if flujos is None:
+        return frozenset()
+    if flujos == 'todas':
+        return frozenset(FLUJOS)
+    flujos = frozenset([flujos] if isinstance(flujos, str) else flujos)
+    desconocidos = flujos - set(FLUJOS)
+    if desconocidos:
+        raise ValueError(f'Flujos desconocidos: {sorted(desconocidos)}')
+    return flujos
+
+
+class VariablesAleatorias:
+
+    def __init__(self, semilla, antiteticas=None, bloque=512):
+        self.semilla = semilla
+        self.antiteticas = normalizar_flujos(antiteticas)
+        self.bloque = bloque
+        hijos = np.random.SeedSequence(semilla).spawn(len(FLUJOS))
+        self.generadores = {nombre: np.random.default_rng(hijo) for nombre, hijo in zip(FLUJOS, hijos)}
+        self.uniformes = {nombre: None for nombre in FLUJOS}
+        self.valores = {nombre: None for nombre in FLUJOS}
+        self.posiciones = dict.fromkeys(FLUJOS, 0)
+        self.sorteos = dict.fromkeys(FLUJOS, 0)  # total entregado por flujo
+        # Log de la razón de verosimilitud de los sorteos (0 salvo en muestreo_importancia.py)
+        self.log_peso = 0.0
+        self.pizzeria = None
+        self.inversas = None  # None = INVERSAS (un dict de lambdas no se puede enviar al pool)
+
+    def vincular(self, pizzeria):
+        # Pizzeria que consume los sorteos (iniciar_simulacion la registra);
+        # sus parametros_entradas cambian las inversas antes del primer sorteo
+        self.pizzeria = pizzeria
+        if pizzeria.parametros_entradas:
+            self.inversas = inversas_parametrizadas(pizzeria.parametros_entradas)
+
+    def _uniformes_bloque(self, nombre):
+        # Uniformes crudas del siguiente bloque (estratificacion.py las estratifica)
+        return self.generadores[nombre].random(self.bloque)
+
+    def _recargar(self, nombre):
+        u = self._uniformes_bloque(nombre)
+        if nombre in self.antiteticas:
+            u = 1 - u
+        # Intervalo abierto: F^-1(0) o F^-1(1) pueden ser infinitos
+        u = np.clip(u, np.nextafter(0.0, 1.0), np.nextafter(1.0, 0.0))
+        self.uniformes[nombre] = u
+        # Transformada por bloque (vectorizada); las condicionales, sorteo a sorteo
+        self.valores[nombre] = u if nombre in CONDICIONALES else (self.inversas or INVERSAS)[nombre](u)
+        self.posiciones[nombre] = 0
+
+    def uniforme(self, nombre):
+        """Siguiente uniforme del flujo (ya invertida si el flujo es antitético)."""
+        return self._siguiente(nombre, self.uniformes)
+
+    def sortear(self, nombre, *condicion):
+        """Siguiente valor F^-1(U) del flujo; condicion se pasa a las inversas condicionales."""
+        if nombre in CONDICIONALES:
+            return INVERSAS[nombre](self._siguiente(nombre, self.uniformes), *condicion)
+        return self._siguiente(nombre, self.valores)
+
+    def _siguiente(self, nombre, origen):
+        posicion = self.posiciones[nombre]
+        if origen[nombre] is None or posicion >= self.bloque:
+            self._recargar(nombre)
+            posicion = 0
+        self.posiciones[nombre] = posicion + 1
+        self.sorteos[nombre] += 1
+        return origen[nombre][posicion]
+
+    def antitetica(self, antiteticas='todas'):
+        """Generador con la misma semilla y antiteticas invertidas respecto de éste."""
+        return VariablesAleatorias(self.semilla, self.antiteticas ^ normalizar_flujos(antiteticas), self.bloque)
+
+
+def par_antitetico(semilla, antiteticas='todas', bloque=512):
+    """(normal, antitética) con la misma semilla; antiteticas elige los flujos a invertir."""
+    normal = VariablesAleatorias(semilla, bloque=bloque)
+    return normal, normal.antitetica(antiteticas)
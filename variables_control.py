@@ -0,0 +1,170 @@
+"""
+Estimador de variables de control múltiples, actualizado réplica a réplica.
+
+En vez de guardar todas las filas (Y, X) y resolver np.linalg.lstsq al
+final, se mantienen los estadísticos suficientes: n, las medias de Y y X y
+los co-momentos centrados Syy, Sxy y Sxx (actualización de Welford). En
+cualquier momento se obtiene:
+
+    beta       = Sxx^-1 Sxy
+    media_vc   = media(Y) - beta · (media(X) - E[X])
+    Var(media_vc) = s_e^2 * (1/n + d' Sxx^-1 d),   d = media(X) - E[X]
+    s_e^2      = (Syy - beta · Sxy) / (n - q - 1)
+
+con intervalo t de n - q - 1 grados de libertad (q = número de controles).
+Es el estimador clásico de variables de control con beta estimado con todas
+las réplicas (Lavenberg y Welch), sin separar calibración y estimación.
+
+Dos estimadores de réplicas disjuntas se combinan con combinar() (fórmula
+de Chan et al. para co-momentos), así que cada proceso puede acumular el
+suyo y el coordinador sólo suma estados de tamaño q x q.
+"""
+
+import math
+
+import numpy as np
+from scipy import stats
+
+from ejecutor_replicas import ejecutar_replicas
+from medias_controles import vector_medias
+
+
+class EstimadorControl:
+
+    def __init__(self, medias_controles, nombres=None):
+        self.medias_controles = np.asarray(medias_controles, dtype=float)
+        q = len(self.medias_controles)
+        self.nombres = list(nombres) if nombres is not None else [f'X{j + 1}' for j in range(q)]
+        self.n = 0
+        self.media_y = 0.0
+        self.media_x = np.zeros(q)
+        self.syy = 0.0
+        self.sxy = np.zeros(q)
+        self.sxx = np.zeros((q, q))
+
+    def agregar(self, y, x):
+        x = np.asarray(x, dtype=float)
+        self.n += 1
+        dy = y - self.media_y
+        dx = x - self.media_x
+        self.media_y += dy / self.n
+        self.media_x += dx / self.n
+        # Co-momentos con la desviación antes y después de actualizar la media
+        self.syy += dy * (y - self.media_y)
+        self.sxy += dx * (y - self.media_y)
+        self.sxx += np.outer(dx, x - self.media_x)
+
+    def agregar_metricas(self, metricas, metrica='Utilidad', controles=None):
+        # Los controles se leen por nombre de controles (obtener_controles) o de metricas
+        observados = dict(metricas, **(controles or {}))
+        self.agregar(metricas[metrica], [observados[nombre] for nombre in self.nombres])
+
+    def combinar(self, otro):
+        """Estimador con las réplicas de ambos (no modifica los originales)."""
+        combinado = EstimadorControl(self.medias_controles, self.nombres)
+        n = self.n + otro.n
+        if n == 0:
+            return combinado
+        dy = otro.media_y - self.media_y
+        dx = otro.media_x - self.media_x
+        peso = self.n * otro.n / n
+        combinado.n = n
+        combinado.media_y = self.media_y + dy * otro.n / n
+        combinado.media_x = self.media_x + dx * otro.n / n
+        combinado.syy = self.syy + otro.syy + dy * dy * peso
+        combinado.sxy = self.sxy + otro.sxy + dx * dy * peso
+        combinado.sxx = self.sxx + otro.sxx + np.outer(dx, dx) * peso
+        return combinado
+
+    def grados_libertad(self):
+        return self.n - len(self.medias_controles) - 1
+
+    def coeficientes(self):
+        if self.n < 2:
+            return np.zeros(len(self.medias_controles))
+        # lstsq en vez de solve: tolera controles colineales o constantes
+        return np.linalg.lstsq(self.sxx, self.sxy, rcond=None)[0]
+
+    def media(self):
+        return self.media_y - self.coeficientes() @ (self.media_x - self.medias_controles)
+
+    def varianza(self):
+        """Varianza estimada de media() (nan con menos de q + 2 réplicas)."""
+        gl = self.grados_libertad()
+        if gl < 1:
+            return math.nan
+        beta = self.coeficientes()
+        s2 = max(self.syy - beta @ self.sxy, 0.0) / gl
+        d = self.media_x - self.medias_controles
+        return s2 * (1 / self.n + d @ np.linalg.pinv(self.sxx) @ d)
+
+    def varianza_simple(self):
+        return self.syy / (self.n - 1) / self.n if self.n >= 2 else math.nan
+
+    def intervalo(self, confianza=0.95):
+        """(media, semiancho) del intervalo de confianza del estimador controlado."""
+        varianza = self.varianza()
+        if math.isnan(varianza):
+            return self.media(), math.inf
+        cuantil = stats.t.ppf((1 + confianza) / 2, self.grados_libertad())
+        return self.media(), cuantil * math.sqrt(varianza)
+
+    def precision_alcanzada(self, semiancho, confianza=0.95, relativo=False, n_minimo=10):
+        """Criterio de detención secuencial sobre el semiancho del intervalo."""
+        if self.n < n_minimo:
+            return False
+        media, actual = self.intervalo(confianza)
+        if relativo:
+            return actual <= semiancho * abs(media)
+        return actual <= semiancho
+
+    def resumen(self, confianza=0.95):
+        media, semiancho = self.intervalo(confianza)
+        varianza = self.varianza()
+        varianza_simple = self.varianza_simple()
+        reduccion = (
+            1 - varianza / varianza_simple
+            if varianza_simple and not math.isnan(varianza) else math.nan
+        )
+        return {
+            'n': self.n,
+            'media_simple': self.media_y,
+            'var_simple': varianza_simple,
+            'media_control': media,
+            'var_control': varianza,
+            'semiancho': semiancho,
+            'confianza': confianza,
+            'beta': dict(zip(self.nombres, self.coeficientes())),
+            'reduccion_varianza': reduccion,
+        }
+
+
+def estimar_secuencial(
+    escenario, controles, tiempo_horas, semiancho, medias_controles=None,
+    relativo=False, confianza=0.95, metrica='Utilidad', semilla_inicial=0,
+    lote=10, n_minimo=10, n_maximo=1000, motor='serial', procesos=None, progreso=None,
+):
+    """
+    Corre réplicas en lotes hasta que el intervalo del estimador controlado
+    tenga semiancho <= semiancho (relativo a la media si relativo=True) o se
+    llegue a n_maximo. controles son nombres de obtener_controles (o de
+    obtener_metricas); si no se dan medias_controles, E[X] se toma de
+    medias_controles.py para el escenario y el horizonte.
+    Retorna el EstimadorControl final.
+    """
+    if medias_controles is None:
+        medias_controles = vector_medias(controles, escenario, tiempo_horas)
+    estimador = EstimadorControl(medias_controles, controles)
+    semilla = semilla_inicial
+    while estimador.n < n_maximo:
+        semillas = range(semilla, semilla + min(lote, n_maximo - estimador.n))
+        semilla = semillas.stop
+        for resultado in ejecutar_replicas(escenario, semillas, tiempo_horas, motor=motor, procesos=procesos):
+            estimador.agregar_metricas(resultado['metricas'], metrica, resultado['controles'])
+            if progreso is not None:
+                progreso.registrar(resultado['metricas'])
+        if estimador.precision_alcanzada(semiancho, confianza, relativo, n_minimo):
+            break
+    if progreso is not None:
+        progreso.terminar()
+    return estimador